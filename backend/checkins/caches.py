@@ -0,0 +1,23 @@
+"""
+Versions of the cached ``checkins.trends`` results.
+
+Kept apart from the trend analytics so the signal handlers and the bulk
+importer can invalidate trends without importing NumPy.
+"""
+import time
+
+from django.core.cache import cache
+
+
+def _version_key(user_id):
+    return f'checkins:trends:version:{user_id}'
+
+
+def invalidate_trends(user_id):
+    """Make every cached trend result of ``user_id`` stale."""
+    cache.set(_version_key(user_id), time.time_ns(), None)
+
+
+def trends_version(user_id):
+    cache.add(_version_key(user_id), time.time_ns(), None)
+    return cache.get(_version_key(user_id))
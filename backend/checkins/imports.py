@@ -0,0 +1,37 @@
+from django.db import connection
+
+from circus_grove.imports import Importer, copy_upsert
+from .caches import invalidate_trends
+from .models import CheckIn
+from .serializers import CheckInSerializer
+
+FIELDS = (
+    'date', 'weight_kg', 'body_fat_percentage', 'muscle_mass_kg', 'mood',
+    'energy_level', 'sleep_hours', 'water_intake_ml', 'notes',
+)
+
+
+class CheckInImporter(Importer):
+    """Upserts check-ins on ``(user, date)``; an imported day replaces the stored one."""
+    serializer_class = CheckInSerializer
+
+    def write(self, rows):
+        # The last row of a day wins: one statement cannot upsert the same row twice.
+        rows = {row['date']: row for row in rows}.values()
+        if connection.vendor == 'postgresql':
+            copy_upsert(
+                CheckIn,
+                ('user',) + FIELDS,
+                [(self.user.pk, *(row.get(field) for field in FIELDS)) for row in rows],
+                unique_fields=('user', 'date'),
+            )
+        else:
+            CheckIn.objects.bulk_create(
+                [CheckIn(user=self.user, **row) for row in rows],
+                update_conflicts=True,
+                unique_fields=['user', 'date'],
+                update_fields=[field for field in FIELDS if field != 'date'] + ['updated_at'],
+            )
+
+    def finish(self):
+        invalidate_trends(self.user.pk)
@@ -0,0 +1,23 @@
+# Generated by Django 5.0 on 2026-10-18 09:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+from circus_grove.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('checkins', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='checkin',
+            index=models.Index(fields=['user', '-date', '-created_at'], name='checkin_user_idx'),
+        ),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 5.0 on 2026-10-18 14:20
+
+from django.db import migrations
+
+from circus_grove.operations import AddFullTextSearch
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checkins', '0003_composite_indexes'),
+    ]
+
+    operations = [
+        AddFullTextSearch('checkins', 6, body=('mood', 'notes')),
+    ]
@@ -29,6 +29,9 @@ class CheckIn(models.Model):
         db_table = 'checkins'
         ordering = ['-date', '-created_at']
         unique_together = ['user', 'date']
+        indexes = [
+            models.Index(fields=['user', '-date', '-created_at'], name='checkin_user_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.date}"
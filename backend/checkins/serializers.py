@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from circus_grove.serializers import SparseFieldsMixin
 from .models import CheckIn
 
 
-class CheckInSerializer(serializers.ModelSerializer):
+class CheckInSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for CheckIn model."""
     user = serializers.StringRelatedField(read_only=True)
     
@@ -14,3 +15,5 @@ class CheckInSerializer(serializers.ModelSerializer):
             'water_intake_ml', 'notes', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'user', 'created_at', 'updated_at']
+        select_related = ['user']
+        value_lookups = {'user': 'user__username'}
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import CheckIn
+from .caches import invalidate_trends
+
+
+@receiver(post_save, sender=CheckIn)
+@receiver(post_delete, sender=CheckIn)
+def invalidate_checkin_trends(sender, instance, **kwargs):
+    invalidate_trends(instance.user_id)
@@ -1,3 +1,126 @@
-from django.test import TestCase
+from datetime import date
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APITestCase
+
+from circus_grove.testing import QueryPlanAssertions
+
+from .caches import trends_version
+from .models import CheckIn
+from .trends import compute_trends, get_trends
+
+User = get_user_model()
+
+
+class ListIndexTests(QueryPlanAssertions, APITestCase):
+    """The list endpoint reads its pages in order from the composite index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='client', email='client@example.com')
+        CheckIn.objects.create(user=cls.user, date=date(2024, 1, 1), weight_kg=Decimal('80.00'))
+
+    def test_checkin_list(self):
+        self.client.force_authenticate(self.user)
+        self.assertListIndexScan('checkin_user_idx', '/api/checkins/')
+        self.assertListIndexScan('checkin_user_idx', '/api/checkins/', pagination='cursor')
+
+
+class CheckInTrendsTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.coach = User.objects.create_user(username='coach', email='coach@example.com', user_type='coach')
+        cls.client_user = User.objects.create_user(username='client', email='client@example.com', coach=cls.coach)
+        cls.stranger = User.objects.create_user(username='stranger', email='stranger@example.com')
+
+    def setUp(self):
+        self.client.force_authenticate(self.coach)
+
+    def test_coach_reads_client(self):
+        response = self.client.get('/api/checkins/trends/', {'user': self.client_user.pk})
+        self.assertEqual(response.status_code, 200)
+
+    def test_client_id_must_be_a_number(self):
+        response = self.client.get('/api/checkins/trends/', {'user': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('user', response.json())
+
+    def test_other_users_are_not_found(self):
+        response = self.client.get('/api/checkins/trends/', {'user': self.stranger.pk})
+        self.assertEqual(response.status_code, 404)
+
+
+class ComputeTrendsTests(SimpleTestCase):
+    # (date, weight_kg, body_fat_percentage, muscle_mass_kg, sleep_hours, energy_level, water_intake_ml)
+    rows = [
+        (date(2024, 1, 1), 80.0, 20.0, None, 7.0, None, None),
+        (date(2024, 1, 2), 81.0, None, None, 8.0, None, None),
+        (date(2024, 1, 5), 84.0, 22.0, None, None, None, None),
+    ]
+
+    def test_rolling_average_covers_calendar_days(self):
+        weight = compute_trends(self.rows, window=2)['metrics']['weight_kg']
+        # 2024-01-05 has no check-in in the day before it, so it averages alone.
+        self.assertEqual(weight['rolling_averages'], [80.0, 80.5, 84.0])
+        self.assertEqual(weight['rolling_average'], 84.0)
+
+    def test_slope_of_a_linear_series(self):
+        metrics = compute_trends(self.rows)['metrics']
+        self.assertEqual(metrics['weight_kg']['slope_per_week'], 7.0)
+        self.assertEqual(metrics['body_fat_percentage']['slope_per_week'], 3.5)
+
+    def test_gaps_are_skipped(self):
+        metrics = compute_trends(self.rows, height_cm=200, window=2)['metrics']
+        body_fat = metrics['body_fat_percentage']
+        self.assertEqual(body_fat['values'], [20.0, None, 22.0])
+        self.assertEqual(body_fat['rolling_averages'], [20.0, 20.0, 22.0])
+        self.assertEqual(body_fat['latest'], 22.0)
+        self.assertEqual(metrics['sleep_hours']['latest'], 8.0)
+        self.assertEqual(metrics['sleep_hours']['rolling_averages'], [7.0, 7.5, None])
+        self.assertEqual(metrics['lean_mass_kg']['values'], [64.0, None, 65.52])
+        self.assertEqual(metrics['bmi']['values'], [20.0, 20.25, 21.0])
+        muscle = metrics['muscle_mass_kg']
+        self.assertEqual(muscle['values'], [None, None, None])
+        self.assertEqual((muscle['latest'], muscle['rolling_average'], muscle['slope_per_week']), (None, None, None))
+
+    def test_week_over_week_delta(self):
+        rows = [
+            (date(2024, 1, 1), 80.0, None, None, None, None, None),
+            (date(2024, 1, 8), 82.0, None, None, None, None, None),
+        ]
+        metrics = compute_trends(rows)['metrics']
+        self.assertEqual(metrics['weight_kg']['week_over_week_delta'], 2.0)
+        self.assertIsNone(compute_trends(self.rows)['metrics']['weight_kg']['week_over_week_delta'])
+
+    def test_no_rows(self):
+        self.assertEqual(compute_trends([]), {'count': 0, 'window_days': 7, 'dates': [], 'metrics': {}})
+
+
+class TrendsCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='client', email='client@example.com')
+        CheckIn.objects.create(user=cls.user, date=date(2024, 1, 1), weight_kg=Decimal('80.00'))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_check_in_writes_bump_the_version(self):
+        self.assertEqual(get_trends(self.user)['count'], 1)
+        version = trends_version(self.user.pk)
+        checkin = CheckIn.objects.create(user=self.user, date=date(2024, 1, 2), weight_kg=Decimal('81.00'))
+        self.assertNotEqual(trends_version(self.user.pk), version)
+        self.assertEqual(get_trends(self.user)['count'], 2)
+
+        version = trends_version(self.user.pk)
+        checkin.delete()
+        self.assertNotEqual(trends_version(self.user.pk), version)
+        self.assertEqual(get_trends(self.user)['count'], 1)
+
+    def test_repeat_reads_are_cached(self):
+        get_trends(self.user)
+        with self.assertNumQueries(0):
+            get_trends(self.user)
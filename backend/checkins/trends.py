@@ -0,0 +1,138 @@
+"""
+Check-in trend analytics.
+
+A user's whole check-in history is fetched with one ``values_list`` query
+and analysed column-wise with NumPy: rolling averages over a calendar
+window, a least-squares slope, week-over-week deltas, and derived lean
+mass and BMI. Results are cached per user until the next check-in write.
+"""
+import numpy as np
+from django.core.cache import cache
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+
+from .caches import trends_version
+from .models import CheckIn
+
+METRICS = (
+    'weight_kg',
+    'body_fat_percentage',
+    'muscle_mass_kg',
+    'sleep_hours',
+    'energy_level',
+    'water_intake_ml',
+)
+DERIVED_METRICS = ('lean_mass_kg', 'bmi')
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _rolling_mean(days, values, window):
+    """Mean of each column over the ``window`` calendar days ending at every row."""
+    present = ~np.isnan(values)
+    sums = np.vstack([np.zeros(values.shape[1]), np.cumsum(np.where(present, values, 0.0), axis=0)])
+    counts = np.vstack([np.zeros(values.shape[1]), np.cumsum(present, axis=0)])
+    start = np.searchsorted(days, days - window + 1, side='left')
+    end = np.arange(1, len(days) + 1)
+    window_counts = counts[end] - counts[start]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(window_counts > 0, (sums[end] - sums[start]) / window_counts, np.nan)
+
+
+def _slope(days, values):
+    """Least-squares slope per day of each column, ignoring missing values."""
+    present = ~np.isnan(values)
+    n = present.sum(axis=0)
+    x = np.where(present, days[:, None].astype(float), 0.0)
+    y = np.where(present, values, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        x_mean = x.sum(axis=0) / n
+        y_mean = y.sum(axis=0) / n
+        dx = np.where(present, x - x_mean, 0.0)
+        dy = np.where(present, y - y_mean, 0.0)
+        variance = (dx * dx).sum(axis=0)
+        return np.where((n > 1) & (variance > 0), (dx * dy).sum(axis=0) / variance, np.nan)
+
+
+def _window_mean(values, mask):
+    present = ~np.isnan(values) & mask[:, None]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(present, values, 0.0).sum(axis=0) / present.sum(axis=0)
+
+
+def _clean(array):
+    """Round to 2 places and turn NaN into None for JSON."""
+    cleaned = np.round(array, 2).astype(object)
+    cleaned[np.isnan(array)] = None
+    return cleaned.tolist()
+
+
+def _scalar(value):
+    return None if np.isnan(value) else round(float(value), 2)
+
+
+def compute_trends(rows, height_cm=None, window=7):
+    """
+    Analyse check-in ``rows`` of ``(date, *METRICS)`` sorted by date.
+
+    Returns aligned per-metric series plus summary statistics. Derived lean
+    mass uses weight and body fat; BMI needs ``height_cm``.
+    """
+    if not rows:
+        return {'count': 0, 'window_days': window, 'dates': [], 'metrics': {}}
+
+    dates = [row[0] for row in rows]
+    days = np.array(dates, dtype='datetime64[D]').astype(np.int64)
+    values = np.array([row[1:] for row in rows], dtype=float)
+
+    weight = values[:, METRICS.index('weight_kg')]
+    body_fat = values[:, METRICS.index('body_fat_percentage')]
+    lean_mass = weight * (1 - body_fat / 100)
+    height_m = float(height_cm) / 100 if height_cm else np.nan
+    bmi = weight / (height_m * height_m)
+    values = np.column_stack([values, lean_mass, bmi])
+    names = METRICS + DERIVED_METRICS
+
+    rolling = _rolling_mean(days, values, window)
+    slopes = _slope(days, values)
+    last_day = days[-1]
+    this_week = _window_mean(values, days > last_day - 7)
+    last_week = _window_mean(values, (days > last_day - 14) & (days <= last_day - 7))
+
+    metrics = {}
+    for index, name in enumerate(names):
+        column = values[:, index]
+        present = np.flatnonzero(~np.isnan(column))
+        metrics[name] = {
+            'latest': _scalar(column[present[-1]]) if len(present) else None,
+            'rolling_average': _scalar(rolling[-1, index]),
+            'slope_per_week': _scalar(slopes[index] * 7),
+            'week_over_week_delta': _scalar(this_week[index] - last_week[index]),
+            'values': _clean(column),
+            'rolling_averages': _clean(rolling[:, index]),
+        }
+    return {
+        'count': len(dates),
+        'window_days': window,
+        'dates': [day.isoformat() for day in dates],
+        'metrics': metrics,
+    }
+
+
+def get_trends(user, start=None, end=None, window=7):
+    """Return the cached trend analysis of ``user``'s check-ins, computing it on a miss."""
+    # Height is part of the key so a profile update recomputes BMI.
+    key = f'checkins:trends:{user.id}:{trends_version(user.id)}:{user.height_cm}:{start}:{end}:{window}'
+    result = cache.get(key)
+    if result is None:
+        checkins = CheckIn.objects.filter(user=user)
+        if start is not None:
+            checkins = checkins.filter(date__gte=start)
+        if end is not None:
+            checkins = checkins.filter(date__lte=end)
+        # Cast in the database so NumPy receives floats rather than Decimals.
+        columns = [Cast(metric, FloatField()) for metric in METRICS]
+        rows = list(checkins.order_by('date').values_list('date', *columns))
+        result = compute_trends(rows, height_cm=user.height_cm, window=window)
+        cache.set(key, result, CACHE_TIMEOUT)
+    return result
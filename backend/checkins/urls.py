@@ -1,9 +1,10 @@
 from django.urls import path
-from .views import CheckInListCreateView, CheckInDetailView
+from .views import CheckInListCreateView, CheckInDetailView, CheckInTrendsView
 
 app_name = 'checkins'
 
 urlpatterns = [
     path('', CheckInListCreateView.as_view(), name='checkin-list'),
     path('<int:pk>/', CheckInDetailView.as_view(), name='checkin-detail'),
+    path('trends/', CheckInTrendsView.as_view(), name='checkin-trends'),
 ]
@@ -1,9 +1,18 @@
 from rest_framework import generics, permissions
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from django.utils.dateparse import parse_date
+from circus_grove.asynchronous import AsyncReadMixin
+from circus_grove.clients import get_client
+from circus_grove.conditional import ConditionalGetMixin
+from circus_grove.pagination import KeysetPaginationMixin
+from circus_grove.prefetch import PrefetchQuerysetMixin
+from circus_grove.values import ValuesListMixin
 from .models import CheckIn
 from .serializers import CheckInSerializer
 
 
-class CheckInListCreateView(generics.ListCreateAPIView):
+class CheckInListCreateView(AsyncReadMixin, ConditionalGetMixin, ValuesListMixin, KeysetPaginationMixin, PrefetchQuerysetMixin, generics.ListCreateAPIView):
     """View for listing and creating check-ins."""
     serializer_class = CheckInSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -15,7 +24,7 @@ class CheckInListCreateView(generics.ListCreateAPIView):
         serializer.save(user=self.request.user)
 
 
-class CheckInDetailView(generics.RetrieveUpdateDestroyAPIView):
+class CheckInDetailView(AsyncReadMixin, ConditionalGetMixin, PrefetchQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """View for retrieving, updating, and deleting a check-in."""
     serializer_class = CheckInSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -23,3 +32,31 @@ class CheckInDetailView(generics.RetrieveUpdateDestroyAPIView):
     def get_queryset(self):
         return CheckIn.objects.filter(user=self.request.user)
 
+
+class CheckInTrendsView(generics.GenericAPIView):
+    """View for rolling averages, slopes and deltas over the check-in history."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        params = request.query_params
+        user = request.user
+        if 'user' in params and user.user_type == 'coach':
+            # Coaches can analyse their clients' check-ins
+            user = get_client(request, params['user'])
+
+        try:
+            start = parse_date(params['from']) if 'from' in params else None
+            end = parse_date(params['to']) if 'to' in params else None
+            window = int(params.get('window', 7))
+        except ValueError:
+            raise ValidationError("'from'/'to' must be YYYY-MM-DD dates and 'window' an integer.")
+        if ('from' in params and start is None) or ('to' in params and end is None):
+            raise ValidationError("'from' and 'to' must be dates in YYYY-MM-DD format.")
+        if not 1 <= window <= 365:
+            raise ValidationError("'window' must be between 1 and 365 days.")
+
+        # Imported on first use, so processes that never serve trends skip loading NumPy.
+        from .trends import get_trends
+
+        return Response(get_trends(user, start=start, end=end, window=window))
+
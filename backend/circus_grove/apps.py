@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class CircusGroveConfig(AppConfig):
+    name = 'circus_grove'
+
+    def ready(self):
+        from . import checks  # noqa: F401
@@ -0,0 +1,184 @@
+"""
+Async read views.
+
+Under ASGI a synchronous view holds its thread for as long as its queries
+take. ``AsyncReadMixin`` serves ``GET`` and ``HEAD`` from coroutines instead
+and sends the queries and serialization to a pool of ``ASYNC_READ_WORKERS``
+threads, each with its own database connection. Queries that do not depend
+on each other, such as a plan and its exercises, run at the same time on
+different workers.
+
+Django's async queryset methods (``aget()``, ``async for``) are not used
+for the queries themselves: they run every query of a request on the
+request's one thread, one after the other.
+
+With ``ASYNC_READ_VIEWS`` off, the default under WSGI, the views are built
+as plain synchronous views. With it on, writes still go through the usual
+synchronous ``dispatch()``, on a thread.
+
+``streaming_content()`` adapts a blocking iterator of chunks to the server,
+so streaming responses are not read into memory before they are sent.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections, connection
+from django.utils.functional import classproperty
+from rest_framework.mixins import RetrieveModelMixin
+
+READ_METHODS = ('GET', 'HEAD')
+
+# Whether the request's connection is in a transaction, set once per request.
+_in_transaction = ContextVar('in_transaction', default=None)
+
+
+@functools.cache
+def _executor():
+    # One database connection per worker, kept for CONN_MAX_AGE.
+    return ThreadPoolExecutor(max_workers=settings.ASYNC_READ_WORKERS, thread_name_prefix='async-read')
+
+
+def _on_worker(func):
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return run
+
+
+async def _transaction_open():
+    in_transaction = _in_transaction.get()
+    if in_transaction is None:
+        in_transaction = await sync_to_async(lambda: connection.in_atomic_block)()
+    return in_transaction
+
+
+async def run_query(func, *args, **kwargs):
+    """
+    Run the blocking callable ``func`` on a worker thread and return its result.
+
+    Inside a transaction (tests) it runs on the request's own connection,
+    the only one that sees the transaction's writes.
+    """
+    if await _transaction_open():
+        return await sync_to_async(func)(*args, **kwargs)
+    return await sync_to_async(_on_worker(func), thread_sensitive=False, executor=_executor())(*args, **kwargs)
+
+
+async def run_queries(*funcs):
+    """
+    Run callables that query the database concurrently and return their results in order.
+
+    Blocking callables go through ``run_query()``, coroutine functions run
+    on the event loop. Inside a transaction they run one after the other.
+    """
+    def call(func):
+        return func() if iscoroutinefunction(func) else run_query(func)
+
+    if await _transaction_open():
+        return [await call(func) for func in funcs]
+    return await asyncio.gather(*map(call, funcs))
+
+
+async def _iterate_on_request_thread(iterator):
+    iterator = iter(iterator)
+    done = object()
+    try:
+        while (chunk := await sync_to_async(next)(iterator, done)) is not done:
+            yield chunk
+    finally:
+        if hasattr(iterator, 'close'):
+            await sync_to_async(iterator.close)()
+
+
+def streaming_content(request, iterator):
+    """
+    ``iterator``, a blocking iterator of chunks, as the content of a ``StreamingHttpResponse``.
+
+    Under ASGI, Django reads a synchronous iterator into a list before
+    sending any of it, so it is wrapped in an asynchronous one that runs each
+    ``next()`` on the request's thread, where the iterator's queries and
+    connection stay. Under WSGI it is the other way round, and ``iterator``
+    is returned as is.
+    """
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        return _iterate_on_request_thread(iterator)
+    return iterator
+
+
+def async_method(obj, name):
+    """``obj.a<name>`` if it exists, else ``obj.<name>`` run with ``run_query()``."""
+    method = getattr(obj, 'a' + name, None)
+    if method is not None:
+        return method
+    return partial(run_query, getattr(obj, name))
+
+
+class AsyncReadMixin:
+    """
+    View mixin serving ``GET`` and ``HEAD`` asynchronously.
+
+    Goes first in the view's bases. Requests are answered by ``alist()`` or
+    ``aretrieve()``, which ``ConditionalGetMixin``, ``CachedRetrieveMixin``
+    and ``PrefetchQuerysetMixin`` provide; a view without them runs its
+    synchronous handler on a worker thread.
+
+    Whether the view is asynchronous is read from ``ASYNC_READ_VIEWS`` when
+    ``as_view()`` builds it.
+    """
+    # Set by as_view(), so a view keeps the mode it was built in.
+    async_reads = False
+
+    @classproperty
+    def view_is_async(cls):
+        return settings.ASYNC_READ_VIEWS
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return super().as_view(async_reads=cls.view_is_async, **initkwargs)
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.async_reads:
+            return self.adispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+    async def adispatch(self, request, *args, **kwargs):
+        if request.method not in READ_METHODS:
+            return await sync_to_async(super().dispatch)(request, *args, **kwargs)
+
+        # APIView.dispatch(), with the blocking steps moved off the event loop.
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        def initial():
+            # Run on the request's thread, which also tells whether its connection is in a transaction.
+            self.initial(request, *args, **kwargs)
+            return connection.in_atomic_block
+
+        token = None
+        try:
+            token = _in_transaction.set(await sync_to_async(initial)())
+            if isinstance(self, RetrieveModelMixin):
+                handler = async_method(self, 'retrieve')
+            else:
+                handler = async_method(self, 'list')
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = await sync_to_async(self.handle_exception)(exc)
+        finally:
+            if token is not None:
+                _in_transaction.reset(token)
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
@@ -0,0 +1,155 @@
+"""
+Versioned caching of serialized documents.
+
+Each cached document is stored under its primary key and a per-object
+version number. Writes never delete anything: they bump the version, so
+every key built before the write stops being read and ages out of the
+cache on its own. Hit and miss counters are kept in the cache too, so every
+worker sharing a cache backend reports the same totals.
+"""
+import time
+from functools import partial
+
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from .asynchronous import async_method, run_queries, run_query
+from .serializers import is_sparse_request
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+document_caches = {}
+
+
+class DocumentCache:
+    """A named, versioned cache of serialized documents keyed by primary key."""
+
+    def __init__(self, name, alias='default', timeout=CACHE_TIMEOUT):
+        self.name = name
+        self.alias = alias
+        self.timeout = timeout
+        document_caches[name] = self
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _key(self, *parts):
+        return ':'.join(('documents', self.name) + tuple(str(part) for part in parts))
+
+    def _incr(self, key, initial):
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Missing or evicted; add() loses to a concurrent writer, which is fine.
+            self.cache.add(key, initial, None)
+
+    def version(self, pk):
+        key = self._key('version', pk)
+        # Seeding from the clock means an evicted counter never reuses an old version.
+        self.cache.add(key, time.time_ns(), None)
+        return self.cache.get(key)
+
+    def versions(self, pks):
+        """Map each of ``pks`` to its current version, reading them all in one round trip."""
+        keys = {self._key('version', pk): pk for pk in pks}
+        found = self.cache.get_many(keys)
+        versions = {keys[key]: version for key, version in found.items()}
+        for key in keys.keys() - found.keys():
+            versions[keys[key]] = self.version(keys[key])
+        return versions
+
+    def get(self, pk):
+        """Return the key for the current version of ``pk`` and its document, ``None`` if not cached."""
+        key = self._key(pk, self.version(pk))
+        return key, self.cache.get(key)
+
+    def set(self, key, document):
+        self.cache.set(key, document, self.timeout)
+
+    def count(self, hit):
+        self._incr(self._key('hits' if hit else 'misses'), 1)
+
+    def get_or_build(self, pk, build):
+        """Return the cached document for ``pk``, calling ``build()`` on a miss."""
+        key, document = self.get(pk)
+        self.count(document is not None)
+        if document is None:
+            document = build()
+            self.set(key, document)
+        return document
+
+    def bump(self, pk):
+        """Invalidate the cached document of ``pk`` once the current transaction commits."""
+        # Bumping before commit would let a concurrent read cache the old rows
+        # under the new version.
+        transaction.on_commit(lambda: self._incr(self._key('version', pk), time.time_ns()))
+
+    def stats(self):
+        counts = self.cache.get_many([self._key('hits'), self._key('misses')])
+        hits = counts.get(self._key('hits'), 0)
+        misses = counts.get(self._key('misses'), 0)
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 4) if total else None,
+        }
+
+    def reset_stats(self):
+        self.cache.delete_many([self._key('hits'), self._key('misses')])
+
+
+class CachedRetrieveMixin:
+    """
+    View mixin serving ``retrieve()`` from a ``DocumentCache``.
+
+    Access is still checked against ``get_queryset()`` on every request, with
+    a single ``EXISTS`` query; only the object fetch and serialization are
+    skipped on a hit.
+    """
+    document_cache = None
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        pk = self.kwargs[lookup_url_kwarg]
+        if is_sparse_request(request):
+            # The cache only holds full documents.
+            return super().retrieve(request, *args, **kwargs)
+        if not self.get_queryset().filter(**{self.lookup_field: pk}).exists():
+            # Let the regular path raise the 404.
+            return super().retrieve(request, *args, **kwargs)
+
+        def build():
+            return self.get_serializer(self.get_object()).data
+
+        return Response(self.document_cache.get_or_build(pk, build))
+
+    async def aretrieve(self, request, *args, **kwargs):
+        """``retrieve()`` for async views, with the ``EXISTS`` query and the cache read running concurrently."""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        pk = self.kwargs[lookup_url_kwarg]
+        retrieve = async_method(super(), 'retrieve')
+        if is_sparse_request(request):
+            return await retrieve(request, *args, **kwargs)
+        exists, (key, document) = await run_queries(
+            lambda: self.get_queryset().filter(**{self.lookup_field: pk}).exists(),
+            partial(self.document_cache.get, pk),
+        )
+        if not exists:
+            return await retrieve(request, *args, **kwargs)
+
+        if document is not None:
+            await run_query(self.document_cache.count, True)
+            return Response(document)
+
+        instance = await async_method(self, 'get_object')()
+
+        def build():
+            document = self.get_serializer(instance).data
+            self.document_cache.count(False)
+            self.document_cache.set(key, document)
+            return document
+
+        return Response(await run_query(build))
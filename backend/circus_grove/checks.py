@@ -0,0 +1,16 @@
+from django.core.checks import Error, register
+
+from . import openapi
+
+
+@register(deploy=True)
+def check_openapi_schema(app_configs, **kwargs):
+    """The stored OpenAPI schema must match the one the code generates."""
+    stale = openapi.stale_formats(openapi.generate(silent=True))
+    if not stale:
+        return []
+    return [Error(
+        f"The stored OpenAPI schema is out of date ({', '.join(stale)}).",
+        hint="Run 'python manage.py openapi_schema' and commit the result.",
+        id='circus_grove.E001',
+    )]
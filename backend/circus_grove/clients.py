@@ -0,0 +1,20 @@
+from django.contrib.auth import get_user_model
+from django.shortcuts import get_object_or_404
+from rest_framework.exceptions import ValidationError
+
+User = get_user_model()
+
+
+def get_client(request, user_id, param='user'):
+    """
+    The client ``user_id`` of the coach making ``request``.
+
+    ``user_id`` is the raw value of the ``param`` query parameter; anything
+    but an integer is a validation error, and anyone but the coach's own
+    clients is not found.
+    """
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        raise ValidationError({param: 'Must be a user id.'})
+    return get_object_or_404(User, id=user_id, coach=request.user)
@@ -0,0 +1,249 @@
+"""
+Negotiated compression of API responses.
+
+``CompressionMiddleware`` compresses responses under
+``API_COMPRESSION_PATH_PREFIX`` with the best encoding the client accepts:
+zstd (when the ``zstandard`` package is installed), brotli or gzip, in that
+order of preference among equal ``q`` values. Bodies smaller than
+``API_COMPRESSION_MIN_SIZE`` bytes are sent as they are, as are bodies that
+are already compressed. Streaming responses are compressed chunk by chunk
+and flushed after each chunk, so they keep streaming.
+
+Every compressed response adds its sizes and the CPU time spent compressing
+to ``compression_stats``. The counters are per process.
+"""
+import gzip
+import threading
+import time
+import zlib
+
+import brotli
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Content types that are compressed already.
+PRECOMPRESSED_TYPES = ('application/zip', 'application/gzip', 'image/', 'audio/', 'video/')
+
+
+class GzipCodec:
+    name = 'gzip'
+    level = 6
+    max_level = 9
+
+    def compress(self, data, level=None):
+        return gzip.compress(data, compresslevel=level or self.level, mtime=0)
+
+    def decompress(self, data):
+        return gzip.decompress(data)
+
+    def compressor(self):
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return (
+            lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH),
+            compressor.flush,
+        )
+
+
+class BrotliCodec:
+    name = 'br'
+    # The default quality (11) is meant for static assets and far too slow here.
+    quality = 5
+    max_level = 11
+
+    def compress(self, data, level=None):
+        return brotli.compress(data, quality=level or self.quality)
+
+    def decompress(self, data):
+        return brotli.decompress(data)
+
+    def compressor(self):
+        compressor = brotli.Compressor(quality=self.quality)
+        return (
+            lambda chunk: compressor.process(chunk) + compressor.flush(),
+            compressor.finish,
+        )
+
+
+class ZstdCodec:
+    name = 'zstd'
+    level = 3
+    max_level = 19
+
+    def compress(self, data, level=None):
+        return zstandard.ZstdCompressor(level=level or self.level).compress(data)
+
+    def decompress(self, data):
+        return zstandard.ZstdDecompressor().decompress(data)
+
+    def compressor(self):
+        compressor = zstandard.ZstdCompressor(level=self.level).compressobj()
+        return (
+            lambda chunk: compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+            compressor.flush,
+        )
+
+
+# In order of preference.
+CODECS = ([ZstdCodec()] if zstandard else []) + [BrotliCodec(), GzipCodec()]
+
+
+class CompressionStats:
+    """Per-encoding totals of compressed responses, sizes and CPU time."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.totals = {}
+
+    def add(self, encoding, size, compressed_size, cpu_seconds):
+        with self.lock:
+            totals = self.totals.setdefault(encoding, {'responses': 0, 'bytes_in': 0, 'bytes_out': 0, 'cpu_seconds': 0.0})
+            totals['responses'] += 1
+            totals['bytes_in'] += size
+            totals['bytes_out'] += compressed_size
+            totals['cpu_seconds'] += cpu_seconds
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                encoding: {
+                    **totals,
+                    'cpu_seconds': round(totals['cpu_seconds'], 6),
+                    'ratio': round(totals['bytes_out'] / totals['bytes_in'], 4) if totals['bytes_in'] else None,
+                }
+                for encoding, totals in sorted(self.totals.items())
+            }
+
+
+compression_stats = CompressionStats()
+
+
+def parse_accept_encoding(header):
+    """Map each encoding in an ``Accept-Encoding`` header to its ``q`` value."""
+    accepted = {}
+    for item in header.split(','):
+        name, _, params = item.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def negotiate(header):
+    """Return the codec to use for an ``Accept-Encoding`` header, or ``None``."""
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*', 0.0)
+    best, best_q = None, 0.0
+    for codec in CODECS:
+        q = accepted.get(codec.name, wildcard)
+        # Strictly greater, so earlier codecs win ties.
+        if q > best_q:
+            best, best_q = codec, q
+    return best
+
+
+class StreamCompressor:
+    """Compresses a stream chunk by chunk and records it once finished."""
+
+    def __init__(self, codec):
+        self.codec = codec
+        self._compress, self._finish = codec.compressor()
+        self.size = self.compressed_size = 0
+        self.cpu = 0.0
+
+    def process(self, chunk):
+        start = time.thread_time()
+        data = self._compress(chunk)
+        self.cpu += time.thread_time() - start
+        self.size += len(chunk)
+        self.compressed_size += len(data)
+        return data
+
+    def finish(self):
+        start = time.thread_time()
+        data = self._finish()
+        self.cpu += time.thread_time() - start
+        self.compressed_size += len(data)
+        compression_stats.add(self.codec.name, self.size, self.compressed_size, self.cpu)
+        return data
+
+
+def compress_stream(codec, chunks):
+    compressor = StreamCompressor(codec)
+    for chunk in chunks:
+        if data := compressor.process(chunk):
+            yield data
+    if data := compressor.finish():
+        yield data
+
+
+async def compress_async_stream(codec, chunks):
+    compressor = StreamCompressor(codec)
+    async for chunk in chunks:
+        if data := compressor.process(chunk):
+            yield data
+    if data := compressor.finish():
+        yield data
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compress API responses with the best encoding the client accepts."""
+
+    def process_response(self, request, response):
+        prefix = getattr(settings, 'API_COMPRESSION_PATH_PREFIX', '/api/')
+        if not request.path.startswith(prefix) or not self.compressible(response):
+            return response
+        if not response.streaming and len(response.content) < getattr(settings, 'API_COMPRESSION_MIN_SIZE', 1024):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        codec = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if codec is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compress_async_stream(codec, response.streaming_content)
+            else:
+                response.streaming_content = compress_stream(codec, response.streaming_content)
+            response.headers.pop('Content-Length', None)
+        else:
+            content = response.content
+            start = time.thread_time()
+            compressed = codec.compress(content)
+            cpu = time.thread_time() - start
+            if len(compressed) >= len(content):
+                return response
+            compression_stats.add(codec.name, len(content), len(compressed), cpu)
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # A strong ETag names one exact body, which is no longer the one sent.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = codec.name
+        return response
+
+    def compressible(self, response):
+        if response.has_header('Content-Encoding') or response.status_code == 204:
+            return False
+        if not 200 <= response.status_code < 300:
+            return False
+        return not response.get('Content-Type', '').startswith(PRECOMPRESSED_TYPES)
@@ -0,0 +1,142 @@
+import hashlib
+from functools import partial
+
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .asynchronous import async_method, run_query
+
+
+class ConditionalGetMixin:
+    """
+    View mixin adding weak ETag and Last-Modified validators to GET responses.
+
+    Validators come from one aggregate query (``MAX(updated_at)`` and the row
+    count) over the same queryset the response would be built from, mixed
+    with the user id, path and ``Accept`` header. A matching
+    ``If-None-Match`` or ``If-Modified-Since`` returns 304 before anything is
+    fetched or serialized. Child rows bump their parent's ``updated_at`` (see
+    each app's signals) so nested changes invalidate the parent too, and the
+    rows the serializer embeds through ``Meta.select_related`` (plan names,
+    usernames) add their own ``MAX(updated_at)`` to the same query.
+
+    Lists only get the ETag: deleting a row leaves ``MAX(updated_at)`` as it
+    was, so a Last-Modified date alone would revalidate the stale list.
+    """
+    last_modified_field = 'updated_at'
+
+    def list(self, request, *args, **kwargs):
+        render = super().list
+        queryset = self.get_validator_queryset()
+        return self.conditional_response(request, queryset, lambda: render(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        render = super().retrieve
+        queryset = self.get_object_validator_queryset()
+        # A missing object gets its 404 rather than validators.
+        return self.conditional_response(request, queryset, lambda: render(request, *args, **kwargs), detail=True)
+
+    async def alist(self, request, *args, **kwargs):
+        render = async_method(super(), 'list')
+        return await self.aconditional_response(
+            request, self.get_validator_queryset, partial(render, request, *args, **kwargs),
+        )
+
+    async def aretrieve(self, request, *args, **kwargs):
+        render = async_method(super(), 'retrieve')
+        return await self.aconditional_response(
+            request, self.get_object_validator_queryset, partial(render, request, *args, **kwargs), detail=True,
+        )
+
+    def get_validator_queryset(self):
+        # Only the filter backends: the relations and annotations the serializer
+        # loads (see PrefetchQuerysetMixin) would make the aggregate a subquery.
+        queryset = self.get_queryset()
+        for backend in list(self.filter_backends):
+            queryset = backend().filter_queryset(self.request, queryset, self)
+        return queryset
+
+    def get_object_validator_queryset(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return self.get_queryset().filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+
+    def get_related_last_modified_fields(self, model):
+        """The ``updated_at`` lookups of the related rows the response embeds."""
+        meta = getattr(self.get_serializer_class(), 'Meta', None)
+        lookups = []
+        for relation in getattr(meta, 'select_related', []):
+            related_model = model._meta.get_field(relation).related_model
+            if any(field.name == 'updated_at' for field in related_model._meta.concrete_fields):
+                lookups.append(f'{relation}__updated_at')
+        return lookups
+
+    def get_validators(self, request, queryset, detail=False):
+        stamps = [self.last_modified_field] + self.get_related_last_modified_fields(queryset.model)
+        state = queryset.order_by().aggregate(
+            count=Count('pk'),
+            **{f'last_modified_{index}': Max(lookup) for index, lookup in enumerate(stamps)},
+        )
+        if detail and not state['count']:
+            return None, None
+        last_modified = max(
+            (state[f'last_modified_{index}'] for index in range(len(stamps)) if state[f'last_modified_{index}']),
+            default=None,
+        )
+        key = '|'.join([
+            str(request.user.pk),
+            str(state['count']),
+            last_modified.isoformat() if last_modified else '',
+            request.get_full_path(),
+            request.META.get('HTTP_ACCEPT', ''),
+        ])
+        etag = 'W/' + quote_etag(hashlib.sha1(key.encode()).hexdigest())
+        return etag, last_modified if detail else None
+
+    def conditional_response(self, request, queryset, render, detail=False):
+        etag, last_modified = self.get_validators(request, queryset, detail)
+        if etag is None:
+            return render()
+        headers, response = self.check_validators(request, etag, last_modified)
+        if response is None:
+            response = self.add_validators(render(), headers)
+        return response
+
+    async def aconditional_response(self, request, get_queryset, render, detail=False):
+        """
+        ``conditional_response()`` for async views, with ``get_queryset`` and
+        ``render`` called on the view's behalf.
+
+        The validators are still computed first: read alongside the body they
+        could describe newer rows than it holds, and the stale body would
+        then be revalidated until the next write.
+        """
+        etag, last_modified = await run_query(lambda: self.get_validators(request, get_queryset(), detail))
+        if etag is None:
+            return await render()
+        headers, response = self.check_validators(request, etag, last_modified)
+        if response is None:
+            response = self.add_validators(await render(), headers)
+        return response
+
+    def check_validators(self, request, etag, last_modified):
+        """The validator headers, and the 304 or 412 response if the request's preconditions call for one."""
+        headers = HttpResponse()
+        headers['ETag'] = etag
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        if timestamp is not None:
+            headers['Last-Modified'] = http_date(timestamp)
+        patch_cache_control(headers, private=True, no_cache=True)
+        patch_vary_headers(headers, ('Accept', 'Authorization'))
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp, response=headers)
+        return headers, None if response is headers else response
+
+    def add_validators(self, response, headers):
+        if 200 <= response.status_code < 300:
+            for header in ('ETag', 'Last-Modified', 'Cache-Control'):
+                if header in headers:
+                    response[header] = headers[header]
+            patch_vary_headers(response, ('Accept', 'Authorization'))
+        return response
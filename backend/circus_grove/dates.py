@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+
+def parse_date_range(request, default_days=7, max_days=366, upcoming=False):
+    """
+    Read ``from``/``to`` query parameters.
+
+    Missing bounds default to the last ``default_days`` days, or with
+    ``upcoming`` to the ``default_days`` days from today.
+    """
+    params = request.query_params
+    default_length = timedelta(days=default_days - 1)
+    try:
+        if upcoming:
+            start = parse_date(params['from']) if 'from' in params else timezone.localdate()
+            end = parse_date(params['to']) if 'to' in params else start and start + default_length
+        else:
+            end = parse_date(params['to']) if 'to' in params else timezone.localdate()
+            start = parse_date(params['from']) if 'from' in params else end and end - default_length
+    except ValueError:
+        start = end = None
+    if start is None or end is None:
+        raise ValidationError("'from' and 'to' must be dates in YYYY-MM-DD format.")
+    if start > end:
+        raise ValidationError("'from' must not be after 'to'.")
+    if (end - start).days >= max_days:
+        raise ValidationError(f"The date range cannot exceed {max_days} days.")
+    return start, end
@@ -0,0 +1,231 @@
+"""
+Streaming full-account export.
+
+Every table is read with ``.values().iterator(chunk_size=...)`` in primary
+key order, and the output is produced as it is read, so memory does not grow
+with the size of the account. In NDJSON, children are nested into their
+parent. Each child table is read as a second cursor sorted by parent id and
+merged with the parent cursor, so no child table is held in memory.
+
+Formats:
+
+* ``ndjson``: one ``{"type": ..., "data": ...}`` line per top-level record,
+  with children nested under the parent.
+* ``csv``: a single flat table, chosen with ``table``.
+* ``zip``: one flat CSV file per table.
+"""
+import csv
+import zipfile
+
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+from checkins.models import CheckIn
+from nutrition.models import Food, Meal, NutritionPlan, NutritionPlanMeal
+from training.models import Exercise, TrainingPlan, TrainingPlanExercise, TrainingSession
+
+User = get_user_model()
+
+FORMATS = ('ndjson', 'csv', 'zip')
+CHUNK_SIZE = 2000
+# Output is flushed to the client in pieces of about this many bytes.
+FLUSH_BYTES = 64 * 1024
+
+USER_FIELDS = (
+    'id', 'username', 'email', 'first_name', 'last_name', 'phone', 'bio',
+    'date_of_birth', 'height_cm', 'user_type', 'coach_id', 'created_at', 'updated_at',
+)
+
+
+class Table:
+    """An exported table: a model, how it is scoped to the exported users, and its child table."""
+
+    def __init__(self, name, model, scope, fields=None, child=None):
+        self.name = name
+        self.model = model
+        self.scope = scope
+        self.fields = fields or tuple(field.attname for field in model._meta.concrete_fields)
+        self.child = child
+
+    def queryset(self, users):
+        return self.model._default_manager.filter(self.scope(users))
+
+
+class ChildTable(Table):
+    """A table nested under its parent table through the foreign key ``parent_field``."""
+
+    def __init__(self, name, model, parent_field, fields=None):
+        self.parent_field = parent_field
+        self.parent_attname = model._meta.get_field(parent_field).attname
+        super().__init__(name, model, scope=None, fields=fields)
+
+    def queryset_for(self, parents):
+        return self.model._default_manager.filter(**{f'{self.parent_field}__in': parents.values('pk')})
+
+
+TABLES = (
+    Table('users', User, lambda users: Q(pk__in=users), fields=USER_FIELDS),
+    Table(
+        'training_plans', TrainingPlan, lambda users: Q(user__in=users) | Q(coach__in=users),
+        child=ChildTable('training_plan_exercises', TrainingPlanExercise, 'plan'),
+    ),
+    Table(
+        'nutrition_plans', NutritionPlan, lambda users: Q(user__in=users) | Q(coach__in=users),
+        child=ChildTable('nutrition_plan_meals', NutritionPlanMeal, 'plan'),
+    ),
+    Table(
+        'training_sessions', TrainingSession, lambda users: Q(user__in=users),
+        child=ChildTable('exercises', Exercise, 'session'),
+    ),
+    Table('meals', Meal, lambda users: Q(user__in=users), child=ChildTable('foods', Food, 'meal')),
+    Table('checkins', CheckIn, lambda users: Q(user__in=users)),
+)
+
+# Every flat table, children included, for the csv and zip formats.
+FLAT_TABLES = tuple(t for table in TABLES for t in (table, table.child) if t is not None)
+TABLE_NAMES = tuple(table.name for table in FLAT_TABLES)
+
+
+def export_users(user, clients=None):
+    """
+    Users covered by an export requested by ``user``.
+
+    Coaches pass ``clients='all'`` for every client or a client id for one;
+    anyone else exports themselves.
+    """
+    if clients is None:
+        return User.objects.filter(pk=user.pk)
+    users = User.objects.filter(coach=user)
+    if clients != 'all':
+        users = users.filter(pk=clients)
+    return users
+
+
+def _rows(queryset, fields, *ordering):
+    return queryset.order_by(*ordering).values(*fields).iterator(chunk_size=CHUNK_SIZE)
+
+
+def nested_rows(table, users):
+    """Yield the rows of ``table`` with their children merged in from a second sorted cursor."""
+    parents = table.queryset(users)
+    rows = _rows(parents, table.fields, 'pk')
+    child = table.child
+    if child is None:
+        yield from rows
+        return
+
+    children = _rows(child.queryset_for(parents), child.fields, child.parent_attname, 'pk')
+    pending = next(children, None)
+    for row in rows:
+        items = []
+        # Children of rows created between the two queries have no parent here; skip them.
+        while pending is not None and pending[child.parent_attname] < row['id']:
+            pending = next(children, None)
+        while pending is not None and pending[child.parent_attname] == row['id']:
+            items.append(pending)
+            pending = next(children, None)
+        row[child.name] = items
+        yield row
+
+
+def flat_rows(table, users):
+    """Yield the rows of a flat table, children included, in primary key order."""
+    if isinstance(table, ChildTable):
+        parent = next(t for t in TABLES if t.child is table)
+        queryset = table.queryset_for(parent.queryset(users))
+    else:
+        queryset = table.queryset(users)
+    return _rows(queryset, table.fields, 'pk')
+
+
+def _buffered(pieces):
+    """Join small string pieces into chunks of about ``FLUSH_BYTES`` encoded bytes."""
+    buffer, size = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= FLUSH_BYTES:
+            yield ''.join(buffer).encode()
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer).encode()
+
+
+def stream_ndjson(users):
+    encoder = DjangoJSONEncoder()
+
+    def lines():
+        for table in TABLES:
+            for row in nested_rows(table, users):
+                yield encoder.encode({'type': table.name, 'data': row}) + '\n'
+
+    return _buffered(lines())
+
+
+class _Echo:
+    """File-like object handing back what is written, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(table, users):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(table.fields)
+    for row in flat_rows(table, users):
+        yield writer.writerow([row[field] for field in table.fields])
+
+
+def stream_csv(users, table_name):
+    table = next(table for table in FLAT_TABLES if table.name == table_name)
+    return _buffered(_csv_lines(table, users))
+
+
+class _Sink:
+    """Unseekable file-like object collecting what ``zipfile`` writes until it is drained."""
+
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_zip(users):
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for table in FLAT_TABLES:
+            # The size is unknown up front, so allow ZIP64 for every member.
+            with archive.open(f'{table.name}.csv', 'w', force_zip64=True) as member:
+                for chunk in _buffered(_csv_lines(table, users)):
+                    member.write(chunk)
+                    if data := sink.drain():
+                        yield data
+            if data := sink.drain():
+                yield data
+    if data := sink.drain():
+        yield data
+
+
+def stream_export(users, fmt='ndjson', table=None):
+    """Return an iterator of byte chunks exporting ``users`` in ``fmt``."""
+    if fmt == 'ndjson':
+        return stream_ndjson(users)
+    if fmt == 'csv':
+        return stream_csv(users, table)
+    return stream_zip(users)
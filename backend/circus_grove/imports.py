@@ -0,0 +1,218 @@
+"""
+Streaming bulk import of historical records.
+
+Uploads are read one record at a time (CSV rows or NDJSON lines), validated
+with a serializer and written in batches, so memory use is bounded by the
+batch size rather than the file size. Invalid rows are reported with their
+line number and skipped; the rest of the batch is still written.
+
+Each record type has an ``Importer`` in its app's ``imports`` module,
+registered in ``IMPORTERS``. Bulk writes skip model signals, so importers
+trigger the follow-up work (rollups, cache invalidation) themselves.
+"""
+import codecs
+import csv
+import io
+import json
+from itertools import islice
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+
+IMPORTERS = {
+    'checkins': 'checkins.imports.CheckInImporter',
+    'meals': 'nutrition.imports.MealImporter',
+    'sessions': 'training.imports.TrainingSessionImporter',
+}
+FORMATS = ('csv', 'ndjson')
+MAX_REPORTED_ERRORS = 1000
+
+
+def get_importer(kind, user):
+    """Return the importer for record type ``kind`` writing rows for ``user``."""
+    if kind not in IMPORTERS:
+        raise ValueError(f"Unknown import type '{kind}'. Must be one of: {', '.join(IMPORTERS)}.")
+    return import_string(IMPORTERS[kind])(user)
+
+
+def guess_format(name):
+    """Guess the record format from a file name."""
+    if name and name.lower().endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    return 'csv'
+
+
+def read_records(stream, fmt):
+    """
+    Yield ``(line, data, error)`` for each record of a binary ``stream``.
+
+    CSV cells left empty are dropped so optional fields fall back to their
+    defaults. NDJSON lines that fail to parse yield an error instead of data.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown import format '{fmt}'. Must be one of: {', '.join(FORMATS)}.")
+    text = codecs.getreader('utf-8-sig')(stream)
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, {key: value for key, value in row.items() if key and value != ''}, None
+        return
+    for line, raw in enumerate(text, start=1):
+        if not raw.strip():
+            continue
+        try:
+            data = json.loads(raw)
+        except ValueError as exc:
+            yield line, None, {'non_field_errors': [f'Invalid JSON: {exc}']}
+            continue
+        if isinstance(data, dict):
+            yield line, data, None
+        else:
+            yield line, None, {'non_field_errors': ['Each line must be a JSON object.']}
+
+
+class ImportResult:
+    """Counters and the first ``MAX_REPORTED_ERRORS`` row errors of an import."""
+
+    def __init__(self):
+        self.processed = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'processed': self.processed,
+            'imported': self.imported,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+
+class Importer:
+    """
+    Base class validating and bulk-writing one record type for one user.
+
+    Subclasses set ``serializer_class`` and implement ``write()``; ``finish()``
+    runs once after the last batch.
+    """
+    serializer_class = None
+    batch_size = 500
+
+    def __init__(self, user):
+        self.user = user
+
+    def get_serializer_context(self):
+        return {'user': self.user}
+
+    @cached_property
+    def serializer(self):
+        # One instance validates every row, so its fields are only built once.
+        return self.serializer_class(context=self.get_serializer_context())
+
+    def validate(self, data):
+        """Return validated data for one record, or raise ``ValueError`` with the serializer errors."""
+        try:
+            return self.serializer.run_validation(data)
+        except (ValidationError, DjangoValidationError) as exc:
+            raise ValueError(as_serializer_error(exc))
+
+    def write(self, rows):
+        """Write a batch of validated rows."""
+        raise NotImplementedError
+
+    def finish(self):
+        pass
+
+    def run(self, records):
+        result = ImportResult()
+        records = iter(records)
+        while batch := list(islice(records, self.batch_size)):
+            lines, rows = [], []
+            for line, data, error in batch:
+                result.processed += 1
+                if error is None:
+                    try:
+                        rows.append(self.validate(data))
+                        lines.append(line)
+                        continue
+                    except ValueError as exc:
+                        error = exc.args[0]
+                result.add_error(line, error)
+            if not rows:
+                continue
+            try:
+                with transaction.atomic():
+                    self.write(rows)
+            except DatabaseError as exc:
+                for line in lines:
+                    result.add_error(line, {'non_field_errors': [f'Database error: {exc}']})
+            else:
+                result.imported += len(rows)
+        self.finish()
+        return result
+
+
+def copy_upsert(model, fields, rows, unique_fields):
+    """
+    Upsert ``rows`` (tuples in ``fields`` order) through ``COPY`` on PostgreSQL.
+
+    Rows are copied into a temporary table and merged with a single
+    ``INSERT ... ON CONFLICT (unique_fields) DO UPDATE``. ``created_at`` and
+    ``updated_at`` are filled in when the model has them.
+    """
+    opts = model._meta
+    columns = [opts.get_field(name).column for name in fields]
+    now = timezone.now()
+    stamps = [name for name in ('created_at', 'updated_at') if name not in fields and _has_field(model, name)]
+    columns += [opts.get_field(name).column for name in stamps]
+    conflict = [opts.get_field(name).column for name in unique_fields]
+
+    buffer = io.StringIO()
+    # Strings are quoted, so an unquoted empty cell is NULL and "" is an empty string.
+    writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+    for row in rows:
+        writer.writerow([_copy_value(value) for value in row] + [now] * len(stamps))
+    buffer.seek(0)
+
+    qn = connection.ops.quote_name
+    table = qn(opts.db_table)
+    temp = qn(f'import_{opts.db_table}')
+    column_list = ', '.join(qn(column) for column in columns)
+    # Conflicting rows keep their key and creation time.
+    kept = set(conflict)
+    if _has_field(model, 'created_at'):
+        kept.add(opts.get_field('created_at').column)
+    updates = ', '.join(f'{qn(column)} = EXCLUDED.{qn(column)}' for column in columns if column not in kept)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE {temp} ON COMMIT DROP AS SELECT {column_list} FROM {table} WITH NO DATA'
+        )
+        cursor.copy_expert(f'COPY {temp} ({column_list}) FROM STDIN WITH (FORMAT csv)', buffer)
+        cursor.execute(
+            f'INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {temp} '
+            f'ON CONFLICT ({", ".join(qn(column) for column in conflict)}) DO UPDATE SET {updates}'
+        )
+        # Dropped explicitly too, for callers already inside a transaction.
+        cursor.execute(f'DROP TABLE {temp}')
+
+
+def _has_field(model, name):
+    return any(field.name == name for field in model._meta.concrete_fields)
+
+
+def _copy_value(value):
+    if value is None or isinstance(value, (int, float)):
+        return value
+    return str(value)
@@ -0,0 +1,28 @@
+"""
+Views imported on their first request.
+
+Every process loads the URLconf, and with it every view module, before it
+serves its first request. ``lazy_view`` puts rarely used views, and the
+modules they import, off until one of their URLs is requested.
+"""
+import functools
+
+from django.utils.module_loading import import_string
+from django.views.decorators.csrf import csrf_exempt
+
+
+def lazy_view(dotted_path, **initkwargs):
+    """
+    A view calling ``as_view(**initkwargs)`` of the DRF view at ``dotted_path``,
+    imported on the first request. Like ``APIView.as_view()``, it is exempt
+    from ``CsrfViewMiddleware``.
+    """
+    @functools.cache
+    def load():
+        return import_string(dotted_path).as_view(**initkwargs)
+
+    @csrf_exempt
+    def view(request, *args, **kwargs):
+        return load()(request, *args, **kwargs)
+
+    return view
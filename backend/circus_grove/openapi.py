@@ -0,0 +1,126 @@
+"""
+The OpenAPI schema, generated once and served from stored artifacts.
+
+``manage.py openapi_schema`` writes ``schema.json`` and ``schema.yaml`` to
+``OPENAPI_SCHEMA_DIR``, plus a compressed copy of each for every codec in
+``circus_grove.compression``. Compressed copies are written at the codecs'
+highest levels, which is affordable because compression happens once, not per
+request. The JSON and YAML are committed; ``openapi_schema --check`` and the
+``circus_grove.E001`` deploy check fail when they no longer match the code.
+
+Each process loads the artifacts on the first schema request. It generates
+the schema in memory if they are missing, and compresses a copy itself if
+its stored copy is missing or does not match. The schema version is a hash
+of the JSON and goes into every ETag.
+"""
+import hashlib
+import threading
+from pathlib import Path
+
+from django.conf import settings
+
+from .compression import CODECS
+
+FORMATS = {
+    'yaml': 'application/vnd.oai.openapi',
+    'json': 'application/vnd.oai.openapi+json',
+}
+SUFFIXES = {'gzip': 'gz', 'br': 'br', 'zstd': 'zst'}
+
+
+def generate(silent=False):
+    """
+    Generate the public schema and return its rendering for each format.
+
+    With ``silent``, drf-spectacular's warnings about the views are not printed.
+    """
+    from drf_spectacular.drainage import GENERATOR_STATS
+    from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+    from drf_spectacular.settings import spectacular_settings
+
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    if silent:
+        with GENERATOR_STATS.silence():
+            schema = generator.get_schema(request=None, public=True)
+    else:
+        schema = generator.get_schema(request=None, public=True)
+    return {
+        'yaml': OpenApiYamlRenderer().render(schema, renderer_context={}),
+        'json': OpenApiJsonRenderer().render(schema, renderer_context={}),
+    }
+
+
+def artifact_path(fmt, encoding=None):
+    name = f'schema.{fmt}'
+    if encoding is not None:
+        name += f'.{SUFFIXES[encoding]}'
+    return Path(settings.OPENAPI_SCHEMA_DIR) / name
+
+
+def write(documents):
+    """Write ``documents`` and their compressed copies, returning the paths written."""
+    paths = []
+    for fmt, content in documents.items():
+        path = artifact_path(fmt)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        paths.append(path)
+        for codec in CODECS:
+            path = artifact_path(fmt, codec.name)
+            path.write_bytes(codec.compress(content, level=codec.max_level))
+            paths.append(path)
+    return paths
+
+
+def stale_formats(documents):
+    """The formats whose stored artifact differs from ``documents``."""
+    stale = []
+    for fmt, content in documents.items():
+        path = artifact_path(fmt)
+        if not path.exists() or path.read_bytes() != content:
+            stale.append(fmt)
+    return stale
+
+
+class StoredSchema:
+    """The schema documents and their compressed copies, loaded once per process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.loaded = None
+
+    def get(self):
+        """Return ``(version, {(format, encoding): content})``; ``encoding`` is ``None`` for the plain copies."""
+        if self.loaded is None:
+            with self.lock:
+                if self.loaded is None:
+                    self.loaded = self.load()
+        return self.loaded
+
+    def reset(self):
+        self.loaded = None
+
+    def load(self):
+        try:
+            documents = {fmt: artifact_path(fmt).read_bytes() for fmt in FORMATS}
+        except FileNotFoundError:
+            documents = generate()
+        variants = {}
+        for fmt, content in documents.items():
+            variants[fmt, None] = content
+            for codec in CODECS:
+                variants[fmt, codec.name] = self.compressed(fmt, codec, content)
+        return hashlib.sha256(documents['json']).hexdigest()[:16], variants
+
+    def compressed(self, fmt, codec, content):
+        try:
+            stored = artifact_path(fmt, codec.name).read_bytes()
+            if codec.decompress(stored) == content:
+                return stored
+        except Exception:
+            # Missing or corrupt; each codec raises its own error type.
+            pass
+        return codec.compress(content)
+
+
+stored_schema = StoredSchema()
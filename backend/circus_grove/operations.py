@@ -0,0 +1,168 @@
+from django.db import migrations
+from django.db.migrations.operations.base import Operation
+
+
+class AddIndexConcurrently(migrations.AddIndex):
+    """
+    Create an index without locking writes on PostgreSQL.
+
+    Falls back to a plain ``CREATE INDEX`` on other backends, so the same
+    migration runs against SQLite in development. Migrations using it must
+    set ``atomic = False``.
+    """
+
+    def describe(self):
+        return 'Concurrently ' + super().describe()
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(model, self.index, concurrently=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(model, self.index, concurrently=True)
+
+
+class RunSQLOnPostgreSQL(migrations.RunSQL):
+    """
+    Run SQL on PostgreSQL only, for features other backends lack.
+
+    On other backends the operation does nothing; code relying on what it
+    creates must check the database vendor too.
+    """
+
+    def describe(self):
+        return 'PostgreSQL only: ' + super().describe()
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class AddFullTextSearch(Operation):
+    """
+    Keep ``table`` searchable through database triggers (see ``circus_grove.search``).
+
+    On PostgreSQL the table gets a ``search_vector`` tsvector column with a
+    GIN index: ``title`` weighted A and the ``body`` columns weighted B. On
+    SQLite its rows are copied into the shared FTS5 table ``search_index``
+    under the rowid ``id * 8 + code``, with an ``owner`` column holding
+    ``u<user id>``, taken from the row's ``owner`` column or, with
+    ``owner_table``, from the row that column points to. Existing rows are
+    indexed when the operation runs. Other backends are left untouched.
+    """
+    reduces_to_sql = True
+    reversible = True
+
+    def __init__(self, table, code, title=None, body=(), owner='user_id', owner_table=None):
+        self.table = table
+        self.code = code
+        self.title = title
+        self.titles = (title,) if title else ()
+        self.body = tuple(body)
+        self.owner = owner
+        self.owner_table = owner_table
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def describe(self):
+        return f'Add full-text search to {self.table}'
+
+    @property
+    def migration_name_fragment(self):
+        return f'search_{self.table}'
+
+    def _text(self, row, columns):
+        if not columns:
+            return "''"
+        return " || ' ' || ".join(f"coalesce({row}.{column}, '')" for column in columns)
+
+    def _vector(self, row):
+        parts = []
+        if self.title:
+            parts.append(f"setweight(to_tsvector('english', {self._text(row, self.titles)}), 'A')")
+        if self.body:
+            parts.append(f"setweight(to_tsvector('english', {self._text(row, self.body)}), 'B')")
+        return ' || '.join(parts)
+
+    def _owner(self, row):
+        if self.owner_table is None:
+            return f'{row}.{self.owner}'
+        return f'(SELECT user_id FROM {self.owner_table} WHERE id = {row}.{self.owner})'
+
+    def _index_row(self, row):
+        return (
+            f"INSERT INTO search_index (rowid, title, body, owner) VALUES ("
+            f"{row}.id * 8 + {self.code}, {self._text(row, self.titles)}, "
+            f"{self._text(row, self.body)}, 'u' || {self._owner(row)});"
+        )
+
+    def _postgresql_forwards(self):
+        table = self.table
+        columns = ', '.join((*self.titles, *self.body))
+        return [
+            f'ALTER TABLE {table} ADD COLUMN search_vector tsvector',
+            f'CREATE FUNCTION {table}_search_vector() RETURNS trigger LANGUAGE plpgsql AS $$ '
+            f'BEGIN NEW.search_vector := {self._vector("NEW")}; RETURN NEW; END $$',
+            f'CREATE TRIGGER {table}_search_vector BEFORE INSERT OR UPDATE OF {columns} ON {table} '
+            f'FOR EACH ROW EXECUTE FUNCTION {table}_search_vector()',
+            f'UPDATE {table} SET search_vector = {self._vector(table)}',
+            f'CREATE INDEX {table}_search_idx ON {table} USING gin (search_vector)',
+        ]
+
+    def _postgresql_backwards(self):
+        table = self.table
+        return [
+            f'DROP TRIGGER {table}_search_vector ON {table}',
+            f'DROP FUNCTION {table}_search_vector()',
+            f'ALTER TABLE {table} DROP COLUMN search_vector',
+        ]
+
+    def _sqlite_forwards(self):
+        table, code = self.table, self.code
+        columns = ', '.join((*self.titles, *self.body, self.owner))
+        remove = f'DELETE FROM search_index WHERE rowid = {{row}}.id * 8 + {code};'
+        return [
+            "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+            "title, body, owner, tokenize = 'porter unicode61')",
+            f'CREATE TRIGGER {table}_search_insert AFTER INSERT ON {table} BEGIN '
+            f'{remove.format(row="NEW")} {self._index_row("NEW")} END',
+            f'CREATE TRIGGER {table}_search_update AFTER UPDATE OF {columns} ON {table} BEGIN '
+            f'{remove.format(row="OLD")} {self._index_row("NEW")} END',
+            f'CREATE TRIGGER {table}_search_delete AFTER DELETE ON {table} BEGIN '
+            f'{remove.format(row="OLD")} END',
+            f'INSERT INTO search_index (rowid, title, body, owner) '
+            f"SELECT {table}.id * 8 + {code}, {self._text(table, self.titles)}, "
+            f"{self._text(table, self.body)}, 'u' || {self._owner(table)} FROM {table}",
+        ]
+
+    def _sqlite_backwards(self):
+        table = self.table
+        return [
+            f'DROP TRIGGER {table}_search_insert',
+            f'DROP TRIGGER {table}_search_update',
+            f'DROP TRIGGER {table}_search_delete',
+            f'DELETE FROM search_index WHERE rowid % 8 = {self.code}',
+        ]
+
+    def _run(self, schema_editor, statements):
+        vendor = schema_editor.connection.vendor
+        for sql in statements.get(vendor, list)():
+            schema_editor.execute(sql, params=None)
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        self._run(schema_editor, {'postgresql': self._postgresql_forwards, 'sqlite': self._sqlite_forwards})
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        self._run(schema_editor, {'postgresql': self._postgresql_backwards, 'sqlite': self._sqlite_backwards})
@@ -0,0 +1,240 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, FloatField, IntegerField, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on the full ordering tuple of the queryset.
+
+    The ordering is the view's ``get_keyset_ordering(queryset)`` if it has
+    one, otherwise the model's ``Meta.ordering``, with ``id`` appended as a
+    tiebreaker. Each cursor carries the ordering values of the row it was
+    taken from, so every page is a single range query with no ``COUNT(*)``
+    and no ``OFFSET``. Ordering may use annotations and nullable columns;
+    NULLs sort after every value in ascending order.
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset, view)
+        self.output_fields = [self._output_field(queryset, field.lstrip('-')) for field in self.ordering]
+        # Annotations such as subqueries can be NULL whatever their output field says.
+        self.nullable = [
+            field.lstrip('-') in queryset.query.annotations or output_field.null
+            for field, output_field in zip(self.ordering, self.output_fields)
+        ]
+
+        values, reverse = self.decode_cursor(request)
+        self.reverse = reverse
+        ordering = [self._invert(field) for field in self.ordering] if reverse else self.ordering
+
+        if values is not None:
+            queryset = queryset.filter(self._after(ordering, values))
+        queryset = queryset.order_by(*(
+            self._order_expression(field, null) for field, null in zip(ordering, self.nullable)
+        ))
+        results = list(queryset[:self.page_size + 1])
+        self.has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.has_cursor = values is not None
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, queryset, view=None):
+        if hasattr(view, 'get_keyset_ordering'):
+            ordering = list(view.get_keyset_ordering(queryset))
+        else:
+            ordering = list(queryset.model._meta.ordering)
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering.append('id')
+        return ordering
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.page:
+            return None
+        # A reverse page was reached from a later one, so rows always follow it.
+        if not (self.has_more or self.reverse):
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.page:
+            return None
+        if not (self.has_more if self.reverse else self.has_cursor):
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, obj, reverse):
+        values = [self._encode_value(self._row_value(obj, field.lstrip('-'))) for field in self.ordering]
+        payload = {'v': values, 'r': int(reverse)}
+        token = base64.urlsafe_b64encode(json.dumps(payload).encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+            raw_values = payload['v']
+            if len(raw_values) != len(self.ordering):
+                raise ValueError
+            values = [
+                None if raw is None else output_field.to_python(raw)
+                for output_field, raw in zip(self.output_fields, raw_values)
+            ]
+        except (TypeError, ValueError, KeyError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return values, bool(payload.get('r'))
+
+    @staticmethod
+    def _row_value(obj, name):
+        # Rows are model instances, or dicts when read through ``.values()``.
+        return obj[name] if isinstance(obj, dict) else getattr(obj, name)
+
+    @staticmethod
+    def _encode_value(value):
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return str(value)
+
+    @staticmethod
+    def _output_field(queryset, name):
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        if name == 'pk':
+            return queryset.model._meta.pk
+        return queryset.model._meta.get_field(name)
+
+    def _order_expression(self, field, null):
+        name = field.lstrip('-')
+        if not null:
+            return field
+        if field.startswith('-'):
+            return F(name).desc(nulls_first=True)
+        return F(name).asc(nulls_last=True)
+
+    def _invert(self, field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def _after(self, ordering, values):
+        """Build ``(a, b, c) > (x, y, z)`` for a mixed-direction, NULLs-last ordering."""
+        condition = Q(pk__in=[])
+        equal = Q()
+        for field, value, null in zip(ordering, values, self.nullable):
+            name = field.lstrip('-')
+            descending = field.startswith('-')
+            if value is None:
+                # NULL is the largest value: nothing follows it ascending,
+                # every non-NULL value follows it descending.
+                if descending:
+                    condition |= equal & Q(**{f'{name}__isnull': False})
+                equal &= Q(**{f'{name}__isnull': True})
+            else:
+                after = Q(**{f'{name}__lt' if descending else f'{name}__gt': value})
+                if null and not descending:
+                    after |= Q(**{f'{name}__isnull': True})
+                condition |= equal & after
+                equal &= Q(**{name: value})
+        return condition
+
+
+class KeysetPaginationMixin:
+    """
+    View mixin that opts a list view into keyset pagination.
+
+    Clients request it with ``?pagination=cursor`` (or by following a
+    ``cursor`` link); otherwise the default page-number pagination is used.
+    """
+    keyset_pagination_class = KeysetPagination
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if params.get('pagination') == 'cursor' or KeysetPagination.cursor_query_param in params:
+                self._paginator = self.keyset_pagination_class()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
+
+
+class SearchPagination(KeysetPagination):
+    """
+    Keyset pagination over full-text search hits (see ``circus_grove.search``).
+
+    Hits come from raw SQL rather than a queryset, ordered by relevance,
+    then type and id; cursors carry those three values like any other keyset.
+    """
+    ordering = ['-rank', 'kind', 'id']
+    output_fields = [FloatField(), IntegerField(), IntegerField()]
+
+    def paginate_search(self, find, load, request):
+        """
+        Read a page of hits with ``find(after=..., reverse=..., limit=...)``.
+
+        Returns the page passed through ``load``.
+        """
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        values, reverse = self.decode_cursor(request)
+        if values is not None and None in values:
+            raise NotFound(self.invalid_cursor_message)
+        self.reverse = reverse
+
+        hits = find(after=values, reverse=reverse, limit=self.page_size + 1)
+        self.has_more = len(hits) > self.page_size
+        hits = hits[:self.page_size]
+        if reverse:
+            hits.reverse()
+
+        self.has_cursor = values is not None
+        self.page = hits
+        return load(hits)
@@ -0,0 +1,51 @@
+import codecs
+
+import msgpack
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+
+class StreamParser(BaseParser):
+    """Hands the request body to the view unread, as ``{'stream': ..., 'format': ...}``."""
+    record_format = None
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return {'stream': stream, 'format': self.record_format}
+
+
+class CSVStreamParser(StreamParser):
+    media_type = 'text/csv'
+    record_format = 'csv'
+
+
+class NDJSONStreamParser(StreamParser):
+    media_type = 'application/x-ndjson'
+    record_format = 'ndjson'
+
+
+class ORJSONParser(JSONParser):
+    """``JSONParser`` decoding with orjson."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        data = stream.read()
+        if codecs.lookup(encoding).name != 'utf-8':
+            data = data.decode(encoding)
+        try:
+            # orjson rejects NaN and Infinity, like JSONParser in strict mode.
+            return orjson.loads(data)
+        except (orjson.JSONDecodeError, UnicodeDecodeError) as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+class MessagePackParser(BaseParser):
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read())
+        except (ValueError, msgpack.UnpackException) as exc:
+            raise ParseError('MessagePack parse error - %s' % (str(exc) or type(exc).__name__))
@@ -0,0 +1,175 @@
+from functools import partial
+
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from rest_framework import serializers
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+
+from .asynchronous import run_queries, run_query
+
+
+def _nested_serializer(serializer, field_name):
+    """Return the nested serializer instance behind ``field_name``, if any."""
+    field = serializer.fields.get(field_name)
+    if isinstance(field, serializers.ListSerializer):
+        field = field.child
+    if isinstance(field, serializers.ModelSerializer):
+        return field
+    return None
+
+
+def _used_relations(serializer):
+    """Names of the relations the fields of ``serializer`` read from."""
+    return {field.source.split('.')[0] for field in serializer.fields.values() if field.source != '*'}
+
+
+def child_count(model, field):
+    """
+    Number of ``model`` rows whose ``field`` points at the row, for ``Meta.annotations``.
+
+    Unlike ``Count()`` over the reverse relation it is a correlated subquery,
+    so the list query needs no join or GROUP BY and can still be read from an
+    index already in order.
+    """
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(count=Count('pk'))
+            .values('count'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def prefetch_queryset(queryset, serializer):
+    """
+    Apply the relations declared by ``serializer`` to ``queryset``.
+
+    Serializers declare what they read through ``Meta.select_related`` and
+    ``Meta.prefetch_related``. Prefetched relations are loaded with the related
+    model's default ordering and the nested serializer's own declarations, so a
+    page of results costs a constant number of queries. Relations no field
+    reads (e.g. dropped by ``?fields=``) are skipped.
+
+    ``Meta.annotations`` maps field names to expressions (such as child
+    counts) annotated when the field is serialized, and ``Meta.defer`` lists
+    columns, typically large text, that are not loaded unless a field reads
+    them; ``relation__column`` entries apply when the relation is joined.
+    """
+    meta = getattr(serializer, 'Meta', None)
+    used = _used_relations(serializer)
+    select_related = [lookup for lookup in getattr(meta, 'select_related', []) if lookup in used]
+    annotations = {name: expression for name, expression in getattr(meta, 'annotations', {}).items() if name in used}
+    # Columns of related rows are only deferred when the relation is joined.
+    defer = [
+        name for name in getattr(meta, 'defer', [])
+        if name not in used and ('__' not in name or name.split('__')[0] in select_related)
+    ]
+
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if annotations:
+        queryset = queryset.annotate(**annotations)
+        if not queryset.ordered:
+            # Django drops Meta.ordering from aggregating queries.
+            queryset = queryset.order_by(*queryset.model._meta.ordering)
+    if defer:
+        queryset = queryset.defer(*defer)
+
+    lookups = [Prefetch(lookup, queryset=related) for lookup, related in related_querysets(queryset.model, serializer)]
+    if lookups:
+        queryset = queryset.prefetch_related(*lookups)
+    return queryset
+
+
+def related_querysets(model, serializer):
+    """The ``(lookup, queryset)`` pairs ``prefetch_queryset()`` prefetches for ``serializer``."""
+    meta = getattr(serializer, 'Meta', None)
+    used = _used_relations(serializer)
+    relations = []
+    for lookup in getattr(meta, 'prefetch_related', []):
+        if lookup not in used:
+            continue
+        related_model = model._meta.get_field(lookup).related_model
+        related_queryset = related_model._default_manager.order_by(*related_model._meta.ordering)
+        nested = _nested_serializer(serializer, lookup)
+        if nested is not None:
+            related_queryset = prefetch_queryset(related_queryset, nested)
+        relations.append((lookup, related_queryset))
+    return relations
+
+
+def _set_prefetched(instance, relation, rows):
+    """Store ``rows`` as ``instance``'s prefetched one-to-many ``relation``, as ``prefetch_related()`` does."""
+    for row in rows:
+        relation.field.set_cached_value(row, instance)
+    queryset = getattr(instance, relation.get_accessor_name()).get_queryset()
+    queryset._result_cache = rows
+    queryset._prefetch_done = True
+    if not hasattr(instance, '_prefetched_objects_cache'):
+        instance._prefetched_objects_cache = {}
+    instance._prefetched_objects_cache[relation.get_cache_name()] = queryset
+
+
+class PrefetchQuerysetMixin:
+    """
+    View mixin that loads the relations the response serializer needs.
+
+    Hooks into ``filter_queryset`` so both list and detail lookups are covered
+    without touching each view's ``get_queryset``.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer = self.get_serializer_class()(context=self.get_serializer_context())
+        return prefetch_queryset(queryset, serializer)
+
+    def get_object_querysets(self):
+        """
+        The queryset ``aget_object()`` looks the object up in, and the
+        one-to-many relations it loads separately, with their querysets.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer_class()(context=self.get_serializer_context())
+        relations, prefetches = [], []
+        for lookup, related_queryset in related_querysets(queryset.model, serializer):
+            relation = queryset.model._meta.get_field(lookup)
+            if relation.one_to_many:
+                relations.append((relation, related_queryset))
+            else:
+                prefetches.append(Prefetch(lookup, queryset=related_queryset))
+        return queryset.prefetch_related(None).prefetch_related(*prefetches), relations
+
+    async def aget_object(self):
+        """
+        ``get_object()`` for async views, loading the object and each of its
+        prefetched one-to-many relations concurrently.
+
+        The related rows are filtered by the looked-up value rather than the
+        object's key, so their queries need not wait for the object's.
+        """
+        queryset, relations = await run_query(self.get_object_querysets)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        value = self.kwargs[lookup_url_kwarg]
+
+        def get_object():
+            instance = get_object_or_404(queryset, **{self.lookup_field: value})
+            self.check_object_permissions(self.request, instance)
+            return instance
+
+        loaders = [get_object] + [
+            partial(list, related_queryset.filter(**{f'{relation.field.name}__{self.lookup_field}': value}))
+            for relation, related_queryset in relations
+        ]
+        instance, *related_rows = await run_queries(*loaders)
+        for (relation, _), rows in zip(relations, related_rows):
+            _set_prefetched(instance, relation, rows)
+        return instance
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        return Response(await run_query(lambda: self.get_serializer(instance).data))
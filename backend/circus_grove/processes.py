@@ -0,0 +1,29 @@
+"""
+Process pools for management commands that spread work over CPUs.
+
+Workers are spawned rather than forked on every platform, so none of them
+inherits the parent's database connections or half-initialised state. Each
+sets Django up once and opens its own connections. Only functions from
+modules that can be imported after ``django.setup()`` can be submitted.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+
+
+def _setup_worker(settings_module):
+    os.environ['DJANGO_SETTINGS_MODULE'] = settings_module
+    django.setup()
+
+
+def process_pool(workers):
+    """A ``ProcessPoolExecutor`` of ``workers`` processes running this project's Django."""
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_setup_worker,
+        initargs=(settings.SETTINGS_MODULE,),
+    )
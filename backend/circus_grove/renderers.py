@@ -0,0 +1,68 @@
+"""
+Faster renderers: orjson for ``application/json`` and MessagePack.
+
+Both encode everything orjson or msgpack does not handle natively
+(``Decimal``, dates, times, lazy strings, ...) with DRF's own
+``JSONEncoder.default``, so those values come out exactly as they do from
+``JSONRenderer``. ``ORJSONRenderer`` produces the same bytes as
+``JSONRenderer`` except for bare Python floats. orjson writes ``1e16``
+and ``0.00001`` where the stdlib writes ``1e+16`` and ``1e-05``, and it
+writes NaN and infinities as ``null`` where strict JSON raises. Serializers return decimals as strings, so this only
+affects views that put floats in their response directly.
+"""
+import decimal
+import math
+
+import msgpack
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+_encoder = JSONEncoder()
+
+
+def _orjson_default(obj):
+    if isinstance(obj, decimal.Decimal):
+        # JSONRenderer writes float(obj) with the stdlib's float formatting.
+        value = float(obj)
+        if not math.isfinite(value):
+            raise ValueError('Out of range float values are not JSON compliant')
+        return orjson.Fragment(float.__repr__(value))
+    return _encoder.default(obj)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    ``JSONRenderer`` encoding with orjson.
+
+    Indented output (``Accept: application/json; indent=4``) and non-default
+    ``COMPACT_JSON``/``UNICODE_JSON``/``STRICT_JSON`` settings are handed to
+    ``JSONRenderer``, which orjson cannot reproduce.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        if indent or not self.compact or self.ensure_ascii or not self.strict:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=_orjson_default, option=ORJSON_OPTIONS)
+        # Escaped like JSONRenderer does, for embedding in JavaScript.
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Renders MessagePack, with the values JSON responses have for types it lacks."""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_encoder.default)
@@ -0,0 +1,155 @@
+"""
+Full-text search across training sessions and plans, meals, foods, nutrition
+plans and check-ins.
+
+The index is maintained by database triggers installed with
+``circus_grove.operations.AddFullTextSearch``, so every write path, bulk
+imports included, keeps it current without Python code:
+
+* PostgreSQL: a ``search_vector`` tsvector column on each table with a GIN
+  index, queried with ``plainto_tsquery`` and ranked with ``ts_rank_cd``.
+* SQLite: one FTS5 table, ``search_index``, whose rowids encode the table
+  (``id * 8 + code``) and whose ``owner`` column scopes rows to users, ranked
+  with ``bm25``.
+
+Every term of the query must match, after stemming. Hits are ordered by
+relevance, then type and id, and read a page at a time from a keyset
+(see ``circus_grove.pagination.SearchPagination``). Each page is then
+loaded from its tables with one query per type.
+"""
+import re
+
+from django.db import connection
+from django.db.models.functions import Substr
+
+from checkins.models import CheckIn
+from nutrition.models import Food, Meal, NutritionPlan
+from training.models import TrainingPlan, TrainingSession
+
+# Check-ins have no title; the start of their notes stands in for it.
+PREVIEW_LENGTH = 200
+TERM = re.compile(r'\w+')
+
+
+class Source:
+    """A searchable table: its type name, its code in the index, and how to read its hits."""
+
+    def __init__(self, name, code, model, title, date, user='user_id', join='', owner_column=None):
+        self.name = name
+        self.code = code
+        self.model = model
+        self.title = title
+        self.date = date
+        self.user = user
+        # For rows owned through a parent: SQL joining it, and its user column.
+        self.join = join
+        self.owner_column = owner_column or f'{self.table}.user_id'
+
+    @property
+    def table(self):
+        return self.model._meta.db_table
+
+    def rows(self, ids):
+        """The hits among ``ids`` that still exist, by id."""
+        rows = self.model._default_manager.filter(pk__in=ids).values_list('pk', self.user, self.title, self.date)
+        return {pk: {'user': user, 'title': title, 'date': date} for pk, user, title, date in rows}
+
+
+SOURCES = (
+    Source('session', 1, TrainingSession, 'title', 'date'),
+    Source('training_plan', 2, TrainingPlan, 'name', 'start_date'),
+    Source('meal', 3, Meal, 'name', 'date'),
+    Source(
+        'food', 4, Food, 'name', 'meal__date', user='meal__user_id',
+        join='JOIN meals ON meals.id = foods.meal_id', owner_column='meals.user_id',
+    ),
+    Source('nutrition_plan', 5, NutritionPlan, 'name', 'start_date'),
+    Source('checkin', 6, CheckIn, Substr('notes', 1, PREVIEW_LENGTH), 'date'),
+)
+TYPES = tuple(source.name for source in SOURCES)
+BY_NAME = {source.name: source for source in SOURCES}
+BY_CODE = {source.code: source for source in SOURCES}
+
+
+def _postgresql_hits(query, user_ids, sources):
+    selects, params = [], []
+    for source in sources:
+        selects.append(
+            f'SELECT {source.code} AS kind, {source.table}.id AS id, '
+            f'ts_rank_cd({source.table}.search_vector, query)::float8 AS rank '
+            f"FROM {source.table} {source.join} CROSS JOIN plainto_tsquery('english', %s) query "
+            f'WHERE {source.table}.search_vector @@ query AND {source.owner_column} = ANY(%s)'
+        )
+        params += [query, list(user_ids)]
+    return ' UNION ALL '.join(selects), params
+
+
+def _sqlite_hits(query, user_ids, sources):
+    terms = TERM.findall(query.lower())
+    if not terms:
+        return None, None
+    match = ' AND '.join(f'{{title body}} : "{term}"' for term in terms)
+    owners = ' OR '.join(f'"u{user_id}"' for user_id in user_ids)
+    codes = ', '.join(str(source.code) for source in sources)
+    # Titles weigh 2.5 times the rest, as with PostgreSQL's default A and B weights.
+    sql = (
+        'SELECT rowid %% 8 AS kind, rowid / 8 AS id, -bm25(search_index, 2.5, 1.0, 0.0) AS rank '
+        f'FROM search_index WHERE search_index MATCH %s AND rowid %% 8 IN ({codes})'
+    )
+    return sql, [f'({match}) AND owner : ({owners})']
+
+
+def _after(values, reverse):
+    """The keyset condition for hits after ``(rank, kind, id)`` in ``rank DESC, kind, id`` order."""
+    rank, kind, pk = values
+    if reverse:
+        return 'rank > %s OR (rank = %s AND (kind < %s OR (kind = %s AND id < %s)))', [rank, rank, kind, kind, pk]
+    return 'rank < %s OR (rank = %s AND (kind > %s OR (kind = %s AND id > %s)))', [rank, rank, kind, kind, pk]
+
+
+def find(query, user_ids, types=None, after=None, reverse=False, limit=20):
+    """
+    Search the records of ``user_ids`` for ``query``.
+
+    ``types`` limits the search to some of ``TYPES``. Returns up to
+    ``limit`` ``{'kind', 'id', 'rank'}`` hits following the
+    ``(rank, kind, id)`` values of ``after``, or preceding them with
+    ``reverse``, in the order they were read.
+    """
+    sources = [BY_NAME[name] for name in types] if types else SOURCES
+    if not query.strip() or not user_ids:
+        return []
+    if connection.vendor == 'postgresql':
+        hits, params = _postgresql_hits(query, user_ids, sources)
+    else:
+        hits, params = _sqlite_hits(query, user_ids, sources)
+        if hits is None:
+            return []
+
+    sql = f'SELECT kind, id, rank FROM ({hits}) hits'
+    if after is not None:
+        condition, condition_params = _after(after, reverse)
+        sql += f' WHERE {condition}'
+        params += condition_params
+    sql += ' ORDER BY rank, kind DESC, id DESC' if reverse else ' ORDER BY rank DESC, kind, id'
+    sql += ' LIMIT %s'
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*params, limit])
+        return [{'kind': kind, 'id': pk, 'rank': rank} for kind, pk, rank in cursor.fetchall()]
+
+
+def load(hits):
+    """
+    Add the ``type``, ``user``, ``title`` and ``date`` of each of ``hits``.
+
+    Reads one query per type. A row deleted since it was found is left out.
+    """
+    ids = {}
+    for hit in hits:
+        ids.setdefault(hit['kind'], []).append(hit['id'])
+    rows = {kind: BY_CODE[kind].rows(pks) for kind, pks in ids.items()}
+    return [
+        {'type': BY_CODE[hit['kind']].name, **hit, **rows[hit['kind']][hit['id']]}
+        for hit in hits
+        if hit['id'] in rows[hit['kind']]
+    ]
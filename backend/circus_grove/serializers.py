@@ -0,0 +1,69 @@
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def _param_set(request, name):
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+def is_sparse_request(request):
+    """Whether ``request`` asks for a sparse representation with ``fields`` or ``expand``."""
+    return (
+        request is not None
+        and request.method in SAFE_METHODS
+        and (FIELDS_PARAM in request.query_params or EXPAND_PARAM in request.query_params)
+    )
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin adding ``?fields=`` and ``?expand=`` to GET responses.
+
+    ``fields`` limits the response to the listed fields. ``expand`` picks
+    which of the nested relations named in ``Meta.expandable_fields`` are
+    embedded. Without either parameter the full representation is returned.
+    With one of them, a nested relation is only embedded when it is listed
+    in ``fields`` or ``expand``, and ``PrefetchQuerysetMixin`` does not load
+    the relations of dropped fields. Unknown names in either parameter are
+    ignored. Only the outermost serializer reads the parameters.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if not self._is_outermost() or not is_sparse_request(request):
+            return fields
+
+        only = _param_set(request, FIELDS_PARAM)
+        expand = _param_set(request, EXPAND_PARAM) or set()
+        expandable = set(getattr(self.Meta, 'expandable_fields', ()))
+        for name in list(fields):
+            if name in expandable:
+                keep = name in expand or (only is not None and name in only)
+            else:
+                keep = only is None or name in only
+            if not keep:
+                del fields[name]
+        return fields
+
+    def _is_outermost(self):
+        # A list view's serializer is the child of the root ListSerializer.
+        return self.parent is None or self.parent is self.root
+
+
+class SearchResultSerializer(serializers.Serializer):
+    """Serializer for a full-text search hit (see ``circus_grove.search``)."""
+    type = serializers.CharField(
+        help_text='session, training_plan, meal, food, nutrition_plan or checkin',
+    )
+    id = serializers.IntegerField()
+    user = serializers.IntegerField()
+    title = serializers.CharField(allow_null=True, help_text='The name or title; for check-ins, the start of the notes')
+    date = serializers.DateField(help_text='The day, or the start date of a plan')
+    rank = serializers.FloatField(help_text='Relevance; higher is better')
@@ -45,6 +45,7 @@ INSTALLED_APPS = [
     'corsheaders',
     'drf_spectacular',
     # Local apps
+    'circus_grove',
     'users',
     'training',
     'nutrition',
@@ -53,6 +54,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'circus_grove.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -95,6 +97,59 @@ DATABASES = {
     )
 }
 
+if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    # Trigram lookups for the exercise catalog search (training.catalog).
+    INSTALLED_APPS.append('django.contrib.postgres')
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Local memory by default; point CACHE_BACKEND/CACHE_LOCATION at a shared
+# cache (e.g. Redis) so every worker sees the same entries and counters.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'circus-grove'),
+    }
+}
+
+# JWT claims are only trusted while this cache, shared by every process, holds
+# their fingerprint (see users.authentication). A per-process cache cannot see
+# changes made by other workers, so by default it disables them and every
+# request loads its user; set AUTH_CLAIMS_CACHE=default to trust claims with a
+# local cache anyway, e.g. under a single-process server.
+PROCESS_LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+AUTH_CLAIMS_CACHE = os.getenv(
+    'AUTH_CLAIMS_CACHE',
+    '' if CACHES['default']['BACKEND'] in PROCESS_LOCAL_CACHE_BACKENDS else 'default',
+)
+
+
+# API response compression
+# Responses under API_COMPRESSION_PATH_PREFIX of at least API_COMPRESSION_MIN_SIZE
+# bytes are compressed with zstd, brotli or gzip (see circus_grove.compression).
+
+API_COMPRESSION_PATH_PREFIX = '/api/'
+API_COMPRESSION_MIN_SIZE = int(os.getenv('API_COMPRESSION_MIN_SIZE', '1024'))
+
+# Async read views
+# GET requests to the session, meal, check-in and plan endpoints are served by
+# coroutines running their queries on a pool of ASYNC_READ_WORKERS threads, each
+# holding one database connection (see circus_grove.asynchronous). Off unless the
+# app is served by an ASGI server: the Docker image then starts uvicorn.
+
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', 'False') == 'True'
+ASYNC_READ_WORKERS = int(os.getenv('ASYNC_READ_WORKERS', '8'))
+
+# Startup budget
+# Largest median cold start, in milliseconds, `manage.py profile_startup` accepts.
+
+STARTUP_BUDGET_MS = int(os.getenv('STARTUP_BUDGET_MS', '1500'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -143,11 +198,22 @@ AUTH_USER_MODEL = 'users.User'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.TokenClaimsAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'circus_grove.renderers.ORJSONRenderer',
+        'circus_grove.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'circus_grove.parsers.ORJSONParser',
+        'circus_grove.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
@@ -160,6 +226,9 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    # Embed the claims read by users.authentication.TokenClaimsAuthentication
+    'TOKEN_OBTAIN_SERIALIZER': 'users.serializers.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.ClaimsTokenRefreshSerializer',
 }
 
 # CORS settings
@@ -175,8 +244,14 @@ SPECTACULAR_SETTINGS = {
     'DESCRIPTION': 'API for The Circus Grove - Training, Nutrition, and Check-ins Platform',
     'VERSION': '1.0.0',
     'SERVE_INCLUDE_SCHEMA': False,
+    # Registers the extensions in users.schema when a schema is generated.
+    'PREPROCESSING_HOOKS': ['users.schema.load_extensions'],
 }
 
+# Stored schema served at /api/schema/, written by `manage.py openapi_schema`
+# (see circus_grove.openapi).
+OPENAPI_SCHEMA_DIR = BASE_DIR / 'openapi'
+
 # Static files
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
@@ -0,0 +1,61 @@
+"""Helpers shared by the apps' test suites."""
+import re
+from unittest.mock import patch
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from .values import ValuesListMixin
+
+
+class QueryPlanAssertions:
+    """APITestCase mixin asserting how the database plans the queries of a request."""
+
+    def assertListIndexScan(self, index_name, path, **params):
+        """
+        Assert that the page of a list GET ``path`` is read through
+        ``index_name``, already in order, from ``.values()`` rows or by the
+        serializer. The list must not be empty, or no page is queried.
+        """
+        for use_values_plan in (True, False):
+            with self.subTest(path=path, use_values_plan=use_values_plan):
+                with patch.object(ValuesListMixin, 'use_values_plan', use_values_plan):
+                    with CaptureQueriesContext(connection) as queries:
+                        response = self.client.get(path, params)
+                self.assertEqual(response.status_code, 200)
+                pages = [query['sql'] for query in queries if ' ORDER BY ' in query['sql'] and ' LIMIT ' in query['sql']]
+                self.assertEqual(len(pages), 1, pages)
+                self.assertIndexScan(pages[0], index_name)
+
+    def assertIndexScan(self, sql, index_name):
+        """Assert that the query ``sql`` is read through ``index_name``, already in order."""
+        if connection.vendor == 'postgresql':
+            # Test tables are tiny, so the planner would rather scan them.
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+                    cursor.execute(f'EXPLAIN {sql}')
+                    plan = '\n'.join(row[0] for row in cursor.fetchall())
+            self.assertRegex(plan, rf'Index (Only )?Scan (Backward )?using {index_name}\b')
+            self.assertIsNone(re.search(r'^\s*(->\s*)?(Incremental )?Sort\b', plan, re.MULTILINE), plan)
+        elif connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = '\n'.join(row[3] for row in cursor.fetchall())
+            self.assertIn(f'USING INDEX {index_name} ', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+        else:
+            self.skipTest(f'No query plan assertions for {connection.vendor}.')
+
+
+class QueryCountAssertions:
+    """APITestCase mixin pinning the number of queries a GET takes."""
+
+    def assertGetQueries(self, num, path, **params):
+        """Assert that GET ``path`` takes ``num`` queries, served from ``.values()`` rows or by the serializer."""
+        for use_values_plan in (True, False):
+            with self.subTest(path=path, use_values_plan=use_values_plan):
+                with patch.object(ValuesListMixin, 'use_values_plan', use_values_plan):
+                    with self.assertNumQueries(num):
+                        response = self.client.get(path, params)
+                self.assertEqual(response.status_code, 200)
@@ -0,0 +1,668 @@
+import base64
+import gzip
+import json
+import tempfile
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import skipUnless
+from urllib.parse import parse_qs, urlsplit
+
+import msgpack
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.checks import registry
+from django.db import connection
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import resolve
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+
+from checkins.models import CheckIn
+from nutrition.models import Food, Meal, NutritionPlan, NutritionPlanMeal
+from training.caches import training_plan_cache
+from training.models import CatalogExercise, Exercise, TrainingPlan, TrainingPlanExercise, TrainingSession
+from users.serializers import ClaimsTokenObtainPairSerializer
+
+from . import openapi, search
+from .checks import check_openapi_schema
+from .compression import CODECS, CompressionMiddleware, compression_stats, negotiate
+from .pagination import KeysetPagination
+from .renderers import ORJSONRenderer
+from .values import compile_values_plan
+
+User = get_user_model()
+
+
+class ClientParamTests(APITestCase):
+    """Coaches pick a client with ``?user=``; anything but a client id is rejected."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.coach = User.objects.create_user(username='coach', email='coach@example.com', user_type='coach')
+        cls.client_user = User.objects.create_user(username='client', email='client@example.com', coach=cls.coach)
+        cls.stranger = User.objects.create_user(username='stranger', email='stranger@example.com')
+
+    def setUp(self):
+        self.client.force_authenticate(self.coach)
+
+    def import_checkins(self, user):
+        return self.client.post(
+            f'/api/import/?type=checkins&user={user}', 'date,notes\n2024-01-01,Fine\n', content_type='text/csv',
+        )
+
+    def test_import(self):
+        self.assertEqual(self.import_checkins(self.client_user.pk).status_code, 200)
+        self.assertEqual(self.client_user.checkins.count(), 1)
+        response = self.import_checkins('abc')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('user', response.json())
+        self.assertEqual(self.import_checkins(self.stranger.pk).status_code, 404)
+
+    def test_search(self):
+        self.assertEqual(self.client.get('/api/search/', {'q': 'run', 'user': self.client_user.pk}).status_code, 200)
+        response = self.client.get('/api/search/', {'q': 'run', 'user': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('user', response.json())
+        self.assertEqual(self.client.get('/api/search/', {'q': 'run', 'user': self.stranger.pk}).status_code, 404)
+
+    def test_export(self):
+        response = self.client.get('/api/export/', {'user': self.client_user.pk})
+        self.assertEqual(response.status_code, 200)
+        b''.join(response.streaming_content)
+        self.assertEqual(self.client.get('/api/export/', {'user': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/export/', {'user': self.stranger.pk}).status_code, 404)
+
+
+class ExportStreamingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='client', email='client@example.com')
+        cls.user.checkins.create(date='2024-01-01', notes='Fine')
+
+    async def test_asgi_export_is_streamed_asynchronously(self):
+        # A synchronous iterator would be read into memory before anything is sent.
+        token = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+        response = await self.async_client.get('/api/export/', headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertIn(b'"notes": "Fine"', body)
+
+
+class KeysetPaginationTests(APITestCase):
+    """Pages follow one another, both ways, without gaps or repeats."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='client', email='client@example.com')
+        body_fat = [None, Decimal('15.0'), Decimal('15.0'), None, Decimal('12.5')]
+        sleep = [Decimal('7.0'), None, Decimal('7.0'), Decimal('8.0'), None]
+        CheckIn.objects.bulk_create(
+            CheckIn(
+                user=cls.user, date=date(2024, 1, 1) + timedelta(days=day),
+                body_fat_percentage=body_fat[day % 5], sleep_hours=sleep[day % 3],
+            )
+            for day in range(23)
+        )
+
+    def page(self, url, ordering):
+        view = SimpleNamespace(get_keyset_ordering=lambda queryset: ordering)
+        paginator = KeysetPagination()
+        request = Request(APIRequestFactory().get(url))
+        rows = paginator.paginate_queryset(CheckIn.objects.filter(user=self.user), request, view)
+        return [row.pk for row in rows], paginator.get_next_link(), paginator.get_previous_link()
+
+    def expected(self, ordering):
+        def key(checkin):
+            values = []
+            for field in ordering:
+                value = getattr(checkin, field.lstrip('-'))
+                # NULLs sort after every value ascending, so first descending.
+                if field.startswith('-'):
+                    values.append((value is not None, -(value or 0)))
+                else:
+                    values.append((value is None, value or 0))
+            return values, checkin.pk
+        return [checkin.pk for checkin in sorted(CheckIn.objects.filter(user=self.user), key=key)]
+
+    def test_walk_tied_and_null_keys(self):
+        for ordering in (['body_fat_percentage'], ['-body_fat_percentage'], ['-sleep_hours', 'body_fat_percentage']):
+            with self.subTest(ordering=ordering):
+                pages, url = [], 'http://testserver/api/checkins/?page_size=4'
+                while url:
+                    ids, url, previous = self.page(url, ordering)
+                    pages.append((ids, previous))
+                self.assertEqual([pk for ids, _ in pages for pk in ids], self.expected(ordering))
+                self.assertIsNone(pages[0][1])
+                # Each previous link leads back to the page before.
+                for (ids, _), (_, previous) in zip(pages, pages[1:]):
+                    self.assertEqual(self.page(previous, ordering)[0], ids)
+
+    def test_walk_through_the_endpoint(self):
+        TrainingSession.objects.bulk_create(
+            TrainingSession(user=self.user, title=f'Session {i}', date=date(2024, 1, i % 3 + 1), duration_minutes=30)
+            for i in range(10)
+        )
+        self.client.force_authenticate(self.user)
+        seen, url = [], '/api/training/sessions/?pagination=cursor&page_size=3'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [row['id'] for row in response.json()['results']]
+            url = response.json()['next']
+        expected = TrainingSession.objects.filter(user=self.user).order_by('-date', '-created_at', 'id')
+        self.assertEqual(seen, list(expected.values_list('id', flat=True)))
+
+    def test_tampered_cursor_is_not_found(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get('/api/checkins/?pagination=cursor&page_size=2')
+        cursor = parse_qs(urlsplit(response.json()['next']).query)['cursor'][0]
+        payload = json.loads(base64.urlsafe_b64decode(cursor))
+        tampered = [
+            'not a cursor',
+            cursor[:len(cursor) // 2],
+            base64.urlsafe_b64encode(json.dumps({**payload, 'v': payload['v'][:1]}).encode()).decode(),
+            base64.urlsafe_b64encode(json.dumps({**payload, 'v': ['yesterday', 1, 2]}).encode()).decode(),
+        ]
+        for cursor in tampered:
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get('/api/checkins/', {'cursor': cursor}).status_code, 404)
+
+
+class AsyncReadViewTests(SimpleTestCase):
+    def test_views_are_async_only_when_enabled(self):
+        for path in ('/api/training/sessions/', '/api/training/plans/1/', '/api/checkins/1/'):
+            view_class = resolve(path).func.view_class
+            with self.subTest(path=path):
+                with override_settings(ASYNC_READ_VIEWS=False):
+                    self.assertFalse(iscoroutinefunction(view_class.as_view()))
+                with override_settings(ASYNC_READ_VIEWS=True):
+                    self.assertTrue(iscoroutinefunction(view_class.as_view()))
+
+
+class ValuesPlanEquivalenceTests(TestCase):
+    """
+    List endpoints render the same bytes from ``.values()`` rows as from
+    their serializers (see ``circus_grove.values``).
+    """
+    endpoints = (
+        '/api/training/sessions/',
+        '/api/training/plans/',
+        '/api/nutrition/meals/',
+        '/api/nutrition/plans/',
+        '/api/checkins/',
+    )
+    queries = ('', 'page_size=2', 'pagination=cursor&page_size=2', 'fields=id,user,date,notes')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.coach = User.objects.create_user(username='coach', email='coach@example.com', user_type='coach')
+        cls.user = User.objects.create_user(username='client', email='client@example.com', coach=cls.coach)
+        CatalogExercise.objects.create(name='Bench Press')
+
+        training_plan = TrainingPlan.objects.create(
+            coach=cls.coach, user=cls.user, name='Strength', description='x' * 250, start_date=date(2024, 1, 1),
+        )
+        TrainingPlan.objects.create(coach=cls.coach, user=cls.user, name='Empty', start_date=date(2024, 2, 1))
+        TrainingPlanExercise.objects.create(
+            plan=training_plan, exercise_name='Bench Press', day_of_week=0, sets=5, reps=5, weight_kg=Decimal('80.50'),
+        )
+        nutrition_plan = NutritionPlan.objects.create(
+            coach=cls.coach, user=cls.user, name='Cut', description=None, start_date=date(2024, 1, 1),
+            end_date=date(2024, 3, 31), target_calories=2100, target_protein_g=Decimal('180.25'),
+            target_carbs_g=Decimal('150.00'), target_fat_g=Decimal('0.50'),
+        )
+        NutritionPlan.objects.create(
+            coach=cls.coach, user=cls.user, name='Maintain', start_date=date(2024, 4, 1), target_calories=2500,
+            target_protein_g=Decimal('160.00'), target_carbs_g=Decimal('250.00'), target_fat_g=Decimal('70.00'),
+        )
+        NutritionPlanMeal.objects.create(
+            plan=nutrition_plan, meal_type='breakfast', scheduled_time=time(8), target_calories=500,
+            target_protein_g=Decimal('30.00'),
+        )
+
+        for day in range(1, 4):
+            session = TrainingSession.objects.create(
+                user=cls.user, training_plan=training_plan if day % 2 else None, title=f'Session {day}',
+                description=None if day == 1 else 'Heavy day', date=date(2024, 1, day), duration_minutes=60,
+                intensity='high', calories_burned=None if day == 2 else 420,
+            )
+            Exercise.objects.create(session=session, name='Bench press', sets=5, reps=5, weight_kg=Decimal('82.25'))
+            Exercise.objects.create(session=session, name='Plank', sets=3, reps=1, weight_kg=None, rest_seconds=None)
+
+            meal = Meal.objects.create(
+                user=cls.user, nutrition_plan=nutrition_plan if day % 2 else None, name=f'Meal {day}',
+                meal_type='breakfast', date=date(2024, 1, day), time=None if day == 2 else time(7, 30),
+                calories=650, protein_g=Decimal('42.10'), carbs_g=None, fat_g=Decimal('0.05'),
+            )
+            Food.objects.create(meal=meal, name='Oats', quantity='80 g', calories=300, protein_g=Decimal('10.40'))
+            Food.objects.create(meal=meal, name='Milk', quantity='200 ml', calories=120, protein_g=None)
+
+            CheckIn.objects.create(
+                user=cls.user, date=date(2024, 1, day), weight_kg=Decimal('81.30') - day,
+                body_fat_percentage=None if day == 3 else Decimal('15.5'), mood=None if day == 1 else 'good',
+                energy_level=7, sleep_hours=Decimal('7.0'), notes=None if day == 2 else 'Fine',
+            )
+
+    def render(self, path, user, use_values_plan):
+        view = resolve(path.split('?')[0])
+        request = APIRequestFactory().get(path)
+        force_authenticate(request, user=user)
+        view_func = view.func.view_class.as_view(use_values_plan=use_values_plan)
+        if iscoroutinefunction(view_func):
+            view_func = async_to_sync(view_func)
+        response = view_func(request, **view.kwargs)
+        self.assertEqual(response.status_code, 200, path)
+        return response.render().content
+
+    def assertSameBytes(self, path, user):
+        expected = self.render(path, user, use_values_plan=False)
+        self.assertEqual(self.render(path, user, use_values_plan=True), expected, path)
+        return expected
+
+    def test_list_endpoints(self):
+        for endpoint in self.endpoints:
+            for query in self.queries:
+                with self.subTest(endpoint=endpoint, query=query):
+                    self.assertSameBytes(f'{endpoint}?{query}', self.user)
+
+    @override_settings(ASYNC_READ_VIEWS=True)
+    def test_async_list_endpoints(self):
+        for endpoint in self.endpoints:
+            with self.subTest(endpoint=endpoint):
+                self.assertSameBytes(f'{endpoint}?pagination=cursor&page_size=2', self.user)
+
+    def test_coach_plan_lists(self):
+        for endpoint in ('/api/training/plans/', '/api/nutrition/plans/'):
+            with self.subTest(endpoint=endpoint):
+                self.assertIn(b'"Strength"' if 'training' in endpoint else b'"Cut"', self.assertSameBytes(endpoint, self.coach))
+
+    def test_child_lists(self):
+        for session in TrainingSession.objects.all():
+            body = self.assertSameBytes(f'/api/training/sessions/{session.pk}/exercises/', self.user)
+            self.assertIn(b'"catalog_exercise":', body)
+        for meal in Meal.objects.all():
+            self.assertSameBytes(f'/api/nutrition/meals/{meal.pk}/foods/', self.user)
+
+    def test_serializers_have_values_plans(self):
+        # Otherwise the comparisons above would pit the serializer against itself.
+        for path in (
+            *self.endpoints,
+            f'/api/training/sessions/{TrainingSession.objects.first().pk}/exercises/',
+            f'/api/nutrition/meals/{Meal.objects.first().pk}/foods/',
+        ):
+            view = resolve(path)
+            request = APIRequestFactory().get(path)
+            force_authenticate(request, user=self.user)
+            instance = view.func.view_class(request=Request(request), kwargs=view.kwargs, format_kwarg=None)
+            with self.subTest(path=path):
+                self.assertIsNotNone(compile_values_plan(instance.get_serializer()))
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Covers the SQLite FTS5 index.')
+class SearchTests(APITestCase):
+    """The search index follows every write and only finds the requester's records."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.coach = User.objects.create_user(username='coach', email='coach@example.com', user_type='coach')
+        cls.user = User.objects.create_user(username='client', email='client@example.com', coach=cls.coach)
+        cls.other = User.objects.create_user(username='other', email='other@example.com')
+        cls.session = TrainingSession.objects.create(
+            user=cls.user, title='Morning run', description='Easy pace by the river', date=date(2024, 3, 1),
+            duration_minutes=30,
+        )
+        TrainingSession.objects.create(user=cls.other, title='Morning run', date=date(2024, 3, 1), duration_minutes=30)
+        cls.meal = Meal.objects.create(
+            user=cls.user, name='Porridge', meal_type='breakfast', date=date(2024, 3, 1), calories=400,
+        )
+        cls.food = Food.objects.create(meal=cls.meal, name='Oats with blueberries', quantity='80 g', calories=300)
+
+    def search(self, requester, **params):
+        self.client.force_authenticate(requester)
+        response = self.client.get('/api/search/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def hits(self, requester, query, **params):
+        return [(hit['type'], hit['id']) for hit in self.search(requester, q=query, **params)['results']]
+
+    def test_index_follows_inserts_updates_and_deletes(self):
+        self.assertEqual(self.hits(self.user, 'river'), [('session', self.session.pk)])
+        self.session.title = 'Evening swim'
+        self.session.save()
+        self.assertEqual(self.hits(self.user, 'morning'), [])
+        self.assertEqual(self.search(self.user, q='swim')['results'][0]['title'], 'Evening swim')
+        # Queryset updates and deletes skip signals; the triggers still see them.
+        TrainingSession.objects.filter(pk=self.session.pk).update(title='Hill sprints')
+        self.assertEqual(self.hits(self.user, 'sprints'), [('session', self.session.pk)])
+        self.assertEqual(self.hits(self.user, 'blueberry'), [('food', self.food.pk)])
+        self.meal.delete()
+        self.assertEqual(self.hits(self.user, 'blueberry'), [])
+        self.assertEqual(self.hits(self.user, 'porridge'), [])
+
+    def test_results_are_scoped_to_owners(self):
+        self.assertEqual(self.hits(self.user, 'morning'), [('session', self.session.pk)])
+        self.assertEqual(len(self.hits(self.other, 'morning')), 1)
+        self.assertNotIn(('session', self.session.pk), self.hits(self.other, 'morning'))
+        # Foods belong to the owner of their meal.
+        self.assertEqual(self.hits(self.other, 'oats'), [])
+        self.assertEqual(self.hits(self.coach, 'morning'), [('session', self.session.pk)])
+        self.assertEqual(self.hits(self.coach, 'morning', user=self.user.pk), [('session', self.session.pk)])
+
+    def test_keyset_pages_through_tied_ranks(self):
+        sessions = TrainingSession.objects.bulk_create(
+            TrainingSession(user=self.user, title='Tempo intervals', date=date(2024, 3, 2), duration_minutes=40)
+            for _ in range(11)
+        )
+        meals = Meal.objects.bulk_create(
+            Meal(user=self.user, name='Tempo intervals', meal_type='snack', date=date(2024, 3, 2), calories=100)
+            for _ in range(4)
+        )
+        expected = [('session', session.pk) for session in sessions] + [('meal', meal.pk) for meal in meals]
+
+        self.client.force_authenticate(self.user)
+        pages, url = [], '/api/search/?q=tempo&page_size=4'
+        while url:
+            page = self.client.get(url).json()
+            pages.append(page)
+            url = page['next']
+        results = [hit for page in pages for hit in page['results']]
+        self.assertEqual(len({hit['rank'] for hit in results}), 1)
+        # Ties are ordered by type code, then id.
+        self.assertEqual([(hit['type'], hit['id']) for hit in results], sorted(expected, key=lambda hit: (
+            search.BY_NAME[hit[0]].code, hit[1],
+        )))
+        self.assertEqual([len(page['results']) for page in pages], [4, 4, 4, 3])
+        previous = self.client.get(pages[2]['previous']).json()
+        self.assertEqual(previous['results'], pages[1]['results'])
+
+
+class DocumentCacheTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.coach = User.objects.create_user(username='coach', email='coach@example.com', user_type='coach')
+        cls.client_user = User.objects.create_user(username='client', email='client@example.com', coach=cls.coach)
+        cls.admin = User.objects.create_user(username='admin', email='admin@example.com', is_staff=True)
+        cls.plan = TrainingPlan.objects.create(
+            coach=cls.coach, user=cls.client_user, name='Block', start_date=date(2024, 1, 1),
+        )
+        cls.url = f'/api/training/plans/{cls.plan.pk}/'
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.coach)
+
+    def stats(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get('/api/cache/stats/')
+        self.client.force_authenticate(self.coach)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['training-plans']
+
+    def test_child_writes_bump_the_version_after_commit(self):
+        version = training_plan_cache.version(self.plan.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            TrainingPlanExercise.objects.create(plan=self.plan, exercise_name='Squat', day_of_week=0, sets=5, reps=5)
+            self.assertEqual(training_plan_cache.version(self.plan.pk), version)
+        self.assertNotEqual(training_plan_cache.version(self.plan.pk), version)
+
+    def test_repeat_reads_are_served_from_the_cache(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(2):
+            # The access check and the ETag validators.
+            second = self.client.get(self.url)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(self.stats(), {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+    def test_writes_rebuild_the_document(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(self.url, {'name': 'Peaking'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(self.url).json()['name'], 'Peaking')
+        with self.captureOnCommitCallbacks(execute=True):
+            TrainingPlanExercise.objects.create(plan=self.plan, exercise_name='Squat', day_of_week=0, sets=5, reps=5)
+        self.assertEqual(len(self.client.get(self.url).json()['exercises']), 1)
+        self.assertEqual(self.stats(), {'hits': 0, 'misses': 3, 'hit_ratio': 0.0})
+
+    def test_stats_are_admin_only(self):
+        self.assertEqual(self.client.get('/api/cache/stats/').status_code, 403)
+
+
+class SparseFieldsTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='client', email='client@example.com')
+        cls.session = TrainingSession.objects.create(
+            user=cls.user, title='Legs', date=date(2024, 1, 1), duration_minutes=60, notes='Felt strong',
+        )
+        cls.session.exercises.create(name='Squat', sets=5, reps=5)
+        cls.url = f'/api/training/sessions/{cls.session.pk}/'
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def get(self, url, queries, **params):
+        with self.assertNumQueries(queries):
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_fields_trim_the_response(self):
+        # The validators and the session; the exercises are not loaded.
+        self.assertEqual(self.get(self.url, 2, fields='id,title'), {'id': self.session.pk, 'title': 'Legs'})
+        page = self.get('/api/training/sessions/', 3, fields='id,date')
+        self.assertEqual(page['results'], [{'id': self.session.pk, 'date': '2024-01-01'}])
+
+    def test_expand_embeds_the_relation(self):
+        full = self.get(self.url, 3)
+        self.assertEqual(len(full['exercises']), 1)
+        expanded = self.get(self.url, 3, expand='exercises')
+        self.assertEqual(expanded, full)
+        unexpanded = self.get(self.url, 2, expand='')
+        self.assertNotIn('exercises', unexpanded)
+        self.assertEqual(unexpanded['notes'], 'Felt strong')
+
+    def test_fields_can_name_the_relation(self):
+        document = self.get(self.url, 3, fields='id,exercises')
+        self.assertEqual(list(document), ['id', 'exercises'])
+        self.assertEqual(document['exercises'][0]['name'], 'Squat')
+        self.assertIn('sets', document['exercises'][0])
+
+    def test_unknown_names_are_ignored(self):
+        self.assertEqual(self.get(self.url, 2, fields='id,bogus'), {'id': self.session.pk})
+        self.assertNotIn('exercises', self.get(self.url, 2, expand='bogus'))
+        self.assertEqual(self.get(self.url, 2, fields='bogus'), {})
+
+
+class RendererParserTests(APITestCase):
+    data = {
+        'decimals': [Decimal('1.50'), Decimal('0.10'), Decimal('12345678.90'), Decimal('-3'), Decimal('1E+2')],
+        'date': date(2024, 1, 2),
+        'time': time(8, 30, 15, 250),
+        'datetimes': [
+            datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc),
+            datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone(timedelta(hours=-5))),
+            datetime(2024, 1, 2, 3, 4, 5),
+        ],
+        'text': 'line\u2028separator \u00e9',
+        'nested': {'none': None, 'bool': True, 'int': 7},
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='client', email='client@example.com')
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def test_orjson_output_matches_json_renderer(self):
+        self.assertEqual(ORJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+        indented = 'application/json; indent=4'
+        self.assertEqual(
+            ORJSONRenderer().render(self.data, indented, {}), JSONRenderer().render(self.data, indented, {}),
+        )
+
+    def test_messagepack_round_trip(self):
+        payload = {
+            'title': 'Push', 'date': '2024-01-01', 'duration_minutes': 60, 'intensity': 'high',
+            'exercises': [{'name': 'Bench press', 'sets': 5, 'reps': 5, 'weight_kg': '100.50'}],
+        }
+        response = self.client.post(
+            '/api/training/sessions/', msgpack.packb(payload), content_type='application/msgpack',
+            HTTP_ACCEPT='application/msgpack',
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        created = msgpack.unpackb(response.content)
+        self.assertEqual(created['exercises'][0]['weight_kg'], '100.50')
+
+        url = f"/api/training/sessions/{TrainingSession.objects.get().pk}/"
+        packed = self.client.get(url, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(packed['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(packed.content), self.client.get(url, HTTP_ACCEPT='application/json').json())
+
+    def test_malformed_bodies_are_rejected(self):
+        for content_type, body in (
+            ('application/json', b'{"title": '),
+            ('application/json', b'{"value": NaN}'),
+            ('application/json', b'\xff\xfe'),
+            ('application/msgpack', b'\xc1'),
+            ('application/msgpack', b'\x92\x01'),
+        ):
+            with self.subTest(content_type=content_type, body=body):
+                response = self.client.post('/api/training/sessions/', body, content_type=content_type)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('parse error', response.json()['detail'])
+        self.assertFalse(TrainingSession.objects.exists())
+
+
+class CompressionTests(APITestCase):
+    body = json.dumps([{'id': index, 'title': 'Session'} for index in range(100)]).encode()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', email='admin@example.com', is_staff=True)
+
+    def setUp(self):
+        compression_stats.reset()
+
+    def respond(self, response, path='/api/training/sessions/', accept_encoding='gzip'):
+        request = RequestFactory().get(path, HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_encoding_follows_q_values(self):
+        best = CODECS[0].name
+        for header, expected in (
+            # Equal q values go to the preferred codec; zstd is only offered when installed.
+            ('gzip, br', 'br'),
+            ('zstd, gzip, br', best),
+            ('gzip;q=1, br;q=0.5', 'gzip'),
+            ('br;q=0.2, gzip;q=0.8', 'gzip'),
+            ('*;q=0.5, gzip;q=0', best),
+            ('*, br;q=0, zstd;q=0', 'gzip'),
+            ('gzip;q=0', None),
+            ('identity', None),
+            ('', None),
+        ):
+            with self.subTest(header=header):
+                codec = negotiate(header)
+                self.assertEqual(codec and codec.name, expected)
+
+    def test_large_responses_are_compressed(self):
+        response = HttpResponse(self.body, content_type='application/json')
+        response['ETag'] = '"abc"'
+        response = self.respond(response)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.body)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(response['ETag'], 'W/"abc"')
+
+    def test_small_responses_are_sent_as_they_are(self):
+        response = self.respond(HttpResponse(b'{}', content_type='application/json'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, b'{}')
+
+    def test_vary_is_set_without_an_accepted_encoding(self):
+        response = self.respond(HttpResponse(self.body, content_type='application/json'), accept_encoding='')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_only_api_responses_are_compressed(self):
+        response = self.respond(HttpResponse(self.body, content_type='application/json'), path='/admin/')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_responses_are_compressed(self):
+        chunks = [self.body[index:index + 500] for index in range(0, len(self.body), 500)]
+        response = self.respond(StreamingHttpResponse(iter(chunks), content_type='application/x-ndjson'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        compressed = list(response.streaming_content)
+        # Flushed after every chunk rather than buffered to the end.
+        self.assertGreaterEqual(len(compressed), len(chunks))
+        self.assertEqual(gzip.decompress(b''.join(compressed)), self.body)
+
+    def test_stats_count_compressed_responses(self):
+        self.respond(HttpResponse(self.body, content_type='application/json'))
+        list(self.respond(StreamingHttpResponse(iter([self.body]))).streaming_content)
+        self.respond(HttpResponse(b'{}', content_type='application/json'))
+
+        self.client.force_authenticate(self.admin)
+        stats = self.client.get('/api/compression/stats/').json()
+        self.assertEqual(list(stats), ['gzip'])
+        self.assertEqual(stats['gzip']['responses'], 2)
+        self.assertEqual(stats['gzip']['bytes_in'], 2 * len(self.body))
+        self.assertLess(stats['gzip']['bytes_out'], stats['gzip']['bytes_in'])
+
+
+class SchemaTests(SimpleTestCase):
+    def setUp(self):
+        openapi.stored_schema.reset()
+        self.addCleanup(openapi.stored_schema.reset)
+
+    def test_serves_the_stored_schema(self):
+        response = self.client.get('/api/schema/', {'format': 'json'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], openapi.FORMATS['json'])
+        self.assertEqual(response.content, openapi.artifact_path('json').read_bytes())
+        self.assertEqual(self.client.get('/api/schema/').content, openapi.artifact_path('yaml').read_bytes())
+
+    def test_etag_revalidates(self):
+        etag = self.client.get('/api/schema/')['ETag']
+        response = self.client.get('/api/schema/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        # Each format has its own ETag.
+        response = self.client.get('/api/schema/', {'format': 'json'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_serves_the_precompressed_copy(self):
+        plain_etag = self.client.get('/api/schema/', {'format': 'json'})['ETag']
+        response = self.client.get('/api/schema/', {'format': 'json'}, HTTP_ACCEPT_ENCODING='br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(response.content, openapi.artifact_path('json', 'br').read_bytes())
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertNotEqual(response['ETag'], plain_etag)
+        response = self.client.get(
+            '/api/schema/', {'format': 'json'}, HTTP_ACCEPT_ENCODING='br', HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_stale_schema_fails_the_deploy_check(self):
+        self.assertIn(check_openapi_schema, registry.registry.get_checks(include_deployment_checks=True))
+        self.assertNotIn(check_openapi_schema, registry.registry.get_checks())
+        documents = openapi.generate(silent=True)
+        with tempfile.TemporaryDirectory() as directory, override_settings(OPENAPI_SCHEMA_DIR=directory):
+            openapi.write({'json': documents['json'], 'yaml': documents['yaml'] + b'# edited\n'})
+            self.assertEqual(openapi.stale_formats(documents), ['yaml'])
+            [error] = check_openapi_schema(None)
+            self.assertEqual(error.id, 'circus_grove.E001')
+            self.assertIn('(yaml)', error.msg)
+            openapi.write(documents)
+            self.assertEqual(check_openapi_schema(None), [])
@@ -20,23 +20,32 @@ from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularSwaggerView,
-)
+from .lazy import lazy_view
+from .views import CacheStatsView, CompressionStatsView, ExportView, ImportView, SchemaView, SearchView
 
 urlpatterns = [
     # Admin
     path('admin/', admin.site.urls),
     
-    # API Documentation
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
+    # API Documentation (drf-spectacular is only imported once the docs are requested)
+    path('api/schema/', SchemaView.as_view(), name='schema'),
+    path('api/docs/', lazy_view('drf_spectacular.views.SpectacularSwaggerView', url_name='schema'), name='swagger-ui'),
     
     # JWT Authentication
     path('api/auth/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     
+    # Operations
+    path('api/cache/stats/', CacheStatsView.as_view(), name='cache-stats'),
+    path('api/compression/stats/', CompressionStatsView.as_view(), name='compression-stats'),
+    
+    # Bulk import and export
+    path('api/import/', ImportView.as_view(), name='import'),
+    path('api/export/', ExportView.as_view(), name='export'),
+    
+    # Full-text search
+    path('api/search/', SearchView.as_view(), name='search'),
+    
     # App URLs
     path('api/users/', include('users.urls')),
     path('api/training/', include('training.urls')),
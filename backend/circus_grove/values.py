@@ -0,0 +1,212 @@
+"""
+Read-only serialization of ``.values()`` rows.
+
+DRF serializers build every row through model instances and per-field
+``get_attribute``/``to_representation`` calls. For list endpoints whose
+fields are plain columns, relations followed through foreign keys and
+queryset annotations, ``compile_values_plan`` turns a serializer into a
+``ValuesPlan``: the ``.values()`` lookups to fetch and one converter per
+field. The plan produces the same dicts, in the same field order, as the
+serializer would, so the rendered JSON is byte-for-byte identical.
+
+Serializers with any other field (method fields, nested serializers,
+``source='*'``) have no plan and are served by the serializer as before.
+A field such as ``StringRelatedField`` can still be covered by naming the
+lookup that yields its value in ``Meta.value_lookups``.
+"""
+import copy
+import decimal
+from operator import methodcaller
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import ForeignKey, OneToOneField
+from rest_framework import serializers
+from rest_framework.fields import empty
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+ISO_8601 = 'iso-8601'
+
+# Field classes whose to_representation() returns database values unchanged.
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+    serializers.ReadOnlyField,
+)
+
+# A field whose relation is missing is left out, as DRF does.
+SKIP = object()
+# Each ?fields= selection compiles its own plan.
+MAX_PLANS = 256
+
+_plans = {}
+
+
+class ValuesPlan:
+    """The lookups and per-field converters serializing ``.values()`` rows."""
+
+    def __init__(self, columns):
+        # (name, lookup, convert, guards, missing) per field.
+        self.columns = columns
+        self.lookups = list(dict.fromkeys(
+            lookup for _, main, _, guards, _ in columns for lookup in (main, *guards)
+        ))
+
+    def to_representation(self, row):
+        data = {}
+        for name, lookup, convert, guards, missing in self.columns:
+            if guards and any(row[guard] is None for guard in guards):
+                if missing is not SKIP:
+                    data[name] = missing
+                continue
+            value = row[lookup]
+            data[name] = value if value is None or convert is None else convert(value)
+        return data
+
+    def serialize(self, rows):
+        to_representation = self.to_representation
+        return [to_representation(row) for row in rows]
+
+
+def compile_values_plan(serializer):
+    """Return the ``ValuesPlan`` for the fields of ``serializer``, or ``None`` if it needs instances."""
+    fields = serializer.fields
+    key = (type(serializer), tuple(fields))
+    if key not in _plans:
+        if len(_plans) >= MAX_PLANS:
+            _plans.clear()
+        _plans[key] = _compile(serializer, fields)
+    return _plans[key]
+
+
+def _compile(serializer, fields):
+    meta = serializer.Meta
+    model = meta.model
+    value_lookups = getattr(meta, 'value_lookups', {})
+    annotations = getattr(meta, 'annotations', {})
+    columns = []
+    for name, field in fields.items():
+        if field.write_only:
+            continue
+        # Converters use an unbound copy, so the cached plan holds no request state.
+        unbound = copy.deepcopy(field)
+        if name in value_lookups:
+            columns.append((name, value_lookups[name], unbound.to_representation, (), None))
+            continue
+        convert = _converter(unbound)
+        if convert is False or field.source == '*':
+            return None
+        if field.source in annotations:
+            columns.append((name, field.source, convert, (), None))
+            continue
+        path = _lookup_path(model, field.source_attrs)
+        if path is None:
+            return None
+        lookup, guards, is_relation = path
+        if is_relation != isinstance(field, serializers.PrimaryKeyRelatedField):
+            return None
+        if is_relation and field.pk_field is not None:
+            return None
+        missing = None
+        if guards:
+            if field.default is not empty or field.required:
+                return None
+            missing = None if field.allow_null else SKIP
+        columns.append((name, lookup, convert, guards, missing))
+    return ValuesPlan(columns)
+
+
+def _converter(field):
+    """``None`` for values passed through, a callable, or ``False`` if the field is not supported."""
+    if type(field) in PASSTHROUGH_FIELDS or type(field) is serializers.PrimaryKeyRelatedField:
+        return None
+    if type(field) is serializers.FloatField:
+        return float
+    if type(field) is serializers.DecimalField:
+        return _decimal_converter(field)
+    if type(field) is serializers.DateField:
+        if getattr(field, 'format', api_settings.DATE_FORMAT) == ISO_8601:
+            return methodcaller('isoformat')
+        return field.to_representation
+    if type(field) in (serializers.DateTimeField, serializers.TimeField):
+        return field.to_representation
+    return False
+
+
+def _decimal_converter(field):
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if not coerce_to_string or field.localize or field.decimal_places is None:
+        return field.to_representation
+    places = field.decimal_places
+
+    def convert(value):
+        # Database values already have the column's scale, which makes
+        # DRF's quantize() a no-op; anything else takes the slow path.
+        if isinstance(value, decimal.Decimal):
+            text = format(value, 'f')
+            dot = text.find('.')
+            if (dot == -1 and places == 0) or (dot != -1 and len(text) - dot - 1 == places):
+                return text
+        return field.to_representation(value)
+
+    return convert
+
+
+def _lookup_path(model, attrs):
+    """
+    The ``.values()`` lookup for a dotted ``source``, the lookups of the
+    nullable foreign keys it goes through and whether it ends on a relation,
+    or ``None`` if it is not a column.
+    """
+    parts, guards = [], []
+    for position, attr in enumerate(attrs):
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        if not model_field.concrete:
+            return None
+        parts.append(attr)
+        last = position == len(attrs) - 1
+        if model_field.is_relation:
+            if not isinstance(model_field, (ForeignKey, OneToOneField)):
+                return None
+            if last:
+                # ``.values()`` gives the related id.
+                return '__'.join(parts), tuple(guards), True
+            if model_field.null:
+                guards.append('__'.join(parts))
+            model = model_field.related_model
+        elif not last:
+            return None
+    return '__'.join(parts), tuple(guards), False
+
+
+class ValuesListMixin:
+    """
+    View mixin serving ``list()`` from ``.values()`` rows through a ``ValuesPlan``.
+
+    Falls back to the serializer when its fields have no plan. Set
+    ``use_values_plan = False`` to always use the serializer.
+    """
+    use_values_plan = True
+
+    def list(self, request, *args, **kwargs):
+        plan = compile_values_plan(self.get_serializer()) if self.use_values_plan else None
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        lookups = list(plan.lookups)
+        if hasattr(self.paginator, 'get_ordering'):
+            # Keyset cursors are built from the ordering columns of the last row.
+            ordering = [field.lstrip('-') for field in self.paginator.get_ordering(queryset, self)]
+            lookups += [field for field in ordering if field not in lookups]
+        rows = queryset.values(*lookups)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(plan.serialize(page))
+        return Response(plan.serialize(rows))
@@ -0,0 +1,177 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+from django.views import View
+from rest_framework import generics, permissions
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import exports, search
+from .asynchronous import streaming_content
+from .cache import document_caches
+from .clients import get_client
+from .compression import compression_stats, negotiate
+from .imports import FORMATS, get_importer, guess_format, read_records
+from .openapi import FORMATS as SCHEMA_FORMATS, stored_schema
+from .pagination import SearchPagination
+from .parsers import CSVStreamParser, NDJSONStreamParser
+from .serializers import SearchResultSerializer
+
+User = get_user_model()
+
+
+class CacheStatsView(APIView):
+    """View for hit/miss counters of the document caches (admin only)."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({name: cache.stats() for name, cache in sorted(document_caches.items())})
+
+
+class CompressionStatsView(APIView):
+    """View for the response compression totals of this process (admin only)."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(compression_stats.snapshot())
+
+
+class SchemaView(View):
+    """
+    View serving the stored OpenAPI schema (see ``circus_grove.openapi``).
+
+    Negotiates like drf-spectacular's schema view: YAML unless ``?format=json``
+    or an ``Accept`` header asking for JSON.
+    """
+
+    def get(self, request):
+        fmt = request.GET.get('format')
+        if fmt not in SCHEMA_FORMATS:
+            fmt = 'json' if 'json' in request.META.get('HTTP_ACCEPT', '') else 'yaml'
+        codec = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        version, variants = stored_schema.get()
+
+        media_type = SCHEMA_FORMATS[fmt]
+        response = HttpResponse(
+            variants[fmt, codec and codec.name],
+            content_type=media_type if fmt == 'json' else f'{media_type}; charset=utf-8',
+        )
+        title = settings.SPECTACULAR_SETTINGS.get('TITLE') or 'schema'
+        response['Content-Disposition'] = f'inline; filename="{title}.{fmt}"'
+        if codec is not None:
+            response['Content-Encoding'] = codec.name
+        patch_cache_control(response, public=True, no_cache=True)
+        patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+        etag = quote_etag('-'.join(filter(None, (version, fmt, codec and codec.name))))
+        response['ETag'] = etag
+        return get_conditional_response(request, etag=etag, response=response)
+
+
+class ImportView(APIView):
+    """View for streaming bulk imports of historical check-ins, meals and sessions."""
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [CSVStreamParser, NDJSONStreamParser, MultiPartParser]
+
+    def post(self, request):
+        params = request.query_params
+        user = request.user
+        if 'user' in params and user.user_type == 'coach':
+            # Coaches can import their clients' history
+            user = get_client(request, params['user'])
+
+        try:
+            importer = get_importer(params.get('type', ''), user)
+        except ValueError as exc:
+            raise ValidationError({'type': str(exc)})
+
+        if 'stream' in request.data:
+            stream, fmt = request.data['stream'], request.data['format']
+        elif 'file' in request.FILES:
+            stream = request.FILES['file']
+            # Not "format", which DRF reserves for picking a renderer.
+            fmt = params.get('file_format') or guess_format(stream.name)
+        else:
+            raise ValidationError('Send a text/csv or application/x-ndjson body, or a multipart "file".')
+
+        if fmt not in FORMATS:
+            raise ValidationError({'file_format': f"Must be one of: {', '.join(FORMATS)}."})
+        try:
+            result = importer.run(read_records(stream, fmt))
+        except UnicodeDecodeError:
+            # Batches before the bad byte are already written.
+            raise ValidationError('Uploads must be UTF-8 encoded.')
+        return Response(result.as_dict())
+
+
+class ExportView(APIView):
+    """View streaming a full-account export as NDJSON, CSV or ZIP."""
+    permission_classes = [permissions.IsAuthenticated]
+    content_types = {
+        'ndjson': 'application/x-ndjson',
+        'csv': 'text/csv',
+        'zip': 'application/zip',
+    }
+
+    def get(self, request):
+        params = request.query_params
+        # Not "format", which DRF reserves for picking a renderer.
+        fmt = params.get('file_format', 'ndjson')
+        if fmt not in exports.FORMATS:
+            raise ValidationError({'file_format': f"Must be one of: {', '.join(exports.FORMATS)}."})
+        table = params.get('table')
+        if fmt == 'csv' and table not in exports.TABLE_NAMES:
+            raise ValidationError({'table': f"CSV exports one table: {', '.join(exports.TABLE_NAMES)}."})
+
+        clients = params.get('user')
+        if clients is not None and request.user.user_type != 'coach':
+            raise ValidationError({'user': 'Only coaches can export other users.'})
+        if clients not in (None, 'all'):
+            # Coaches can export one client
+            clients = get_client(request, clients).pk
+        users = exports.export_users(request.user, clients)
+
+        response = StreamingHttpResponse(
+            streaming_content(request, exports.stream_export(users, fmt, table)),
+            content_type=self.content_types[fmt],
+        )
+        name = f"circus-grove-export-{timezone.localdate().isoformat()}{f'-{table}' if fmt == 'csv' else ''}.{fmt}"
+        response['Content-Disposition'] = f'attachment; filename="{name}"'
+        return response
+
+
+class SearchView(generics.GenericAPIView):
+    """View for full-text search across sessions, meals, foods, check-ins and plans."""
+    serializer_class = SearchResultSerializer
+    pagination_class = SearchPagination
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        params = request.query_params
+        query = params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'This parameter is required.'})
+        types = [name.strip() for name in params.get('type', '').split(',') if name.strip()]
+        unknown = [name for name in types if name not in search.TYPES]
+        if unknown:
+            raise ValidationError({'type': f"Must be among: {', '.join(search.TYPES)}."})
+
+        user = request.user
+        if user.user_type == 'coach':
+            # Coaches search all their clients, optionally one of them
+            users = User.objects.filter(coach=user)
+            if 'user' in params:
+                users = users.filter(pk=get_client(request, params['user']).pk)
+            user_ids = list(users.values_list('pk', flat=True))
+        else:
+            user_ids = [user.pk]
+
+        def find(**keyset):
+            return search.find(query, user_ids, types, **keyset)
+
+        page = self.paginator.paginate_search(find, search.load, request)
+        return self.paginator.get_paginated_response(self.get_serializer(page, many=True).data)
@@ -0,0 +1,126 @@
+"""
+Nutrition plan adherence rollups.
+
+Logged meals are matched to the plan's meal slots by ``meal_type`` (the
+slot closest to the logged time wins when a plan has several slots of the
+same type) and aggregated per day and slot in the database. The results
+are stored in ``NutritionAdherence`` and refreshed incrementally from the
+signals in ``nutrition.signals``.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Avg, Count, DecimalField, Exists, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Abs, Coalesce, ExtractHour, ExtractMinute
+
+from .models import Food, Meal, NutritionAdherence, NutritionPlan, NutritionPlanMeal
+
+MACRO_FIELDS = ('protein_g', 'carbs_g', 'fat_g')
+
+
+def _minutes(expression):
+    """Minutes since midnight for a time column or expression."""
+    return ExtractHour(expression) * 60 + ExtractMinute(expression)
+
+
+def _food_total(field):
+    """Sum of a food macro for the outer meal, used when the meal leaves it blank."""
+    foods = (
+        Food.objects.filter(meal=OuterRef('pk'))
+        .order_by()
+        .values('meal')
+        .annotate(total=Sum(field))
+        .values('total')
+    )
+    return Subquery(foods, output_field=DecimalField(max_digits=8, decimal_places=2))
+
+
+def slot_totals(meals):
+    """
+    Aggregate ``meals`` per date and matched plan slot in a single query.
+
+    Meals are joined to the plan slots of their ``meal_type``; a NOT EXISTS
+    filter drops every pairing for which a closer slot (by scheduled time,
+    then ``order``) exists, so each meal counts towards exactly one slot.
+    Meals whose ``meal_type`` has no slot in the plan are left out.
+    """
+    slot = 'nutrition_plan__meals'
+    meal_minutes = _minutes('time')
+
+    def distance(slot_minutes, logged_minutes):
+        return Coalesce(Abs(slot_minutes - logged_minutes), 0)
+
+    own_distance = distance(_minutes(OuterRef(f'{slot}__scheduled_time')), _minutes(OuterRef('time')))
+    closer_slots = (
+        NutritionPlanMeal.objects.filter(plan=OuterRef('nutrition_plan'), meal_type=OuterRef('meal_type'))
+        .annotate(distance=distance(_minutes('scheduled_time'), _minutes(OuterRef('time'))))
+        .filter(
+            Q(distance__lt=own_distance)
+            | Q(distance=own_distance, order__lt=OuterRef(f'{slot}__order'))
+            | Q(distance=own_distance, order=OuterRef(f'{slot}__order'), id__lt=OuterRef(f'{slot}__id'))
+        )
+    )
+    zero = Value(Decimal('0'), output_field=DecimalField(max_digits=8, decimal_places=2))
+    return (
+        # One filter() call so the slot join is shared by every condition.
+        meals.filter(~Exists(closer_slots), **{f'{slot}__meal_type': F('meal_type')})
+        .order_by()
+        .values('date', slot_id=F(f'{slot}__id'))
+        .annotate(
+            meal_count=Count('id'),
+            total_calories=Sum('calories'),
+            timing=Avg(Abs(meal_minutes - _minutes(f'{slot}__scheduled_time'))),
+            **{
+                f'total_{field}': Coalesce(Sum(Coalesce(field, _food_total(field))), zero)
+                for field in MACRO_FIELDS
+            },
+        )
+    )
+
+
+@transaction.atomic
+def refresh_adherence(plan_id, dates=None):
+    """
+    Rebuild the adherence rows of a plan, optionally only for ``dates``.
+
+    Every slot of the plan gets a row for each day with at least one matched
+    meal, so missed slots show up with ``meal_count`` 0.
+
+    Refreshes of the same plan take turns on a lock of its row, so each
+    reads the meals committed before it and none inserts a row another is
+    inserting.
+    """
+    if NutritionPlan.objects.select_for_update().filter(pk=plan_id).values('pk').first() is None:
+        return
+    meals = Meal.objects.filter(nutrition_plan_id=plan_id)
+    if dates is not None:
+        meals = meals.filter(date__in=dates)
+    totals = {(row['date'], row['slot_id']): row for row in slot_totals(meals)}
+    slot_ids = list(NutritionPlanMeal.objects.filter(plan_id=plan_id).values_list('id', flat=True))
+
+    rows = []
+    for day in sorted({day for day, _ in totals}):
+        for slot_id in slot_ids:
+            row = totals.get((day, slot_id))
+            rollup = NutritionAdherence(plan_id=plan_id, plan_meal_id=slot_id, date=day)
+            if row is not None:
+                rollup.meal_count = row['meal_count']
+                rollup.calories = row['total_calories']
+                for field in MACRO_FIELDS:
+                    setattr(rollup, field, row[f'total_{field}'])
+                if row['timing'] is not None:
+                    rollup.timing_deviation_minutes = round(row['timing'])
+            rows.append(rollup)
+
+    stale = NutritionAdherence.objects.filter(plan_id=plan_id)
+    if dates is not None:
+        stale = stale.filter(date__in=dates)
+    stale.delete()
+    NutritionAdherence.objects.bulk_create(rows)
+
+
+def schedule_refresh(plan_id, dates=None):
+    """Refresh a plan's rollups once the current transaction commits."""
+    if plan_id is None:
+        return
+    transaction.on_commit(lambda: refresh_adherence(plan_id, dates))
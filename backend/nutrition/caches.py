@@ -0,0 +1,4 @@
+from circus_grove.cache import DocumentCache
+
+# Serialized NutritionPlanSerializer documents, bumped from nutrition.signals.
+nutrition_plan_cache = DocumentCache('nutrition-plans')
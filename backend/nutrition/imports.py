@@ -0,0 +1,45 @@
+from collections import defaultdict
+
+from rest_framework import serializers
+
+from circus_grove.imports import Importer
+from .adherence import schedule_refresh
+from .models import Food, Meal, NutritionPlan
+from .serializers import MealCreateSerializer
+
+
+class MealImportSerializer(MealCreateSerializer):
+    """Meal row of an import; the plan is checked against the importing user's plans."""
+    nutrition_plan = serializers.IntegerField(source='nutrition_plan_id', required=False, allow_null=True)
+
+    def validate_nutrition_plan(self, value):
+        if value is not None and value not in self.context['plan_ids']:
+            raise serializers.ValidationError('Unknown nutrition plan.')
+        return value
+
+
+class MealImporter(Importer):
+    """Inserts meals with their foods (NDJSON only) and refreshes the affected adherence rollups."""
+    serializer_class = MealImportSerializer
+
+    def __init__(self, user):
+        super().__init__(user)
+        self.plan_ids = set(NutritionPlan.objects.filter(user=user).values_list('id', flat=True))
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'plan_ids': self.plan_ids}
+
+    def write(self, rows):
+        rows = [dict(row) for row in rows]
+        foods = [row.pop('foods', []) for row in rows]
+        meals = Meal.objects.bulk_create([Meal(user=self.user, **row) for row in rows])
+        Food.objects.bulk_create(
+            Food(meal=meal, **food) for meal, meal_foods in zip(meals, foods) for food in meal_foods
+        )
+
+        dates = defaultdict(set)
+        for meal in meals:
+            if meal.nutrition_plan_id is not None:
+                dates[meal.nutrition_plan_id].add(meal.date)
+        for plan_id, plan_dates in dates.items():
+            schedule_refresh(plan_id, sorted(plan_dates))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from nutrition.adherence import refresh_adherence
+from nutrition.models import NutritionPlan
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the nutrition plan adherence rollups from logged meals.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('plan_ids', nargs='*', type=int, help='Only rebuild these plans.')
+
+    def handle(self, *args, **options):
+        plans = NutritionPlan.objects.order_by('id')
+        if options['plan_ids']:
+            plans = plans.filter(id__in=options['plan_ids'])
+        count = 0
+        for plan_id in plans.values_list('id', flat=True).iterator():
+            refresh_adherence(plan_id)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt adherence for {count} nutrition plan(s).'))
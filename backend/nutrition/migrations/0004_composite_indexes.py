@@ -0,0 +1,35 @@
+# Generated by Django 5.0 on 2026-10-18 09:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+from circus_grove.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('nutrition', '0003_alter_meal_meal_type_nutritionplan_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='meal',
+            index=models.Index(fields=['user', '-date', '-created_at'], name='meal_user_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='nutritionplan',
+            index=models.Index(fields=['coach', '-created_at'], name='nutrition_plan_coach_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='nutritionplan',
+            index=models.Index(fields=['user', '-created_at'], name='nutrition_plan_user_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='nutritionplanmeal',
+            index=models.Index(fields=['plan', 'scheduled_time', 'order'], name='plan_meal_schedule_idx'),
+        ),
+    ]
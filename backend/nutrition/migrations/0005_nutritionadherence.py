@@ -0,0 +1,36 @@
+# Generated by Django 5.0 on 2026-10-18 09:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nutrition', '0004_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NutritionAdherence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('meal_count', models.PositiveIntegerField(default=0)),
+                ('calories', models.PositiveIntegerField(default=0)),
+                ('protein_g', models.DecimalField(decimal_places=2, default=0, max_digits=8)),
+                ('carbs_g', models.DecimalField(decimal_places=2, default=0, max_digits=8)),
+                ('fat_g', models.DecimalField(decimal_places=2, default=0, max_digits=8)),
+                ('timing_deviation_minutes', models.PositiveIntegerField(blank=True, help_text="Average absolute deviation of logged meal times from the slot's scheduled time", null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('plan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='adherence', to='nutrition.nutritionplan')),
+                ('plan_meal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='adherence', to='nutrition.nutritionplanmeal')),
+            ],
+            options={
+                'db_table': 'nutrition_adherence',
+                'ordering': ['date', 'plan_meal__scheduled_time', 'plan_meal__order'],
+                'indexes': [models.Index(fields=['plan', 'date'], name='nutrition_adherence_plan_idx')],
+                'unique_together': {('plan_meal', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 14:20
+
+from django.db import migrations
+
+from circus_grove.operations import AddFullTextSearch
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nutrition', '0005_nutritionadherence'),
+    ]
+
+    operations = [
+        AddFullTextSearch('meals', 3, title='name', body=('notes',)),
+        AddFullTextSearch('foods', 4, title='name', body=('quantity',), owner='meal_id', owner_table='meals'),
+        AddFullTextSearch('nutrition_plans', 5, title='name', body=('description',)),
+    ]
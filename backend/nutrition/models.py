@@ -33,6 +33,10 @@ class NutritionPlan(models.Model):
         db_table = 'nutrition_plans'
         ordering = ['-created_at']
         unique_together = [['user', 'name']]
+        indexes = [
+            models.Index(fields=['coach', '-created_at'], name='nutrition_plan_coach_idx'),
+            models.Index(fields=['user', '-created_at'], name='nutrition_plan_user_idx'),
+        ]
 
     def clean(self):
         """Validate that coach is actually a coach and user is a normal user."""
@@ -81,6 +85,9 @@ class NutritionPlanMeal(models.Model):
         db_table = 'nutrition_plan_meals'
         ordering = ['scheduled_time', 'order', 'id']
         unique_together = [['plan', 'meal_type', 'scheduled_time']]
+        indexes = [
+            models.Index(fields=['plan', 'scheduled_time', 'order'], name='plan_meal_schedule_idx'),
+        ]
 
     def __str__(self):
         return f"{self.get_meal_type_display()} - {self.scheduled_time} ({self.plan.name})"
@@ -120,6 +127,9 @@ class Meal(models.Model):
     class Meta:
         db_table = 'meals'
         ordering = ['-date', '-created_at']
+        indexes = [
+            models.Index(fields=['user', '-date', '-created_at'], name='meal_user_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.date}"
@@ -142,3 +152,31 @@ class Food(models.Model):
     def __str__(self):
         return f"{self.name} - {self.quantity}"
 
+
+class NutritionAdherence(models.Model):
+    """Per-day, per-slot rollup of logged meals against a nutrition plan meal slot."""
+    plan = models.ForeignKey(NutritionPlan, on_delete=models.CASCADE, related_name='adherence')
+    plan_meal = models.ForeignKey(NutritionPlanMeal, on_delete=models.CASCADE, related_name='adherence')
+    date = models.DateField()
+    meal_count = models.PositiveIntegerField(default=0)
+    calories = models.PositiveIntegerField(default=0)
+    protein_g = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    carbs_g = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    fat_g = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    timing_deviation_minutes = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        help_text="Average absolute deviation of logged meal times from the slot's scheduled time"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'nutrition_adherence'
+        ordering = ['date', 'plan_meal__scheduled_time', 'plan_meal__order']
+        unique_together = [['plan_meal', 'date']]
+        indexes = [
+            models.Index(fields=['plan', 'date'], name='nutrition_adherence_plan_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.plan_meal} - {self.date}"
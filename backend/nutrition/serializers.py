@@ -1,8 +1,12 @@
+from django.db import transaction
+from django.db.models.functions import Substr
 from rest_framework import serializers
-from .models import Meal, Food, NutritionPlan, NutritionPlanMeal
+from circus_grove.prefetch import child_count
+from circus_grove.serializers import SparseFieldsMixin
+from .models import Meal, Food, NutritionPlan, NutritionPlanMeal, NutritionAdherence
 
 
-class FoodSerializer(serializers.ModelSerializer):
+class FoodSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for Food model."""
     
     class Meta:
@@ -10,7 +14,7 @@ class FoodSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'quantity', 'calories', 'protein_g', 'carbs_g', 'fat_g']
 
 
-class MealSerializer(serializers.ModelSerializer):
+class MealSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for Meal model."""
     foods = FoodSerializer(many=True, read_only=True)
     user = serializers.StringRelatedField(read_only=True)
@@ -24,6 +28,28 @@ class MealSerializer(serializers.ModelSerializer):
             'notes', 'foods', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'user', 'created_at', 'updated_at']
+        select_related = ['user', 'nutrition_plan']
+        prefetch_related = ['foods']
+        expandable_fields = ['foods']
+
+
+class MealListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Serializer for meal lists: food count instead of foods, no notes."""
+    user = serializers.StringRelatedField(read_only=True)
+    nutrition_plan_name = serializers.CharField(source='nutrition_plan.name', read_only=True)
+    food_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Meal
+        fields = [
+            'id', 'user', 'nutrition_plan', 'nutrition_plan_name', 'name', 'meal_type', 'date', 'time',
+            'calories', 'protein_g', 'carbs_g', 'fat_g', 'food_count', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+        select_related = ['user', 'nutrition_plan']
+        annotations = {'food_count': child_count(Food, 'meal')}
+        defer = ['notes', 'user__bio', 'nutrition_plan__description']
+        value_lookups = {'user': 'user__username'}
 
 
 class MealCreateSerializer(serializers.ModelSerializer):
@@ -38,17 +64,15 @@ class MealCreateSerializer(serializers.ModelSerializer):
             'notes', 'foods'
         ]
 
+    @transaction.atomic
     def create(self, validated_data):
         foods_data = validated_data.pop('foods', [])
         meal = Meal.objects.create(**validated_data)
-        
-        for food_data in foods_data:
-            Food.objects.create(meal=meal, **food_data)
-        
+        Food.objects.bulk_create(Food(meal=meal, **food_data) for food_data in foods_data)
         return meal
 
 
-class NutritionPlanMealSerializer(serializers.ModelSerializer):
+class NutritionPlanMealSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for NutritionPlanMeal model."""
     meal_type_display = serializers.CharField(source='get_meal_type_display', read_only=True)
     
@@ -63,7 +87,7 @@ class NutritionPlanMealSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class NutritionPlanSerializer(serializers.ModelSerializer):
+class NutritionPlanSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for NutritionPlan model."""
     meals = NutritionPlanMealSerializer(many=True, read_only=True)
     coach_username = serializers.CharField(source='coach.username', read_only=True)
@@ -78,6 +102,33 @@ class NutritionPlanSerializer(serializers.ModelSerializer):
             'is_active', 'meals', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'coach', 'created_at', 'updated_at']
+        select_related = ['coach', 'user']
+        prefetch_related = ['meals']
+        expandable_fields = ['meals']
+
+
+class NutritionPlanListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Serializer for nutrition plan lists: meal count instead of meals, description preview."""
+    coach_username = serializers.CharField(source='coach.username', read_only=True)
+    user_username = serializers.CharField(source='user.username', read_only=True)
+    description_preview = serializers.CharField(read_only=True)
+    meal_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = NutritionPlan
+        fields = [
+            'id', 'coach', 'coach_username', 'user', 'user_username',
+            'name', 'description_preview', 'target_calories', 'target_protein_g',
+            'target_carbs_g', 'target_fat_g', 'start_date', 'end_date',
+            'is_active', 'meal_count', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+        select_related = ['coach', 'user']
+        annotations = {
+            'description_preview': Substr('description', 1, 200),
+            'meal_count': child_count(NutritionPlanMeal, 'plan'),
+        }
+        defer = ['description', 'coach__bio', 'user__bio']
 
 
 class NutritionPlanCreateSerializer(serializers.ModelSerializer):
@@ -92,13 +143,92 @@ class NutritionPlanCreateSerializer(serializers.ModelSerializer):
             'is_active', 'meals'
         ]
 
+    def validate_meals(self, value):
+        """Reject duplicate slots up front instead of failing mid-insert."""
+        seen = set()
+        for meal_data in value:
+            slot = (meal_data['meal_type'], meal_data['scheduled_time'])
+            if slot in seen:
+                raise serializers.ValidationError(
+                    "Each meal_type and scheduled_time combination must be unique within a plan."
+                )
+            seen.add(slot)
+        return value
+
+    @transaction.atomic
     def create(self, validated_data):
         meals_data = validated_data.pop('meals', [])
         # Set coach from request user
         validated_data['coach'] = self.context['request'].user
         plan = NutritionPlan.objects.create(**validated_data)
-        
-        for meal_data in meals_data:
-            NutritionPlanMeal.objects.create(plan=plan, **meal_data)
-        
+        NutritionPlanMeal.objects.bulk_create(
+            NutritionPlanMeal(plan=plan, **meal_data) for meal_data in meals_data
+        )
         return plan
+
+
+class NutritionAdherenceSerializer(serializers.ModelSerializer):
+    """Serializer for a day's adherence to one nutrition plan meal slot."""
+    meal_type = serializers.CharField(source='plan_meal.meal_type', read_only=True)
+    scheduled_time = serializers.TimeField(source='plan_meal.scheduled_time', read_only=True)
+    target_calories = serializers.IntegerField(source='plan_meal.target_calories', read_only=True)
+    target_protein_g = serializers.DecimalField(
+        source='plan_meal.target_protein_g', max_digits=6, decimal_places=2, read_only=True
+    )
+    target_carbs_g = serializers.DecimalField(
+        source='plan_meal.target_carbs_g', max_digits=6, decimal_places=2, read_only=True
+    )
+    target_fat_g = serializers.DecimalField(
+        source='plan_meal.target_fat_g', max_digits=6, decimal_places=2, read_only=True
+    )
+    calories_pct = serializers.SerializerMethodField()
+    protein_pct = serializers.SerializerMethodField()
+    carbs_pct = serializers.SerializerMethodField()
+    fat_pct = serializers.SerializerMethodField()
+
+    class Meta:
+        model = NutritionAdherence
+        fields = [
+            'plan_meal', 'meal_type', 'scheduled_time', 'meal_count',
+            'calories', 'target_calories', 'calories_pct',
+            'protein_g', 'target_protein_g', 'protein_pct',
+            'carbs_g', 'target_carbs_g', 'carbs_pct',
+            'fat_g', 'target_fat_g', 'fat_pct',
+            'timing_deviation_minutes'
+        ]
+        read_only_fields = fields
+        select_related = ['plan_meal']
+
+    @staticmethod
+    def _pct(actual, target):
+        if not target:
+            return None
+        return round(float(actual) / float(target) * 100, 1)
+
+    def get_calories_pct(self, obj):
+        return self._pct(obj.calories, obj.plan_meal.target_calories)
+
+    def get_protein_pct(self, obj):
+        return self._pct(obj.protein_g, obj.plan_meal.target_protein_g)
+
+    def get_carbs_pct(self, obj):
+        return self._pct(obj.carbs_g, obj.plan_meal.target_carbs_g)
+
+    def get_fat_pct(self, obj):
+        return self._pct(obj.fat_g, obj.plan_meal.target_fat_g)
+
+
+class NutritionAdherenceDaySerializer(serializers.Serializer):
+    """Serializer for one day of nutrition plan adherence with its slot rows."""
+    date = serializers.DateField()
+    meal_count = serializers.IntegerField()
+    calories = serializers.IntegerField()
+    target_calories = serializers.IntegerField(source='plan.target_calories')
+    protein_g = serializers.DecimalField(max_digits=8, decimal_places=2)
+    target_protein_g = serializers.DecimalField(source='plan.target_protein_g', max_digits=6, decimal_places=2)
+    carbs_g = serializers.DecimalField(max_digits=8, decimal_places=2)
+    target_carbs_g = serializers.DecimalField(source='plan.target_carbs_g', max_digits=6, decimal_places=2)
+    fat_g = serializers.DecimalField(max_digits=8, decimal_places=2)
+    target_fat_g = serializers.DecimalField(source='plan.target_fat_g', max_digits=6, decimal_places=2)
+    slots = NutritionAdherenceSerializer(many=True)
+
@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .adherence import schedule_refresh
+from .caches import nutrition_plan_cache
+from .models import Food, Meal, NutritionPlan, NutritionPlanMeal
+
+User = get_user_model()
+
+
+@receiver(post_init, sender=Meal)
+def remember_meal_adherence_key(sender, instance, **kwargs):
+    """Keep the loaded plan and date so a move refreshes the old day too."""
+    # Read __dict__ directly so deferred fields are not fetched.
+    instance._adherence_key = (instance.__dict__.get('nutrition_plan_id'), instance.__dict__.get('date'))
+
+
+@receiver(post_save, sender=Meal)
+@receiver(post_delete, sender=Meal)
+def refresh_meal_adherence(sender, instance, **kwargs):
+    old_plan_id, old_date = getattr(instance, '_adherence_key', (None, None))
+    if (old_plan_id, old_date) != (instance.nutrition_plan_id, instance.date):
+        schedule_refresh(old_plan_id, [old_date])
+    schedule_refresh(instance.nutrition_plan_id, [instance.date])
+    instance._adherence_key = (instance.nutrition_plan_id, instance.date)
+
+
+@receiver(post_save, sender=Food)
+@receiver(post_delete, sender=Food)
+def refresh_food_adherence(sender, instance, **kwargs):
+    meal = Meal.objects.filter(pk=instance.meal_id).values('nutrition_plan_id', 'date').first()
+    if meal is not None:
+        schedule_refresh(meal['nutrition_plan_id'], [meal['date']])
+
+
+@receiver(post_save, sender=NutritionPlanMeal)
+@receiver(post_delete, sender=NutritionPlanMeal)
+def refresh_plan_adherence(sender, instance, **kwargs):
+    # A slot change can move meals between slots on any day of the plan.
+    schedule_refresh(instance.plan_id)
+
+
+@receiver(post_save, sender=Food)
+@receiver(post_delete, sender=Food)
+def touch_meal(sender, instance, **kwargs):
+    """Bump the meal's ``updated_at`` so its ETag changes with its foods."""
+    Meal.objects.filter(pk=instance.meal_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=NutritionPlanMeal)
+@receiver(post_delete, sender=NutritionPlanMeal)
+def touch_plan(sender, instance, **kwargs):
+    """Bump the plan's ``updated_at`` so its ETag changes with its meal slots."""
+    NutritionPlan.objects.filter(pk=instance.plan_id).update(updated_at=timezone.now())
+    nutrition_plan_cache.bump(instance.plan_id)
+
+
+@receiver(post_save, sender=NutritionPlan)
+@receiver(post_delete, sender=NutritionPlan)
+def invalidate_plan(sender, instance, **kwargs):
+    nutrition_plan_cache.bump(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_plans(sender, instance, created, update_fields=None, **kwargs):
+    """Plan documents embed coach and client usernames."""
+    if created or (update_fields is not None and 'username' not in update_fields):
+        return
+    plans = NutritionPlan.objects.filter(Q(coach=instance) | Q(user=instance)).values_list('pk', flat=True)
+    for plan_id in plans:
+        nutrition_plan_cache.bump(plan_id)
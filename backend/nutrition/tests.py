@@ -1,3 +1,267 @@
-from django.test import TestCase
+from datetime import date, time
+from decimal import Decimal
+from types import SimpleNamespace
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from circus_grove.testing import QueryCountAssertions, QueryPlanAssertions
+
+from .adherence import refresh_adherence
+from .models import Food, Meal, NutritionAdherence, NutritionPlan, NutritionPlanMeal
+from .serializers import NutritionPlanCreateSerializer
+
+User = get_user_model()
+
+
+class ListIndexTests(QueryPlanAssertions, APITestCase):
+    """The list endpoints read their pages in order from the composite indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.coach = User.objects.create_user(username='coach', email='coach@example.com', user_type='coach')
+        cls.client_user = User.objects.create_user(username='client', email='client@example.com', coach=cls.coach)
+        plan = NutritionPlan.objects.create(
+            coach=cls.coach, user=cls.client_user, name='Phase', start_date=date(2024, 1, 1), target_calories=2200,
+            target_protein_g=Decimal('160.00'), target_carbs_g=Decimal('220.00'), target_fat_g=Decimal('70.00'),
+        )
+        meal = Meal.objects.create(
+            user=cls.client_user, nutrition_plan=plan, name='Lunch', meal_type='lunch', date=date(2024, 1, 1),
+            calories=700,
+        )
+        meal.foods.create(name='Rice', quantity='100 g', calories=130)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_meal_list(self):
+        self.client.force_authenticate(self.client_user)
+        self.assertListIndexScan('meal_user_idx', '/api/nutrition/meals/')
+
+    def test_plan_list(self):
+        self.client.force_authenticate(self.client_user)
+        self.assertListIndexScan('nutrition_plan_user_idx', '/api/nutrition/plans/')
+        self.client.force_authenticate(self.coach)
+        self.assertListIndexScan('nutrition_plan_coach_idx', '/api/nutrition/plans/')
+
+
+class QueryCountTests(QueryCountAssertions, APITestCase):
+    """Lists and details take the same number of queries however many rows and children they hold."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.coach = User.objects.create_user(username='coach', email='coach@example.com', user_type='coach')
+        cls.user = User.objects.create_user(username='client', email='client@example.com', coach=cls.coach)
+        for day in range(1, 4):
+            plan = NutritionPlan.objects.create(
+                coach=cls.coach, user=cls.user, name=f'Phase {day}', start_date=date(2024, 1, day),
+                target_calories=2200, target_protein_g=Decimal('160.00'), target_carbs_g=Decimal('220.00'),
+                target_fat_g=Decimal('70.00'),
+            )
+            meal = Meal.objects.create(
+                user=cls.user, nutrition_plan=plan, name=f'Lunch {day}', meal_type='lunch', date=date(2024, 1, day),
+                calories=700,
+            )
+            for hour, meal_type in enumerate(('breakfast', 'lunch', 'dinner'), start=8):
+                plan.meals.create(meal_type=meal_type, scheduled_time=time(hour), target_calories=600)
+                meal.foods.create(name=f'Food {hour}', quantity='100 g', calories=200)
+        cls.plan, cls.meal = plan, meal
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def test_meal_list(self):
+        # The ETag validator, the page count and the page.
+        self.assertGetQueries(3, '/api/nutrition/meals/')
+
+    def test_meal_detail(self):
+        # The validator, the meal with its user and plan, and its foods.
+        self.assertGetQueries(3, f'/api/nutrition/meals/{self.meal.pk}/')
+
+    def test_plan_list(self):
+        self.assertGetQueries(3, '/api/nutrition/plans/')
+        self.client.force_authenticate(self.coach)
+        self.assertGetQueries(3, '/api/nutrition/plans/')
+
+    def test_plan_detail(self):
+        self.client.force_authenticate(self.coach)
+        # Plan documents are cached (see nutrition.caches), so only the first GET reads the plan.
+        with self.assertNumQueries(4):
+            self.client.get(f'/api/nutrition/plans/{self.plan.pk}/')
+        self.assertGetQueries(2, f'/api/nutrition/plans/{self.plan.pk}/')
+
+
+class NestedCreateTests(APITestCase):
+    """Meals and plans are written with their children in one transaction and one insert per table."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.coach = User.objects.create_user(username='coach', email='coach@example.com', user_type='coach')
+        cls.user = User.objects.create_user(username='client', email='client@example.com', coach=cls.coach)
+
+    def meal(self, foods):
+        return {'name': 'Lunch', 'meal_type': 'lunch', 'date': '2024-01-01', 'calories': 700, 'foods': foods}
+
+    def plan(self, meals, name='Cut'):
+        return {
+            'user': self.user.pk, 'name': name, 'target_calories': 2000, 'target_protein_g': '150.00',
+            'target_carbs_g': '200.00', 'target_fat_g': '60.00', 'start_date': '2024-01-01', 'meals': meals,
+        }
+
+    def post_queries(self, path, data):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(path, data, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return len(queries)
+
+    def test_children_take_a_constant_number_of_queries(self):
+        self.client.force_authenticate(self.user)
+        foods = [{'name': f'Food {i}', 'quantity': '100 g', 'calories': 100} for i in range(6)]
+        self.assertEqual(
+            self.post_queries('/api/nutrition/meals/', self.meal(foods[:1])),
+            self.post_queries('/api/nutrition/meals/', self.meal(foods)),
+        )
+        self.assertEqual(Food.objects.filter(meal__user=self.user).count(), 7)
+
+        self.client.force_authenticate(self.coach)
+        meals = [
+            {'meal_type': 'snack', 'scheduled_time': f'{hour:02}:00', 'target_calories': 300}
+            for hour in range(8, 14)
+        ]
+        self.assertEqual(
+            self.post_queries('/api/nutrition/plans/', self.plan(meals[:1])),
+            self.post_queries('/api/nutrition/plans/', self.plan(meals, name='Bulk')),
+        )
+        self.assertEqual(NutritionPlanMeal.objects.filter(plan__coach=self.coach).count(), 7)
+
+    def test_invalid_child_is_rejected_with_its_parent(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            '/api/nutrition/meals/', self.meal([{'name': 'Rice', 'quantity': '100 g', 'calories': 130}, {'name': 'Oil'}]),
+            format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('foods', response.json())
+        self.assertFalse(Meal.objects.exists())
+
+    def test_duplicate_slots_are_rejected(self):
+        self.client.force_authenticate(self.coach)
+        slot = {'meal_type': 'lunch', 'scheduled_time': '12:00', 'target_calories': 600}
+        response = self.client.post('/api/nutrition/plans/', self.plan([slot, slot]), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('meals', response.json())
+        self.assertFalse(NutritionPlan.objects.exists())
+
+    def test_failed_child_insert_rolls_back_the_parent(self):
+        serializer = NutritionPlanCreateSerializer(context={'request': SimpleNamespace(user=self.coach)})
+        slot = {'meal_type': 'lunch', 'scheduled_time': time(12), 'target_calories': 600}
+        # Skips validate_meals, so the unique slot constraint fails the insert.
+        data = {**self.plan([slot, slot]), 'user': self.user, 'start_date': date(2024, 1, 1)}
+        with self.assertRaises(IntegrityError):
+            serializer.create(data)
+        self.assertFalse(NutritionPlan.objects.exists())
+
+
+class AdherenceRefreshTests(APITestCase):
+    day = date(2024, 1, 1)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.coach = User.objects.create_user(username='coach', email='coach@example.com', user_type='coach')
+        cls.user = User.objects.create_user(username='client', email='client@example.com', coach=cls.coach)
+        cls.plan = NutritionPlan.objects.create(
+            coach=cls.coach, user=cls.user, name='Phase', start_date=cls.day, target_calories=2200,
+            target_protein_g=Decimal('160.00'), target_carbs_g=Decimal('220.00'), target_fat_g=Decimal('70.00'),
+        )
+        cls.breakfast = cls.plan.meals.create(meal_type='breakfast', scheduled_time=time(8), target_calories=500)
+        cls.morning_snack = cls.plan.meals.create(meal_type='snack', scheduled_time=time(10), order=1)
+        cls.lunch = cls.plan.meals.create(meal_type='lunch', scheduled_time=time(12, 30), order=2)
+        cls.afternoon_snack = cls.plan.meals.create(meal_type='snack', scheduled_time=time(16), order=3)
+        breakfast = Meal.objects.create(
+            user=cls.user, nutrition_plan=cls.plan, name='Oats', meal_type='breakfast', date=cls.day,
+            time=time(8, 20), calories=400, carbs_g=Decimal('50.00'),
+        )
+        breakfast.foods.create(name='Oats', quantity='80 g', calories=300, protein_g=Decimal('10.00'), carbs_g=Decimal('5.00'))
+        breakfast.foods.create(name='Whey', quantity='30 g', calories=100, protein_g=Decimal('20.00'))
+        cls.snack = Meal.objects.create(
+            user=cls.user, nutrition_plan=cls.plan, name='Apple', meal_type='snack', date=cls.day,
+            time=time(15, 30), calories=80,
+        )
+
+    def rollup(self, slot):
+        return NutritionAdherence.objects.get(plan_meal=slot, date=self.day)
+
+    def test_meals_count_towards_the_closest_slot_of_their_type(self):
+        refresh_adherence(self.plan.pk)
+        self.assertEqual(self.rollup(self.afternoon_snack).meal_count, 1)
+        self.assertEqual(self.rollup(self.afternoon_snack).calories, 80)
+        self.assertEqual(self.rollup(self.morning_snack).meal_count, 0)
+
+    def test_missed_slots_get_empty_rows(self):
+        refresh_adherence(self.plan.pk)
+        self.assertEqual(NutritionAdherence.objects.filter(plan=self.plan).count(), 4)
+        lunch = self.rollup(self.lunch)
+        self.assertEqual((lunch.meal_count, lunch.calories, lunch.timing_deviation_minutes), (0, 0, None))
+
+    def test_blank_macros_fall_back_to_foods(self):
+        refresh_adherence(self.plan.pk)
+        breakfast = self.rollup(self.breakfast)
+        self.assertEqual(breakfast.protein_g, Decimal('30.00'))
+        self.assertEqual(breakfast.carbs_g, Decimal('50.00'))
+        self.assertEqual(breakfast.fat_g, Decimal('0.00'))
+
+    def test_timing_deviation(self):
+        refresh_adherence(self.plan.pk)
+        self.assertEqual(self.rollup(self.breakfast).timing_deviation_minutes, 20)
+        self.assertEqual(self.rollup(self.afternoon_snack).timing_deviation_minutes, 30)
+
+    def test_edits_and_deletes_refresh_the_day(self):
+        refresh_adherence(self.plan.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.snack.time = time(10, 5)
+            self.snack.save()
+        self.assertEqual(self.rollup(self.morning_snack).meal_count, 1)
+        self.assertEqual(self.rollup(self.morning_snack).timing_deviation_minutes, 5)
+        self.assertEqual(self.rollup(self.afternoon_snack).meal_count, 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Food.objects.filter(name='Whey').delete()
+        self.assertEqual(self.rollup(self.breakfast).protein_g, Decimal('10.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.snack.delete()
+        self.assertEqual(self.rollup(self.morning_snack).meal_count, 0)
+
+    def test_refresh_locks_the_plan(self):
+        if not connection.features.has_select_for_update:
+            self.skipTest(f'{connection.vendor} has no row locks.')
+        with CaptureQueriesContext(connection) as queries:
+            refresh_adherence(self.plan.pk, [self.day])
+        self.assertIn('FOR UPDATE', queries[0]['sql'])
+
+    def test_deleted_plan_is_skipped(self):
+        plan_id = self.plan.pk
+        self.plan.delete()
+        refresh_adherence(plan_id)
+        self.assertFalse(NutritionAdherence.objects.exists())
+
+    def test_endpoint_is_scoped_to_the_plan_coach_and_client(self):
+        refresh_adherence(self.plan.pk)
+        other_coach = User.objects.create_user(username='other', email='other@example.com', user_type='coach')
+        stranger = User.objects.create_user(username='stranger', email='stranger@example.com', coach=other_coach)
+        url = f'/api/nutrition/plans/{self.plan.pk}/adherence/'
+        params = {'from': '2024-01-01', 'to': '2024-01-07'}
+        for user in (self.coach, self.user):
+            self.client.force_authenticate(user)
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            [day] = response.json()['days']
+            self.assertEqual((day['date'], day['meal_count'], day['calories']), ('2024-01-01', 2, 480))
+            self.assertEqual(len(day['slots']), 4)
+        for user in (other_coach, stranger):
+            self.client.force_authenticate(user)
+            self.assertEqual(self.client.get(url, params).status_code, 404)
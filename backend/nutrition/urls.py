@@ -2,7 +2,7 @@ from django.urls import path
 from .views import (
     MealListCreateView, MealDetailView, FoodListCreateView,
     NutritionPlanListCreateView, NutritionPlanDetailView,
-    NutritionPlanMealListCreateView
+    NutritionPlanMealListCreateView, NutritionPlanAdherenceView
 )
 
 app_name = 'nutrition'
@@ -14,4 +14,5 @@ urlpatterns = [
     path('plans/', NutritionPlanListCreateView.as_view(), name='plan-list'),
     path('plans/<int:pk>/', NutritionPlanDetailView.as_view(), name='plan-detail'),
     path('plans/<int:plan_id>/meals/', NutritionPlanMealListCreateView.as_view(), name='plan-meal-list'),
+    path('plans/<int:plan_id>/adherence/', NutritionPlanAdherenceView.as_view(), name='plan-adherence'),
 ]
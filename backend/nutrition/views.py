@@ -1,14 +1,26 @@
+from itertools import groupby
+
 from rest_framework import generics, permissions
+from rest_framework.response import Response
+from django.db.models import Sum
 from django.shortcuts import get_object_or_404
-from .models import Meal, Food, NutritionPlan, NutritionPlanMeal
+from circus_grove.asynchronous import AsyncReadMixin
+from circus_grove.cache import CachedRetrieveMixin
+from circus_grove.conditional import ConditionalGetMixin
+from circus_grove.dates import parse_date_range
+from circus_grove.pagination import KeysetPaginationMixin
+from circus_grove.prefetch import PrefetchQuerysetMixin
+from circus_grove.values import ValuesListMixin
+from .caches import nutrition_plan_cache
+from .models import Meal, Food, NutritionPlan, NutritionPlanMeal, NutritionAdherence
 from .serializers import (
-    MealSerializer, MealCreateSerializer, FoodSerializer,
-    NutritionPlanSerializer, NutritionPlanCreateSerializer,
-    NutritionPlanMealSerializer
+    MealSerializer, MealListSerializer, MealCreateSerializer, FoodSerializer,
+    NutritionPlanSerializer, NutritionPlanListSerializer, NutritionPlanCreateSerializer,
+    NutritionPlanMealSerializer, NutritionAdherenceDaySerializer
 )
 
 
-class MealListCreateView(generics.ListCreateAPIView):
+class MealListCreateView(AsyncReadMixin, ConditionalGetMixin, ValuesListMixin, KeysetPaginationMixin, PrefetchQuerysetMixin, generics.ListCreateAPIView):
     """View for listing and creating meals."""
     permission_classes = [permissions.IsAuthenticated]
 
@@ -18,13 +30,13 @@ class MealListCreateView(generics.ListCreateAPIView):
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return MealCreateSerializer
-        return MealSerializer
+        return MealListSerializer
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 
-class MealDetailView(generics.RetrieveUpdateDestroyAPIView):
+class MealDetailView(AsyncReadMixin, ConditionalGetMixin, PrefetchQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """View for retrieving, updating, and deleting a meal."""
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = MealSerializer
@@ -33,10 +45,11 @@ class MealDetailView(generics.RetrieveUpdateDestroyAPIView):
         return Meal.objects.filter(user=self.request.user)
 
 
-class FoodListCreateView(generics.ListCreateAPIView):
+class FoodListCreateView(ConditionalGetMixin, ValuesListMixin, generics.ListCreateAPIView):
     """View for listing and creating foods."""
     serializer_class = FoodSerializer
     permission_classes = [permissions.IsAuthenticated]
+    last_modified_field = 'meal__updated_at'
 
     def get_queryset(self):
         meal_id = self.kwargs.get('meal_id')
@@ -48,7 +61,7 @@ class FoodListCreateView(generics.ListCreateAPIView):
         serializer.save(meal=meal)
 
 
-class NutritionPlanListCreateView(generics.ListCreateAPIView):
+class NutritionPlanListCreateView(AsyncReadMixin, ConditionalGetMixin, ValuesListMixin, PrefetchQuerysetMixin, generics.ListCreateAPIView):
     """View for listing and creating nutrition plans."""
     permission_classes = [permissions.IsAuthenticated]
 
@@ -64,7 +77,7 @@ class NutritionPlanListCreateView(generics.ListCreateAPIView):
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return NutritionPlanCreateSerializer
-        return NutritionPlanSerializer
+        return NutritionPlanListSerializer
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -76,10 +89,11 @@ class NutritionPlanListCreateView(generics.ListCreateAPIView):
         serializer.save()
 
 
-class NutritionPlanDetailView(generics.RetrieveUpdateDestroyAPIView):
+class NutritionPlanDetailView(AsyncReadMixin, ConditionalGetMixin, CachedRetrieveMixin, PrefetchQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """View for retrieving, updating, and deleting a nutrition plan."""
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = NutritionPlanSerializer
+    document_cache = nutrition_plan_cache
 
     def get_queryset(self):
         user = self.request.user
@@ -89,7 +103,7 @@ class NutritionPlanDetailView(generics.RetrieveUpdateDestroyAPIView):
             return NutritionPlan.objects.filter(user=user)
 
 
-class NutritionPlanMealListCreateView(generics.ListCreateAPIView):
+class NutritionPlanMealListCreateView(ConditionalGetMixin, generics.ListCreateAPIView):
     """View for listing and creating meals in a nutrition plan."""
     serializer_class = NutritionPlanMealSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -113,3 +127,36 @@ class NutritionPlanMealListCreateView(generics.ListCreateAPIView):
             plan = get_object_or_404(NutritionPlan, id=plan_id, user=user)
         serializer.save(plan=plan)
 
+
+class NutritionPlanAdherenceView(generics.GenericAPIView):
+    """View for per-day, per-slot adherence to a nutrition plan."""
+    serializer_class = NutritionAdherenceDaySerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, plan_id):
+        user = request.user
+        if user.user_type == 'coach':
+            plan = get_object_or_404(NutritionPlan, id=plan_id, coach=user)
+        else:
+            plan = get_object_or_404(NutritionPlan, id=plan_id, user=user)
+        start, end = parse_date_range(request)
+
+        rollups = NutritionAdherence.objects.filter(plan=plan, date__range=(start, end))
+        totals = rollups.order_by('date').values('date').annotate(
+            meal_count=Sum('meal_count'),
+            calories=Sum('calories'),
+            protein_g=Sum('protein_g'),
+            carbs_g=Sum('carbs_g'),
+            fat_g=Sum('fat_g'),
+        )
+        slots = {
+            day: list(day_slots)
+            for day, day_slots in groupby(rollups.select_related('plan_meal'), key=lambda rollup: rollup.date)
+        }
+        days = [dict(row, plan=plan, slots=slots[row['date']]) for row in totals]
+        return Response({
+            'plan': plan.id,
+            'from': start,
+            'to': end,
+            'days': self.get_serializer(days, many=True).data,
+        })
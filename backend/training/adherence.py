@@ -0,0 +1,211 @@
+"""
+Training plan adherence rollups.
+
+Each day's planned exercises come from the plan's calendar (see
+``training.calendar``). The logged exercises are those of the sessions
+linked to the plan on that day. Every planned exercise is matched to the
+first logged exercise not matched yet of the same catalog exercise (see
+``training.catalog``) or, failing that, of the same name, ignoring case and
+spacing. Logged exercises left over count as unplanned.
+
+A day scores its completion as the share of planned reps done, each
+exercise counting up to its plan, and the deviation of the volume lifted
+(sets x reps x weight) from the planned volume of the exercises that have a
+planned weight. Weeks, Monday to Sunday, total their days.
+
+The results are stored in ``TrainingAdherence`` for days up to today and
+refreshed one week at a time from the signals in ``training.signals``.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .models import Exercise, TrainingAdherence, TrainingPlan
+
+DAY, WEEK = 'day', 'week'
+ONE_WEEK = timedelta(weeks=1)
+# The largest deviation ``volume_deviation_pct`` holds; greater ones are stored as this.
+MAX_VOLUME_DEVIATION = Decimal('999999.9')
+
+
+def week_start(day):
+    """The Monday of ``day``'s week."""
+    return day - timedelta(days=day.weekday())
+
+
+def normalize_name(name):
+    return ' '.join(name.lower().split())
+
+
+def _volume(sets, reps, weight_kg):
+    return sets * reps * Decimal(weight_kg) if weight_kg is not None else Decimal('0')
+
+
+def score_day(planned, logged):
+    """
+    Match the ``logged`` exercise rows of a day to its ``planned`` calendar exercises.
+
+    Returns the day's ``TrainingAdherence`` totals and its planned reps
+    done, each exercise counting up to its plan.
+    """
+    by_catalog, by_name = defaultdict(list), defaultdict(list)
+    for index, exercise in enumerate(logged):
+        if exercise['catalog_exercise_id'] is not None:
+            by_catalog[exercise['catalog_exercise_id']].append(index)
+        by_name[normalize_name(exercise['name'])].append(index)
+    matched = set()
+
+    def take(indexes):
+        for index in indexes:
+            if index not in matched:
+                matched.add(index)
+                return logged[index]
+        return None
+
+    totals = {
+        'planned_exercises': len(planned),
+        'completed_exercises': 0,
+        'unplanned_exercises': 0,
+        'planned_reps': 0,
+        'actual_reps': 0,
+        'planned_volume_kg': Decimal('0'),
+        'actual_volume_kg': Decimal('0'),
+    }
+    reps_done = 0
+    for exercise in planned:
+        planned_reps = exercise['sets'] * exercise['reps']
+        totals['planned_reps'] += planned_reps
+        if exercise['weight_kg'] is not None:
+            totals['planned_volume_kg'] += _volume(exercise['sets'], exercise['reps'], exercise['weight_kg'])
+        # Calendars cached before plan exercises were linked have no catalog_exercise.
+        done = take(by_catalog.get(exercise.get('catalog_exercise'), ()))
+        if done is None:
+            done = take(by_name.get(normalize_name(exercise['exercise_name']), ()))
+        if done is None:
+            continue
+        actual_reps = done['sets'] * done['reps']
+        totals['completed_exercises'] += 1
+        totals['actual_reps'] += actual_reps
+        reps_done += min(actual_reps, planned_reps)
+        if exercise['weight_kg'] is not None:
+            totals['actual_volume_kg'] += _volume(done['sets'], done['reps'], done['weight_kg'])
+    totals['unplanned_exercises'] = len(logged) - len(matched)
+    return totals, reps_done
+
+
+def _rollup(plan_id, period, day, totals, reps_done):
+    completion = volume_deviation = None
+    if totals['planned_reps']:
+        completion = round(Decimal(100 * reps_done) / totals['planned_reps'], 1)
+    if totals['planned_volume_kg']:
+        volume_deviation = min(
+            round((totals['actual_volume_kg'] / totals['planned_volume_kg'] - 1) * 100, 1), MAX_VOLUME_DEVIATION,
+        )
+    return TrainingAdherence(
+        plan_id=plan_id,
+        period=period,
+        date=day,
+        completion_pct=completion,
+        volume_deviation_pct=volume_deviation,
+        **totals,
+    )
+
+
+def _weeks_to_refresh(plan_id, plan_start, dates):
+    """The weeks of ``dates``, plus every week since the plan's latest weekly rollup."""
+    weeks = {week_start(day) for day in dates}
+    latest = TrainingAdherence.objects.filter(plan_id=plan_id, period=WEEK).aggregate(latest=Max('date'))['latest']
+    # Weeks in which nothing was logged get their missed exercises too.
+    week = latest + ONE_WEEK if latest is not None else week_start(plan_start)
+    while week < max(weeks):
+        weeks.add(week)
+        week += ONE_WEEK
+    return sorted(weeks)
+
+
+@transaction.atomic
+def refresh_adherence(plan_id, dates=None):
+    """
+    Rebuild the adherence rows of a plan, optionally only for the weeks of ``dates``.
+
+    Days after today and outside the plan's dates are left out. Every day
+    with planned or logged exercises gets a row, so missed days show up with
+    ``completed_exercises`` 0.
+
+    Refreshes of the same plan take turns on a lock of its row, so each
+    reads the rows the one before it wrote and none inserts a row another
+    is inserting.
+    """
+    # Imported on first use, so processes that never refresh adherence skip loading NumPy.
+    from .calendar import expand, get_schedules
+
+    plan = TrainingPlan.objects.select_for_update().filter(pk=plan_id).values('start_date', 'end_date').first()
+    if plan is None:
+        return
+    today = timezone.localdate()
+    last = min(plan['end_date'] or today, today)
+
+    weeks = None
+    if dates is None:
+        ranges = [(plan['start_date'], last)]
+    else:
+        weeks = _weeks_to_refresh(plan_id, plan['start_date'], dates)
+        ranges = [(max(week, plan['start_date']), min(week + timedelta(days=6), last)) for week in weeks]
+    ranges = [(low, high) for low, high in ranges if low <= high]
+
+    planned = {}
+    logged = defaultdict(list)
+    if ranges:
+        schedules = get_schedules([plan_id])
+        for low, high in ranges:
+            for day in expand(schedules, low, high)[1]:
+                planned[date.fromisoformat(day['date'])] = day['exercises']
+        exercises = (
+            Exercise.objects.filter(
+                reduce(or_, (Q(session__date__range=bounds) for bounds in ranges)),
+                session__training_plan_id=plan_id,
+            )
+            .order_by('session__date', 'session_id', 'id')
+            .values('session__date', 'name', 'catalog_exercise_id', 'sets', 'reps', 'weight_kg')
+        )
+        for exercise in exercises:
+            logged[exercise['session__date']].append(exercise)
+
+    rows = []
+    week_totals = {}
+    for day in sorted(planned.keys() | logged.keys()):
+        totals, reps_done = score_day(planned.get(day, []), logged.get(day, []))
+        rows.append(_rollup(plan_id, DAY, day, totals, reps_done))
+        week = week_totals.setdefault(week_start(day), [dict.fromkeys(totals, 0), 0])
+        for field, value in totals.items():
+            week[0][field] += value
+        week[1] += reps_done
+    rows += [_rollup(plan_id, WEEK, week, *week_totals[week]) for week in sorted(week_totals)]
+
+    stale = TrainingAdherence.objects.filter(plan_id=plan_id)
+    if weeks is not None:
+        stale = stale.filter(
+            reduce(or_, (Q(date__range=(week, week + timedelta(days=6))) for week in weeks))
+        )
+    stale.delete()
+    TrainingAdherence.objects.bulk_create(rows)
+
+
+def schedule_refresh(plan_id, dates=None):
+    """Refresh a plan's rollups once the current transaction commits."""
+    if plan_id is None:
+        return
+    transaction.on_commit(lambda: refresh_adherence(plan_id, dates))
+
+
+def refresh_plans(plan_ids):
+    """Rebuild the rollups of every plan in ``plan_ids``, one transaction each, and return how many."""
+    for plan_id in plan_ids:
+        refresh_adherence(plan_id)
+    return len(plan_ids)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import TrainingSession, Exercise, TrainingPlan, TrainingPlanExercise
+from .models import TrainingSession, Exercise, TrainingPlan, TrainingPlanExercise, CatalogExercise, ExerciseAlias
 
 
 class ExerciseInline(admin.TabularInline):
@@ -33,3 +33,19 @@ class TrainingPlanAdmin(admin.ModelAdmin):
     ordering = ['-created_at']
     inlines = [TrainingPlanExerciseInline]
 
+
+class ExerciseAliasInline(admin.TabularInline):
+    """Inline admin for catalog exercise aliases."""
+    model = ExerciseAlias
+    fields = ['name', 'key']
+    readonly_fields = ['key']
+    extra = 1
+
+
+@admin.register(CatalogExercise)
+class CatalogExerciseAdmin(admin.ModelAdmin):
+    """Admin for CatalogExercise model."""
+    list_display = ['name', 'created_at']
+    search_fields = ['name', 'aliases__name']
+    ordering = ['name']
+    inlines = [ExerciseAliasInline]
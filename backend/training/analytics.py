@@ -0,0 +1,206 @@
+"""
+Per-exercise training analytics.
+
+``ExerciseProgress`` holds one row per user, exercise and day, aggregated
+from logged exercises in the database: sets, reps, volume (sets x reps x
+weight), the top weight and the best Epley estimate of the one-rep max.
+Exercises linked to the catalog are grouped by their catalog exercise and
+named after it, the others by their name; both are lowercased, with runs of
+whitespace collapsed as ``adherence.normalize_name()`` does. Each
+row also stores the best estimate on earlier days and whether it beats it. A
+window function computes those over each exercise's whole history, so a
+write to one day updates the personal records after it.
+
+The rows are refreshed per day from the signals in ``training.signals``, and
+by ``build_catalog()`` for the days whose exercises it relinks.
+Weekly volume, one-rep max curves and personal record timelines are then
+read from the rows of a date range.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Max, Sum, Value, When, Window
+from django.db.models.expressions import RowRange
+from django.db.models.functions import Cast, Coalesce, Lower, Trim, TruncWeek
+
+from .adherence import normalize_name
+from .models import Exercise, ExerciseProgress
+
+User = get_user_model()
+
+CENT = Decimal('0.01')
+
+# Epley: weight x (1 + reps / 30), the weight itself for a single.
+ESTIMATED_1RM = Case(
+    When(reps=0, then=Value(None)),
+    When(reps=1, then=Cast('weight_kg', FloatField())),
+    default=Cast('weight_kg', FloatField()) * (1 + Cast('reps', FloatField()) / 30),
+    output_field=FloatField(),
+)
+
+
+class EarlierRows(RowRange):
+    """``ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING``, which ``RowRange`` only accepts from Django 5.1."""
+
+    def __init__(self):
+        super().__init__(start=None, end=None)
+
+    def window_frame_start_end(self, connection, start, end):
+        return connection.ops.UNBOUNDED_PRECEDING, '1 %s' % connection.ops.PRECEDING
+
+
+def _decimal(value):
+    return None if value is None else Decimal(str(value)).quantize(CENT)
+
+
+def _max(*values):
+    return max((value for value in values if value is not None), default=None)
+
+
+def daily_totals(exercises):
+    """
+    Aggregate ``exercises`` per user, day and catalog exercise or name in a single query.
+
+    The database groups by the lowercased, trimmed name; groups whose names
+    only differ in inner whitespace are merged afterwards, which the
+    databases cannot do portably.
+    """
+    # Catalog names are unique, so grouping by them groups by catalog exercise.
+    exercise_name = Coalesce(Lower('catalog_exercise__name'), Lower(Trim('name')))
+    rows = (
+        exercises.order_by()
+        .values(user_id=F('session__user_id'), date=F('session__date'), exercise_name=exercise_name)
+        .annotate(
+            total_sets=Sum('sets'),
+            total_reps=Sum(F('sets') * F('reps')),
+            volume=Coalesce(Sum(Cast(F('sets') * F('reps'), FloatField()) * Cast('weight_kg', FloatField())), 0.0),
+            top_weight=Max('weight_kg'),
+            estimated_1rm=Max(ESTIMATED_1RM),
+        )
+    )
+    totals = {}
+    for row in rows:
+        row['exercise_name'] = normalize_name(row['exercise_name'])
+        key = (row['user_id'], row['date'], row['exercise_name'])
+        total = totals.setdefault(key, row)
+        if total is not row:
+            for field in ('total_sets', 'total_reps', 'volume'):
+                total[field] += row[field]
+            for field in ('top_weight', 'estimated_1rm'):
+                total[field] = _max(total[field], row[field])
+    return list(totals.values())
+
+
+def update_records(user_id, exercise_names):
+    """Recompute the previous bests and personal record flags of the user's rows for ``exercise_names``."""
+    rows = ExerciseProgress.objects.filter(user_id=user_id, exercise_name__in=exercise_names).annotate(
+        previous_best=Window(
+            Max('estimated_1rm_kg'),
+            partition_by=[F('exercise_name')],
+            order_by=F('date').asc(),
+            frame=EarlierRows(),
+        ),
+    ).only('id', 'estimated_1rm_kg', 'previous_best_1rm_kg', 'is_personal_record')
+
+    changed = []
+    for row in rows:
+        previous_best = _decimal(row.previous_best)
+        is_record = row.estimated_1rm_kg is not None and (
+            previous_best is None or row.estimated_1rm_kg > previous_best
+        )
+        if (previous_best, is_record) != (row.previous_best_1rm_kg, row.is_personal_record):
+            row.previous_best_1rm_kg = previous_best
+            row.is_personal_record = is_record
+            changed.append(row)
+    ExerciseProgress.objects.bulk_update(changed, ['previous_best_1rm_kg', 'is_personal_record'], batch_size=500)
+
+
+@transaction.atomic
+def refresh_progress(user_id, dates=None):
+    """
+    Rebuild a user's progress rows, optionally only for ``dates``, and the records after them.
+
+    Refreshes for the same user take turns on a lock of their row, so each
+    reads the rows the one before it wrote and none inserts a row another
+    is inserting.
+    """
+    if User.objects.select_for_update().filter(pk=user_id).values_list('pk', flat=True).first() is None:
+        return
+    exercises = Exercise.objects.filter(session__user_id=user_id)
+    stale = ExerciseProgress.objects.filter(user_id=user_id)
+    if dates is not None:
+        exercises = exercises.filter(session__date__in=dates)
+        stale = stale.filter(date__in=dates)
+    rows = [
+        ExerciseProgress(
+            user_id=user_id,
+            exercise_name=row['exercise_name'],
+            date=row['date'],
+            sets=row['total_sets'],
+            reps=row['total_reps'],
+            volume_kg=_decimal(row['volume']),
+            top_weight_kg=row['top_weight'],
+            estimated_1rm_kg=_decimal(row['estimated_1rm']),
+        )
+        for row in daily_totals(exercises)
+    ]
+
+    names = set(stale.values_list('exercise_name', flat=True).distinct())
+    stale.delete()
+    ExerciseProgress.objects.bulk_create(rows, batch_size=500)
+    names.update(row.exercise_name for row in rows)
+    if names:
+        update_records(user_id, names)
+
+
+def schedule_refresh(user_id, dates=None):
+    """Refresh a user's progress rows once the current transaction commits."""
+    transaction.on_commit(lambda: refresh_progress(user_id, dates))
+
+
+def get_analytics(users, start, end, exercise_name=None):
+    """
+    Weekly volume, one-rep max curve and personal records per user and exercise.
+
+    Covers the ``users`` queryset between ``start`` and ``end``, optionally
+    for one exercise. Weeks cut by either end of the range only count its days.
+    """
+    rows = ExerciseProgress.objects.filter(user__in=users, date__range=(start, end))
+    if exercise_name is not None:
+        rows = rows.filter(exercise_name=normalize_name(exercise_name))
+
+    series = defaultdict(lambda: {'weekly_volume': [], 'estimated_1rm': [], 'personal_records': []})
+    weeks = (
+        rows.annotate(week=TruncWeek('date'))
+        .values('user_id', 'exercise_name', 'week')
+        .annotate(total_sets=Sum('sets'), total_reps=Sum('reps'), total_volume=Sum('volume_kg'))
+        .order_by('user_id', 'exercise_name', 'week')
+    )
+    for week in weeks:
+        series[week['user_id'], week['exercise_name']]['weekly_volume'].append({
+            'week': week['week'],
+            'sets': week['total_sets'],
+            'reps': week['total_reps'],
+            'volume_kg': week['total_volume'],
+        })
+    for row in rows.filter(estimated_1rm_kg__isnull=False).order_by('user_id', 'exercise_name', 'date'):
+        entry = series[row.user_id, row.exercise_name]
+        previous_best = row.previous_best_1rm_kg
+        entry['estimated_1rm'].append({
+            'date': row.date,
+            'estimated_1rm_kg': row.estimated_1rm_kg,
+            'best_1rm_kg': max(row.estimated_1rm_kg, previous_best) if previous_best is not None else row.estimated_1rm_kg,
+        })
+        if row.is_personal_record:
+            entry['personal_records'].append({
+                'date': row.date,
+                'estimated_1rm_kg': row.estimated_1rm_kg,
+                'top_weight_kg': row.top_weight_kg,
+                'previous_best_1rm_kg': previous_best,
+            })
+    return [
+        {'user': user_id, 'exercise': exercise_name, **entry}
+        for (user_id, exercise_name), entry in sorted(series.items())
+    ]
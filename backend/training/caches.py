@@ -0,0 +1,7 @@
+from circus_grove.cache import DocumentCache
+
+# Serialized TrainingPlanSerializer documents, bumped from training.signals.
+training_plan_cache = DocumentCache('training-plans')
+
+# Versions the catalog behind training.catalog's in-memory search index.
+exercise_catalog_cache = DocumentCache('exercise-catalog')
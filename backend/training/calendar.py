@@ -0,0 +1,139 @@
+"""
+Training plan calendars.
+
+A plan's exercises are weekly (``day_of_week``) or one-off
+(``scheduled_date``); a row with both is weekly, as elsewhere. Each plan is
+compiled once per version of ``training_plan_cache`` into NumPy columns,
+day numbers and weekdays, and kept in the cache until the plan or one of
+its exercises changes. Expanding a date range is then arithmetic over the
+columns of all the plans at once: the first occurrence of every weekly row
+is computed directly and the rest are every seventh day after it. Python
+only runs per day with exercises, to group them; each exercise's dict is
+built once per plan version and shared by all of its days.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.core.cache import cache
+
+from .caches import training_plan_cache
+from .models import TrainingPlan, TrainingPlanExercise
+from .serializers import TrainingCalendarExerciseSerializer
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _day_number(date):
+    """Days since 1970-01-01, the NumPy ``datetime64[D]`` epoch."""
+    return int(np.datetime64(date, 'D').astype(np.int64))
+
+
+def _weekday(days):
+    # 1970-01-01 was a Thursday; Monday is 0 as in TrainingPlanExercise.DAY_OF_WEEK_CHOICES.
+    return (days + 3) % 7
+
+
+def _cache_key(plan_id, version):
+    return f'training:calendar:{plan_id}:{version}'
+
+
+def compile_schedule(plan, exercises):
+    """Turn ``plan`` and its exercises into the columns ``expand()`` works on."""
+    exercises = sorted(exercises, key=lambda exercise: (exercise.order, exercise.id))
+    for exercise in exercises:
+        exercise.plan = plan
+    weekly = [exercise.day_of_week is not None for exercise in exercises]
+    return {
+        'start': _day_number(plan.start_date),
+        'end': _day_number(plan.end_date) if plan.end_date else None,
+        'day_of_week': np.array(
+            [exercise.day_of_week if is_weekly else -1 for exercise, is_weekly in zip(exercises, weekly)],
+            dtype=np.int64,
+        ),
+        'scheduled_date': np.array(
+            [0 if is_weekly else _day_number(exercise.scheduled_date) for exercise, is_weekly in zip(exercises, weekly)],
+            dtype=np.int64,
+        ),
+        'exercises': [dict(row) for row in TrainingCalendarExerciseSerializer(exercises, many=True).data],
+    }
+
+
+def expand(schedules, start, end):
+    """
+    Expand ``schedules`` into the days between ``start`` and ``end``, inclusive, that have exercises.
+
+    Returns ``(count, days)``: the number of occurrences and a list of
+    ``{'date', 'exercises'}`` dicts. A day's exercises are in the order of
+    ``schedules``, then of exercise ``order``.
+    """
+    exercises = [exercise for schedule in schedules for exercise in schedule['exercises']]
+    if not exercises:
+        return 0, []
+    first, last = _day_number(start), _day_number(end)
+
+    # One entry per exercise of every plan, with the days its plan covers in the range.
+    sizes = [len(schedule['exercises']) for schedule in schedules]
+    day_of_week = np.concatenate([schedule['day_of_week'] for schedule in schedules])
+    scheduled_date = np.concatenate([schedule['scheduled_date'] for schedule in schedules])
+    lows = np.maximum(first, np.repeat([schedule['start'] for schedule in schedules], sizes))
+    highs = np.minimum(last, np.repeat(
+        [last if schedule['end'] is None else schedule['end'] for schedule in schedules], sizes,
+    ))
+
+    weekly = np.flatnonzero(day_of_week >= 0)
+    starts = lows[weekly] + (day_of_week[weekly] - _weekday(lows[weekly])) % 7
+    counts = np.maximum((highs[weekly] - starts) // 7 + 1, 0)
+    # Position of each occurrence within its exercise's run of weeks.
+    weeks = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    once = np.flatnonzero((day_of_week < 0) & (scheduled_date >= lows) & (scheduled_date <= highs))
+
+    days = np.concatenate([np.repeat(starts, counts) + 7 * weeks, scheduled_date[once]])
+    indexes = np.concatenate([np.repeat(weekly, counts), once])
+    ordering = np.lexsort((indexes, days))
+    days, indexes = days[ordering], indexes[ordering]
+    if not len(days):
+        return 0, []
+
+    ordered = [exercises[index] for index in indexes.tolist()]
+    bounds = np.flatnonzero(np.diff(days)) + 1
+    offsets = [0, *bounds.tolist(), len(ordered)]
+    return len(ordered), [
+        {'date': (start + timedelta(days=day - first)).isoformat(), 'exercises': ordered[low:high]}
+        for day, low, high in zip(days[offsets[:-1]].tolist(), offsets, offsets[1:])
+    ]
+
+
+def get_schedules(plan_ids):
+    """Return the compiled schedule of each of ``plan_ids``, in order, compiling those not cached."""
+    versions = training_plan_cache.versions(plan_ids)
+    keys = {plan_id: _cache_key(plan_id, versions[plan_id]) for plan_id in plan_ids}
+    schedules = cache.get_many(keys.values())
+
+    missing = [plan_id for plan_id in plan_ids if keys[plan_id] not in schedules]
+    if missing:
+        exercises = {plan_id: [] for plan_id in missing}
+        for exercise in TrainingPlanExercise.objects.filter(plan_id__in=missing).order_by():
+            exercises[exercise.plan_id].append(exercise)
+        compiled = {
+            keys[plan.id]: compile_schedule(plan, exercises[plan.id])
+            for plan in TrainingPlan.objects.filter(id__in=missing)
+        }
+        cache.set_many(compiled, CACHE_TIMEOUT)
+        schedules.update(compiled)
+    # A plan deleted since its id was read has no schedule.
+    return [schedules[keys[plan_id]] for plan_id in plan_ids if keys[plan_id] in schedules]
+
+
+def get_calendar(plans, start, end):
+    """
+    The calendar of the ``plans`` queryset between ``start`` and ``end``.
+
+    Plans that end before ``start`` or begin after ``end`` are skipped
+    without being compiled.
+    """
+    plan_ids = list(
+        plans.exclude(end_date__lt=start).filter(start_date__lte=end)
+        .order_by('start_date', 'id').values_list('id', flat=True)
+    )
+    count, days = expand(get_schedules(plan_ids), start, end)
+    return {'from': start.isoformat(), 'to': end.isoformat(), 'count': count, 'days': days}
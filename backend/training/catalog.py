@@ -0,0 +1,429 @@
+"""
+The exercise catalog.
+
+``CatalogExercise`` rows are the exercises logged and planned exercises
+refer to. Names resolve to them through ``ExerciseAlias``, keyed by
+``catalog_key()``: lowercased, punctuation and spacing collapsed, common
+abbreviations (``bb``, ``db``, ``ohp``...) spelled out and plural words made
+singular. A name whose key has no alias stays unlinked until
+``cluster_exercises`` runs again.
+
+``cluster_names()`` groups the names in use into exercises for that
+command. Names join when their keys are equal, equal without spaces or
+without an implied ``barbell``, a typo apart, or one word short of a far
+more used exercise ("BB bench" and "Bench Press").
+
+``search()`` autocompletes catalog names and aliases. PostgreSQL uses a
+``pg_trgm`` index on the alias keys, so typos match too. Other backends use
+an in-memory ``PrefixIndex`` per process, rebuilt when the catalog changes.
+"""
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+
+from django.db import connection, transaction
+from django.db.models import Case, Count, IntegerField, Q, Value, When
+from django.db.models.functions import Length
+from django.utils import timezone
+
+from . import adherence, analytics
+from .caches import exercise_catalog_cache, training_plan_cache
+from .models import (
+    CatalogExercise, Exercise, ExerciseAlias, TrainingPlan, TrainingPlanExercise, TrainingSession,
+)
+
+MAX_RESULTS = 50
+KEY_LENGTH = ExerciseAlias._meta.get_field('key').max_length
+# The exercise_catalog_cache version of the catalog as PrefixIndex sees it.
+SEARCH_INDEX = 'search-index'
+
+ABBREVIATIONS = {
+    'alt': 'alternating',
+    'bb': 'barbell',
+    'bw': 'bodyweight',
+    'db': 'dumbbell',
+    'dl': 'deadlift',
+    'ext': 'extension',
+    'kb': 'kettlebell',
+    'ohp': 'overhead press',
+    'rdl': 'romanian deadlift',
+    'sldl': 'stiff leg deadlift',
+}
+# The implement a lift's bare name means.
+IMPLIED = {'barbell'}
+# Keys this close (difflib ratio) are taken for typos of each other.
+TYPO_RATIO = 0.9
+TYPO_MIN_LENGTH = 6
+DOMINANT = 4
+
+_separators = re.compile(r'[\W_]+')
+
+
+def _singular(word):
+    if len(word) <= 3 or not word.endswith('s') or word.endswith(('ss', 'us', 'is')):
+        return word
+    if word.endswith(('sses', 'shes', 'ches', 'xes')):
+        return word[:-2]
+    return word[:-1]
+
+
+def catalog_key(name):
+    """Normalize an exercise name for alias lookups: 'BB Bench-Presses' -> 'barbell bench press'."""
+    words = []
+    for word in _separators.sub(' ', name.lower().replace('&', ' and ')).split():
+        words.extend(ABBREVIATIONS.get(word, word).split())
+    # Spelled-out abbreviations can outgrow ExerciseAlias.key.
+    return ' '.join(_singular(word) for word in words)[:KEY_LENGTH]
+
+
+def resolve(name):
+    """The name of the catalog exercise ``name`` resolves to, or ``name`` itself if none."""
+    catalog_name = ExerciseAlias.objects.filter(key=catalog_key(name)).values_list('exercise__name', flat=True).first()
+    return catalog_name or name
+
+
+def link(exercises, field):
+    """Set ``catalog_exercise_id`` on ``exercises`` from the name in ``field``, with one query."""
+    keys = [catalog_key(getattr(exercise, field)) for exercise in exercises]
+    if not keys:
+        return
+    ids = dict(ExerciseAlias.objects.filter(key__in=set(keys)).values_list('key', 'exercise_id'))
+    for exercise, key in zip(exercises, keys):
+        exercise.catalog_exercise_id = ids.get(key)
+
+
+def _compact(key):
+    words = key.split()
+    return ''.join(word for word in words if word not in IMPLIED) or ''.join(words)
+
+
+class _Clusters:
+    """Union-find over keys."""
+
+    def __init__(self, keys):
+        self.parent = {key: key for key in keys}
+
+    def find(self, key):
+        while self.parent[key] != key:
+            self.parent[key] = self.parent[self.parent[key]]
+            key = self.parent[key]
+        return key
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)
+
+
+def cluster_names(counts):
+    """
+    Group exercise names that spell the same exercise.
+
+    ``counts`` maps each name to how often it is used. Returns
+    ``(name, names)`` pairs, ``name`` being the most used spelling of the
+    group.
+    """
+    names_by_key = defaultdict(list)
+    key_counts = Counter()
+    for name, count in counts.items():
+        key = catalog_key(name)
+        if key:
+            names_by_key[key].append(name)
+            key_counts[key] += count
+    clusters = _Clusters(names_by_key)
+
+    by_compact = {}
+    for key in sorted(names_by_key):
+        clusters.union(key, by_compact.setdefault(_compact(key), key))
+
+    # Typos: compare compact keys of similar length and the same first letter.
+    blocks = defaultdict(list)
+    for compact, key in by_compact.items():
+        if len(compact) >= TYPO_MIN_LENGTH:
+            blocks[compact[0]].append((len(compact), compact, key))
+    for block in blocks.values():
+        block.sort()
+        for i, (length, compact, key) in enumerate(block):
+            matcher = SequenceMatcher(b=compact)
+            for other_length, other, other_key in block[i + 1:]:
+                if other_length - length > 2:
+                    break
+                matcher.set_seq1(other)
+                if matcher.real_quick_ratio() >= TYPO_RATIO and matcher.ratio() >= TYPO_RATIO:
+                    clusters.union(key, other_key)
+
+    # One word short of another exercise used more than it and DOMINANT times
+    # more than any others it is one word short of: "bench" is short for "bench
+    # press", but "deadlift" is not for "romanian deadlift", nor "curl" for
+    # "bicep curl" next to "hammer curl".
+    words = {key: tuple(sorted(set(key.split()) - IMPLIED)) for key in names_by_key}
+    shorter = defaultdict(set)
+    for key, key_words in words.items():
+        if len(key_words) > 1:
+            for word in key_words:
+                shorter[tuple(other for other in key_words if other != word)].add(key)
+    uses = Counter()
+    for key, count in key_counts.items():
+        uses[clusters.find(key)] += count
+    for key, key_words in words.items():
+        root = clusters.find(key)
+        longer = sorted(
+            {clusters.find(other) for other in shorter.get(key_words, ())} - {root},
+            key=lambda other: -uses[other],
+        )
+        if not longer:
+            continue
+        other = longer[0]
+        if key_counts[key] < uses[other] and uses[other] >= DOMINANT * sum(uses[rest] for rest in longer[1:]):
+            total = uses.pop(root) + uses.pop(other)
+            clusters.union(root, other)
+            uses[clusters.find(root)] = total
+
+    groups = defaultdict(list)
+    for key, names in names_by_key.items():
+        groups[clusters.find(key)].extend(names)
+    return sorted(
+        (min(names, key=lambda name: (-counts[name], name)), sorted(names))
+        for names in groups.values()
+    )
+
+
+def name_counts():
+    """How often each exercise name is logged or planned, catalog names and aliases counting 0."""
+    counts = Counter()
+    for name in CatalogExercise.objects.values_list('name', flat=True):
+        counts[name] += 0
+    for name in ExerciseAlias.objects.values_list('name', flat=True):
+        counts[name] += 0
+    for name, count in Exercise.objects.values_list('name').annotate(count=Count('id')).order_by():
+        counts[name] += count
+    for name, count in TrainingPlanExercise.objects.values_list('exercise_name').annotate(count=Count('id')).order_by():
+        counts[name] += count
+    return counts
+
+
+@transaction.atomic
+def build_catalog(clusters):
+    """
+    Add the ``cluster_names()`` groups to the catalog and relink every logged and planned exercise.
+
+    Existing catalog exercises are never renamed or merged: a group that
+    takes in aliases of several adds its new names to the most used one.
+    The progress and adherence rows of the relinked exercises are refreshed
+    once the transaction commits. Returns the numbers of exercises and
+    aliases created and of rows relinked.
+    """
+    aliases = dict(ExerciseAlias.objects.values_list('key', 'exercise_id'))
+    usage = Counter()
+    for model in (Exercise, TrainingPlanExercise):
+        usage.update(dict(
+            model.objects.filter(catalog_exercise__isnull=False)
+            .values_list('catalog_exercise_id').annotate(count=Count('id')).order_by()
+        ))
+    catalog_ids = dict(CatalogExercise.objects.values_list('name', 'id'))
+
+    new_exercises = {}
+    new_aliases = {}
+    for name, names in clusters:
+        keys = {}
+        for spelling in names:
+            keys.setdefault(catalog_key(spelling), spelling)
+        owners = {aliases[key] for key in keys if key in aliases}
+        if owners:
+            target = max(owners, key=lambda pk: (usage[pk], -pk))
+        elif name in catalog_ids:
+            target = catalog_ids[name]
+        else:
+            target = new_exercises.setdefault(name, CatalogExercise(name=name))
+        for key, spelling in keys.items():
+            if key not in aliases:
+                new_aliases[key] = (target, spelling)
+
+    CatalogExercise.objects.bulk_create(new_exercises.values())
+    # Targets are ids, or the catalog exercises just created.
+    new_aliases = {key: (getattr(target, 'pk', target), spelling) for key, (target, spelling) in new_aliases.items()}
+    ExerciseAlias.objects.bulk_create(
+        ExerciseAlias(exercise_id=target, name=spelling, key=key) for key, (target, spelling) in new_aliases.items()
+    )
+    aliases.update((key, target) for key, (target, _) in new_aliases.items())
+
+    relinked = 0
+    parents = {Exercise: set(), TrainingPlanExercise: set()}
+    for model, field, parent in ((Exercise, 'name', 'session_id'), (TrainingPlanExercise, 'exercise_name', 'plan_id')):
+        names_by_target = defaultdict(list)
+        for name in model.objects.values_list(field, flat=True).distinct().order_by():
+            names_by_target[aliases.get(catalog_key(name))].append(name)
+        for target, names in names_by_target.items():
+            for start in range(0, len(names), 500):
+                stale = model.objects.filter(**{f'{field}__in': names[start:start + 500]}).exclude(
+                    catalog_exercise_id=target,
+                )
+                parents[model].update(stale.values_list(parent, flat=True).distinct().order_by())
+                relinked += stale.update(catalog_exercise_id=target)
+
+    # As the save signals in training.signals would, for the rows updated in bulk.
+    now = timezone.now()
+    session_ids, plan_ids = sorted(parents[Exercise]), sorted(parents[TrainingPlanExercise])
+    for start in range(0, len(session_ids), 500):
+        TrainingSession.objects.filter(id__in=session_ids[start:start + 500]).update(updated_at=now)
+    for start in range(0, len(plan_ids), 500):
+        TrainingPlan.objects.filter(id__in=plan_ids[start:start + 500]).update(updated_at=now)
+    for plan_id in plan_ids:
+        training_plan_cache.bump(plan_id)
+    exercise_catalog_cache.bump(SEARCH_INDEX)
+
+    # Progress groups and adherence matches exercises by catalog exercise.
+    progress_dates, adherence_dates = defaultdict(set), defaultdict(set)
+    for start in range(0, len(session_ids), 500):
+        sessions = TrainingSession.objects.filter(id__in=session_ids[start:start + 500])
+        for user_id, plan_id, day in sessions.values_list('user_id', 'training_plan_id', 'date'):
+            progress_dates[user_id].add(day)
+            if plan_id is not None and plan_id not in parents[TrainingPlanExercise]:
+                adherence_dates[plan_id].add(day)
+    for user_id, dates in progress_dates.items():
+        analytics.schedule_refresh(user_id, sorted(dates))
+    for plan_id, dates in adherence_dates.items():
+        adherence.schedule_refresh(plan_id, sorted(dates))
+    for plan_id in plan_ids:
+        adherence.schedule_refresh(plan_id)
+    return len(new_exercises), len(new_aliases), relinked
+
+
+class PrefixIndex:
+    """
+    Prefix trie over the alias keys of the catalog.
+
+    Every word of a key starts a term, so 'press' finds 'bench press'. The
+    terms are kept sorted, so the terms under a prefix are a contiguous
+    range. Only prefixes with more than ``BURST`` terms are trie nodes: each
+    holds its ``MAX_RESULTS`` best exercises, built from its children's, so
+    a query that names a node reads it. Any other query bisects its range,
+    at most ``BURST`` terms, and ranks what it finds. Matches from the start
+    of a key come first, then shorter names, then names in alphabetical
+    order.
+    """
+    BURST = 256
+
+    def __init__(self, aliases):
+        """``aliases`` are ``(exercise_id, exercise_name, key)`` rows."""
+        aliases = list(aliases)
+        names = {exercise_id: name for exercise_id, name, _ in aliases}
+        self.ids = sorted(names, key=lambda pk: (len(names[pk]), names[pk]))
+        self.names = [names[pk] for pk in self.ids]
+        positions = {pk: position for position, pk in enumerate(self.ids)}
+        # A term's rank is its exercise's position, plus size if the match
+        # is from a later word of the key.
+        self.size = size = len(self.ids)
+
+        terms, ranks = [], []
+        for exercise_id, _, key in aliases:
+            position = positions[exercise_id]
+            terms.append(key)
+            ranks.append(position)
+            for match in re.finditer(' ', key):
+                terms.append(key[match.end():])
+                ranks.append(size + position)
+        order = sorted(range(len(terms)), key=terms.__getitem__)
+        self.terms = [terms[index] for index in order]
+        self.ranks = [ranks[index] for index in order]
+
+        self.nodes = {}
+        if len(self.terms) > self.BURST:
+            self._build('', 0, len(self.terms))
+
+    def _best(self, ranks, limit):
+        """The first ``limit`` distinct exercises of ``ranks``, in rank order, as ranks."""
+        best, seen = [], set()
+        for rank in sorted(ranks):
+            position = rank % self.size
+            if position not in seen:
+                seen.add(position)
+                best.append(rank)
+                if len(best) == limit:
+                    break
+        return best
+
+    def _build(self, prefix, low, high):
+        terms, depth = self.terms, len(prefix)
+        candidates = []
+        # Terms equal to the prefix sort before the longer ones.
+        while low < high and len(terms[low]) == depth:
+            candidates.append(self.ranks[low])
+            low += 1
+        while low < high:
+            child = prefix + terms[low][depth]
+            end = bisect_left(terms, child[:-1] + chr(ord(child[-1]) + 1), low, high)
+            if end - low > self.BURST:
+                candidates.extend(self._build(child, low, end))
+            else:
+                candidates.extend(self.ranks[low:end])
+            low = end
+        best = self.nodes[prefix] = self._best(candidates, MAX_RESULTS)
+        return best
+
+    def search(self, key, limit):
+        if key in self.nodes:
+            ranks = self.nodes[key][:limit]
+        else:
+            low = bisect_left(self.terms, key)
+            high = bisect_left(self.terms, key[:-1] + chr(ord(key[-1]) + 1), low)
+            ranks = self._best(self.ranks[low:high], limit)
+        positions = [rank % self.size for rank in ranks]
+        return [{'id': self.ids[position], 'name': self.names[position]} for position in positions]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """This process's ``PrefixIndex``, rebuilt when the catalog has changed since it was built."""
+    global _index
+    version = exercise_catalog_cache.version(SEARCH_INDEX)
+    index = _index
+    if index is None or index[0] != version:
+        with _index_lock:
+            index = _index
+            if index is None or index[0] != version:
+                rows = ExerciseAlias.objects.values_list('exercise_id', 'exercise__name', 'key').order_by()
+                index = _index = (version, PrefixIndex(rows.iterator(chunk_size=10000)))
+    return index[1]
+
+
+def _search_trigram(key, limit):
+    if len(key) < 3:
+        # Shorter than a trigram: a prefix scan of the key's btree index.
+        aliases = ExerciseAlias.objects.filter(key__startswith=key).order_by('key')
+    else:
+        from django.contrib.postgres.search import TrigramSimilarity
+
+        aliases = ExerciseAlias.objects.filter(
+            Q(key__startswith=key) | Q(key__contains=' ' + key) | Q(key__trigram_similar=key),
+        ).annotate(
+            match=Case(
+                When(key__startswith=key, then=Value(0)),
+                When(key__contains=' ' + key, then=Value(1)),
+                default=Value(2),
+                output_field=IntegerField(),
+            ),
+            similarity=TrigramSimilarity('key', key),
+        ).order_by('match', '-similarity', Length('exercise__name'), 'exercise__name')
+    results = {}
+    # An exercise can match through several aliases.
+    for exercise_id, name in aliases.values_list('exercise_id', 'exercise__name')[:limit * 4]:
+        results.setdefault(exercise_id, name)
+        if len(results) == limit:
+            break
+    return [{'id': exercise_id, 'name': name} for exercise_id, name in results.items()]
+
+
+def search(query, limit=10):
+    """The catalog exercises best matching ``query``, as ``{'id', 'name'}`` dicts."""
+    key = catalog_key(query)
+    if not key:
+        return []
+    if connection.vendor == 'postgresql':
+        return _search_trigram(key, limit)
+    return get_index().search(key, limit)
@@ -0,0 +1,51 @@
+from collections import defaultdict
+
+from rest_framework import serializers
+
+from circus_grove.imports import Importer
+from . import analytics, catalog
+from .adherence import schedule_refresh
+from .models import Exercise, TrainingPlan, TrainingSession
+from .serializers import TrainingSessionCreateSerializer
+
+
+class TrainingSessionImportSerializer(TrainingSessionCreateSerializer):
+    """Session row of an import; the plan is checked against the importing user's plans."""
+    training_plan = serializers.IntegerField(source='training_plan_id', required=False, allow_null=True)
+
+    def validate_training_plan(self, value):
+        if value is not None and value not in self.context['plan_ids']:
+            raise serializers.ValidationError('Unknown training plan.')
+        return value
+
+
+class TrainingSessionImporter(Importer):
+    """Inserts training sessions with their exercises (NDJSON only) and refreshes the affected rollups."""
+    serializer_class = TrainingSessionImportSerializer
+
+    def __init__(self, user):
+        super().__init__(user)
+        self.plan_ids = set(TrainingPlan.objects.filter(user=user).values_list('id', flat=True))
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'plan_ids': self.plan_ids}
+
+    def write(self, rows):
+        rows = [dict(row) for row in rows]
+        exercises = [row.pop('exercises', []) for row in rows]
+        sessions = TrainingSession.objects.bulk_create([TrainingSession(user=self.user, **row) for row in rows])
+        exercises = [
+            Exercise(session=session, **exercise)
+            for session, session_exercises in zip(sessions, exercises)
+            for exercise in session_exercises
+        ]
+        catalog.link(exercises, 'name')
+        Exercise.objects.bulk_create(exercises)
+
+        dates = defaultdict(set)
+        for session in sessions:
+            if session.training_plan_id is not None:
+                dates[session.training_plan_id].add(session.date)
+        for plan_id, plan_dates in dates.items():
+            schedule_refresh(plan_id, sorted(plan_dates))
+        analytics.schedule_refresh(self.user.pk, sorted({session.date for session in sessions}))
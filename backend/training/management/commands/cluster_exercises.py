@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from training.catalog import build_catalog, cluster_names, name_counts
+
+
+class Command(BaseCommand):
+    help = (
+        'Group the logged and planned exercise names that spell the same exercise into the '
+        'exercise catalog, and link every exercise to its catalog entry.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Print the groups of more than one name and write nothing.',
+        )
+
+    def handle(self, *args, **options):
+        clusters = cluster_names(name_counts())
+        if options['dry_run']:
+            for name, names in clusters:
+                if len(names) > 1:
+                    self.stdout.write(f"{name}: {', '.join(names)}")
+            self.stdout.write(f'{len(clusters)} exercise(s).')
+            return
+        created, aliases, relinked = build_catalog(clusters)
+        self.stdout.write(self.style.SUCCESS(
+            f'Added {created} catalog exercise(s) and {aliases} alias(es); relinked {relinked} exercise(s).'
+        ))
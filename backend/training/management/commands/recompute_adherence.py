@@ -0,0 +1,46 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from circus_grove.processes import process_pool
+from training.adherence import refresh_plans
+from training.models import TrainingPlan
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the training plan adherence rollups from logged sessions, '
+        'in chunks of plans spread over a pool of worker processes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('plan_ids', nargs='*', type=int, help='Only rebuild these plans.')
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Worker processes; 1 rebuilds in this process. Defaults to the number of CPUs.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=50, help='Plans per task sent to a worker.')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('--workers and --chunk-size must be at least 1.')
+        plans = TrainingPlan.objects.order_by('id')
+        if options['plan_ids']:
+            plans = plans.filter(id__in=options['plan_ids'])
+        plan_ids = list(plans.values_list('id', flat=True))
+        size = options['chunk_size']
+        chunks = [plan_ids[start:start + size] for start in range(0, len(plan_ids), size)]
+
+        workers = min(options['workers'], len(chunks))
+        count = 0
+        if workers <= 1:
+            for chunk in chunks:
+                count += refresh_plans(chunk)
+        else:
+            with process_pool(workers) as pool:
+                for done in pool.map(refresh_plans, chunks):
+                    count += done
+                    self.stdout.write(f'  {count}/{len(plan_ids)} plans')
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt adherence for {count} training plan(s) with {max(workers, 1)} worker(s).'
+        ))
@@ -0,0 +1,26 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from training.analytics import refresh_progress
+from training.models import TrainingSession
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-exercise progress rows behind /api/training/analytics/ from logged sessions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_ids', nargs='*', type=int, help='Only rebuild these users.')
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(
+            id__in=TrainingSession.objects.values('user_id'),
+        ).order_by('id')
+        if options['user_ids']:
+            users = User.objects.filter(id__in=options['user_ids']).order_by('id')
+        count = 0
+        for user_id in users.values_list('id', flat=True).iterator():
+            refresh_progress(user_id)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt training progress for {count} user(s).'))
@@ -0,0 +1,35 @@
+# Generated by Django 5.0 on 2026-10-18 09:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+from circus_grove.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('training', '0003_trainingplan_trainingsession_training_plan_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='trainingplan',
+            index=models.Index(fields=['coach', '-created_at'], name='training_plan_coach_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='trainingplan',
+            index=models.Index(fields=['user', '-created_at'], name='training_plan_user_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='trainingplanexercise',
+            index=models.Index(fields=['plan', 'day_of_week', 'order'], name='plan_exercise_schedule_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='trainingsession',
+            index=models.Index(fields=['user', '-date', '-created_at'], name='training_session_user_idx'),
+        ),
+    ]
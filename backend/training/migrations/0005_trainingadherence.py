@@ -0,0 +1,38 @@
+# Generated by Django 5.0 on 2026-10-18 10:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('training', '0004_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrainingAdherence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Day'), ('week', 'Week')], max_length=4)),
+                ('date', models.DateField(help_text='The day, or the Monday of the week')),
+                ('planned_exercises', models.PositiveIntegerField(default=0)),
+                ('completed_exercises', models.PositiveIntegerField(default=0, help_text='Planned exercises matched by a logged exercise')),
+                ('unplanned_exercises', models.PositiveIntegerField(default=0, help_text='Logged exercises that matched no planned exercise')),
+                ('planned_reps', models.PositiveIntegerField(default=0)),
+                ('actual_reps', models.PositiveIntegerField(default=0)),
+                ('planned_volume_kg', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('actual_volume_kg', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('completion_pct', models.DecimalField(blank=True, decimal_places=1, help_text='Planned reps done, each exercise counting up to its plan', max_digits=4, null=True)),
+                ('volume_deviation_pct', models.DecimalField(blank=True, decimal_places=1, help_text='Deviation of the volume lifted from the planned volume', max_digits=7, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('plan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='adherence', to='training.trainingplan')),
+            ],
+            options={
+                'db_table': 'training_adherence',
+                'ordering': ['period', 'date'],
+                'unique_together': {('plan', 'period', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.0 on 2026-10-18 10:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('training', '0005_trainingadherence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExerciseProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('exercise_name', models.CharField(help_text='Exercise name, trimmed and lowercased', max_length=200)),
+                ('date', models.DateField()),
+                ('sets', models.PositiveIntegerField(default=0)),
+                ('reps', models.PositiveIntegerField(default=0, help_text='Sets x reps, summed')),
+                ('volume_kg', models.DecimalField(decimal_places=2, default=0, help_text='Sets x reps x weight, summed', max_digits=12)),
+                ('top_weight_kg', models.DecimalField(blank=True, decimal_places=2, max_digits=6, null=True)),
+                ('estimated_1rm_kg', models.DecimalField(blank=True, decimal_places=2, help_text='Best Epley estimate of the one-rep max', max_digits=7, null=True)),
+                ('previous_best_1rm_kg', models.DecimalField(blank=True, decimal_places=2, help_text='Best estimated one-rep max on earlier days', max_digits=7, null=True)),
+                ('is_personal_record', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exercise_progress', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'exercise_progress',
+                'ordering': ['exercise_name', 'date'],
+                'indexes': [models.Index(fields=['user', 'date'], name='exercise_progress_date_idx')],
+                'unique_together': {('user', 'exercise_name', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.0 on 2026-10-18 10:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from circus_grove.operations import RunSQLOnPostgreSQL
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('training', '0006_exerciseprogress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogExercise',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'exercise_catalog',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='exercise',
+            name='catalog_exercise',
+            field=models.ForeignKey(blank=True, help_text="Resolved from name through the catalog's aliases", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='logged_exercises', to='training.catalogexercise'),
+        ),
+        migrations.AddField(
+            model_name='trainingplanexercise',
+            name='catalog_exercise',
+            field=models.ForeignKey(blank=True, help_text="Resolved from exercise_name through the catalog's aliases", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='plan_exercises', to='training.catalogexercise'),
+        ),
+        migrations.CreateModel(
+            name='ExerciseAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('key', models.CharField(help_text='The name normalized by training.catalog.catalog_key', max_length=200, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('exercise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='training.catalogexercise')),
+            ],
+            options={
+                'db_table': 'exercise_aliases',
+                'ordering': ['key'],
+            },
+        ),
+        # Trigram index behind training.catalog.search(); other backends search in memory.
+        RunSQLOnPostgreSQL(
+            sql='CREATE EXTENSION IF NOT EXISTS pg_trgm',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        RunSQLOnPostgreSQL(
+            sql='CREATE INDEX exercise_alias_key_trgm_idx ON exercise_aliases USING gin (key gin_trgm_ops)',
+            reverse_sql='DROP INDEX exercise_alias_key_trgm_idx',
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0 on 2026-10-18 14:20
+
+from django.db import migrations
+
+from circus_grove.operations import AddFullTextSearch
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('training', '0007_exercise_catalog'),
+    ]
+
+    operations = [
+        AddFullTextSearch('training_sessions', 1, title='title', body=('description', 'notes')),
+        AddFullTextSearch('training_plans', 2, title='name', body=('description',)),
+    ]
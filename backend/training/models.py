@@ -3,6 +3,39 @@ from django.conf import settings
 from django.core.exceptions import ValidationError
 
 
+class CatalogExercise(models.Model):
+    """Model for an exercise of the shared catalog that logged and planned exercises refer to."""
+    name = models.CharField(max_length=200, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'exercise_catalog'
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class ExerciseAlias(models.Model):
+    """Model for a name, or spelling of one, that resolves to a catalog exercise."""
+    exercise = models.ForeignKey(CatalogExercise, on_delete=models.CASCADE, related_name='aliases')
+    name = models.CharField(max_length=200)
+    key = models.CharField(
+        max_length=200,
+        unique=True,
+        help_text="The name normalized by training.catalog.catalog_key"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'exercise_aliases'
+        ordering = ['key']
+
+    def __str__(self):
+        return f"{self.name} -> {self.exercise}"
+
+
 class TrainingPlan(models.Model):
     """Model for training plans created by coaches for users."""
     coach = models.ForeignKey(
@@ -29,6 +62,10 @@ class TrainingPlan(models.Model):
         db_table = 'training_plans'
         ordering = ['-created_at']
         unique_together = [['user', 'name']]
+        indexes = [
+            models.Index(fields=['coach', '-created_at'], name='training_plan_coach_idx'),
+            models.Index(fields=['user', '-created_at'], name='training_plan_user_idx'),
+        ]
 
     def clean(self):
         """Validate that coach is actually a coach and user is a normal user."""
@@ -62,6 +99,14 @@ class TrainingPlanExercise(models.Model):
 
     plan = models.ForeignKey(TrainingPlan, on_delete=models.CASCADE, related_name='exercises')
     exercise_name = models.CharField(max_length=200)
+    catalog_exercise = models.ForeignKey(
+        CatalogExercise,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='plan_exercises',
+        help_text="Resolved from exercise_name through the catalog's aliases"
+    )
     day_of_week = models.IntegerField(choices=DAY_OF_WEEK_CHOICES, blank=True, null=True)
     scheduled_date = models.DateField(blank=True, null=True)
     sets = models.PositiveIntegerField()
@@ -76,10 +121,13 @@ class TrainingPlanExercise(models.Model):
     class Meta:
         db_table = 'training_plan_exercises'
         ordering = ['day_of_week', 'order', 'id']
+        indexes = [
+            models.Index(fields=['plan', 'day_of_week', 'order'], name='plan_exercise_schedule_idx'),
+        ]
 
     def clean(self):
         """Validate that either day_of_week or scheduled_date is provided."""
-        if not self.day_of_week and not self.scheduled_date:
+        if self.day_of_week is None and self.scheduled_date is None:
             raise ValidationError("Either day_of_week or scheduled_date must be provided.")
 
     def save(self, *args, **kwargs):
@@ -121,6 +169,9 @@ class TrainingSession(models.Model):
     class Meta:
         db_table = 'training_sessions'
         ordering = ['-date', '-created_at']
+        indexes = [
+            models.Index(fields=['user', '-date', '-created_at'], name='training_session_user_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.date}"
@@ -130,6 +181,14 @@ class Exercise(models.Model):
     """Model for exercises in a training session."""
     session = models.ForeignKey(TrainingSession, on_delete=models.CASCADE, related_name='exercises')
     name = models.CharField(max_length=200)
+    catalog_exercise = models.ForeignKey(
+        CatalogExercise,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='logged_exercises',
+        help_text="Resolved from name through the catalog's aliases"
+    )
     sets = models.PositiveIntegerField()
     reps = models.PositiveIntegerField()
     weight_kg = models.DecimalField(max_digits=6, decimal_places=2, blank=True, null=True)
@@ -143,3 +202,94 @@ class Exercise(models.Model):
     def __str__(self):
         return f"{self.name} - {self.sets}x{self.reps}"
 
+
+
+class TrainingAdherence(models.Model):
+    """Per-day or per-week rollup of logged exercises against a training plan's schedule."""
+    PERIOD_CHOICES = [
+        ('day', 'Day'),
+        ('week', 'Week'),
+    ]
+
+    plan = models.ForeignKey(TrainingPlan, on_delete=models.CASCADE, related_name='adherence')
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    date = models.DateField(help_text="The day, or the Monday of the week")
+    planned_exercises = models.PositiveIntegerField(default=0)
+    completed_exercises = models.PositiveIntegerField(
+        default=0,
+        help_text="Planned exercises matched by a logged exercise"
+    )
+    unplanned_exercises = models.PositiveIntegerField(
+        default=0,
+        help_text="Logged exercises that matched no planned exercise"
+    )
+    planned_reps = models.PositiveIntegerField(default=0)
+    actual_reps = models.PositiveIntegerField(default=0)
+    planned_volume_kg = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    actual_volume_kg = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    completion_pct = models.DecimalField(
+        max_digits=4,
+        decimal_places=1,
+        blank=True,
+        null=True,
+        help_text="Planned reps done, each exercise counting up to its plan"
+    )
+    volume_deviation_pct = models.DecimalField(
+        max_digits=7,
+        decimal_places=1,
+        blank=True,
+        null=True,
+        help_text="Deviation of the volume lifted from the planned volume"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'training_adherence'
+        ordering = ['period', 'date']
+        unique_together = [['plan', 'period', 'date']]
+
+    def __str__(self):
+        return f"{self.plan} - {self.period} of {self.date}"
+
+
+class ExerciseProgress(models.Model):
+    """Per-day totals and best lifts of one exercise for one user, rolled up from logged sessions."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='exercise_progress')
+    exercise_name = models.CharField(max_length=200, help_text="Exercise name, trimmed and lowercased")
+    date = models.DateField()
+    sets = models.PositiveIntegerField(default=0)
+    reps = models.PositiveIntegerField(default=0, help_text="Sets x reps, summed")
+    volume_kg = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        help_text="Sets x reps x weight, summed"
+    )
+    top_weight_kg = models.DecimalField(max_digits=6, decimal_places=2, blank=True, null=True)
+    estimated_1rm_kg = models.DecimalField(
+        max_digits=7,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        help_text="Best Epley estimate of the one-rep max"
+    )
+    previous_best_1rm_kg = models.DecimalField(
+        max_digits=7,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        help_text="Best estimated one-rep max on earlier days"
+    )
+    is_personal_record = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'exercise_progress'
+        ordering = ['exercise_name', 'date']
+        unique_together = [['user', 'exercise_name', 'date']]
+        indexes = [
+            models.Index(fields=['user', 'date'], name='exercise_progress_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.exercise_name} - {self.user_id} - {self.date}"
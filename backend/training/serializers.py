@@ -1,16 +1,24 @@
+from django.db import transaction
+from django.db.models.functions import Substr
 from rest_framework import serializers
-from .models import TrainingSession, Exercise, TrainingPlan, TrainingPlanExercise
+from circus_grove.prefetch import child_count
+from circus_grove.serializers import SparseFieldsMixin
+from . import catalog
+from .models import (
+    TrainingSession, Exercise, TrainingPlan, TrainingPlanExercise, TrainingAdherence, CatalogExercise
+)
 
 
-class ExerciseSerializer(serializers.ModelSerializer):
+class ExerciseSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for Exercise model."""
     
     class Meta:
         model = Exercise
-        fields = ['id', 'name', 'sets', 'reps', 'weight_kg', 'rest_seconds', 'notes']
+        fields = ['id', 'name', 'catalog_exercise', 'sets', 'reps', 'weight_kg', 'rest_seconds', 'notes']
+        read_only_fields = ['catalog_exercise']
 
 
-class TrainingSessionSerializer(serializers.ModelSerializer):
+class TrainingSessionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for TrainingSession model."""
     exercises = ExerciseSerializer(many=True, read_only=True)
     user = serializers.StringRelatedField(read_only=True)
@@ -24,6 +32,29 @@ class TrainingSessionSerializer(serializers.ModelSerializer):
             'notes', 'exercises', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'user', 'created_at', 'updated_at']
+        select_related = ['user', 'training_plan']
+        prefetch_related = ['exercises']
+        expandable_fields = ['exercises']
+
+
+class TrainingSessionListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Serializer for training session lists: exercise count instead of exercises, no text columns."""
+    user = serializers.StringRelatedField(read_only=True)
+    training_plan_name = serializers.CharField(source='training_plan.name', read_only=True)
+    exercise_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = TrainingSession
+        fields = [
+            'id', 'user', 'training_plan', 'training_plan_name', 'title', 'date',
+            'duration_minutes', 'intensity', 'calories_burned', 'exercise_count',
+            'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+        select_related = ['user', 'training_plan']
+        annotations = {'exercise_count': child_count(Exercise, 'session')}
+        defer = ['description', 'notes', 'user__bio', 'training_plan__description']
+        value_lookups = {'user': 'user__username'}
 
 
 class TrainingSessionCreateSerializer(serializers.ModelSerializer):
@@ -37,31 +68,39 @@ class TrainingSessionCreateSerializer(serializers.ModelSerializer):
             'intensity', 'calories_burned', 'notes', 'exercises'
         ]
 
+    @transaction.atomic
     def create(self, validated_data):
         exercises_data = validated_data.pop('exercises', [])
         session = TrainingSession.objects.create(**validated_data)
-        
-        for exercise_data in exercises_data:
-            Exercise.objects.create(session=session, **exercise_data)
-        
+        exercises = [Exercise(session=session, **exercise_data) for exercise_data in exercises_data]
+        catalog.link(exercises, 'name')
+        Exercise.objects.bulk_create(exercises)
         return session
 
 
-class TrainingPlanExerciseSerializer(serializers.ModelSerializer):
+class TrainingPlanExerciseSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for TrainingPlanExercise model."""
     day_of_week_display = serializers.CharField(source='get_day_of_week_display', read_only=True)
     
     class Meta:
         model = TrainingPlanExercise
         fields = [
-            'id', 'exercise_name', 'day_of_week', 'day_of_week_display',
+            'id', 'exercise_name', 'catalog_exercise', 'day_of_week', 'day_of_week_display',
             'scheduled_date', 'sets', 'reps', 'weight_kg', 'rest_seconds',
             'order', 'notes', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'catalog_exercise', 'created_at', 'updated_at']
 
+    def validate(self, attrs):
+        """Mirror TrainingPlanExercise.clean so nested rows can skip save()."""
+        day_of_week = attrs.get('day_of_week', getattr(self.instance, 'day_of_week', None))
+        scheduled_date = attrs.get('scheduled_date', getattr(self.instance, 'scheduled_date', None))
+        if day_of_week is None and scheduled_date is None:
+            raise serializers.ValidationError("Either day_of_week or scheduled_date must be provided.")
+        return attrs
 
-class TrainingPlanSerializer(serializers.ModelSerializer):
+
+class TrainingPlanSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for TrainingPlan model."""
     exercises = TrainingPlanExerciseSerializer(many=True, read_only=True)
     coach_username = serializers.CharField(source='coach.username', read_only=True)
@@ -75,6 +114,32 @@ class TrainingPlanSerializer(serializers.ModelSerializer):
             'exercises', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'coach', 'created_at', 'updated_at']
+        select_related = ['coach', 'user']
+        prefetch_related = ['exercises']
+        expandable_fields = ['exercises']
+
+
+class TrainingPlanListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Serializer for training plan lists: exercise count instead of exercises, description preview."""
+    coach_username = serializers.CharField(source='coach.username', read_only=True)
+    user_username = serializers.CharField(source='user.username', read_only=True)
+    description_preview = serializers.CharField(read_only=True)
+    exercise_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = TrainingPlan
+        fields = [
+            'id', 'coach', 'coach_username', 'user', 'user_username',
+            'name', 'description_preview', 'start_date', 'end_date', 'is_active',
+            'exercise_count', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+        select_related = ['coach', 'user']
+        annotations = {
+            'description_preview': Substr('description', 1, 200),
+            'exercise_count': child_count(TrainingPlanExercise, 'plan'),
+        }
+        defer = ['description', 'coach__bio', 'user__bio']
 
 
 class TrainingPlanCreateSerializer(serializers.ModelSerializer):
@@ -88,13 +153,90 @@ class TrainingPlanCreateSerializer(serializers.ModelSerializer):
             'is_active', 'exercises'
         ]
 
+    @transaction.atomic
     def create(self, validated_data):
         exercises_data = validated_data.pop('exercises', [])
         # Set coach from request user
         validated_data['coach'] = self.context['request'].user
         plan = TrainingPlan.objects.create(**validated_data)
-        
-        for exercise_data in exercises_data:
-            TrainingPlanExercise.objects.create(plan=plan, **exercise_data)
-        
+        # Exercises were validated by TrainingPlanExerciseSerializer.validate,
+        # so they are written in one insert instead of one full_clean() each.
+        exercises = [TrainingPlanExercise(plan=plan, **exercise_data) for exercise_data in exercises_data]
+        catalog.link(exercises, 'exercise_name')
+        TrainingPlanExercise.objects.bulk_create(exercises)
         return plan
+
+
+class TrainingCalendarExerciseSerializer(serializers.ModelSerializer):
+    """Serializer for a plan exercise as it appears on each of its calendar days."""
+    plan = serializers.IntegerField(source='plan_id', read_only=True)
+    plan_name = serializers.CharField(source='plan.name', read_only=True)
+    user = serializers.IntegerField(source='plan.user_id', read_only=True)
+    plan_exercise = serializers.IntegerField(source='id', read_only=True)
+
+    class Meta:
+        model = TrainingPlanExercise
+        fields = [
+            'plan', 'plan_name', 'user', 'plan_exercise', 'exercise_name', 'catalog_exercise',
+            'sets', 'reps', 'weight_kg', 'rest_seconds', 'order', 'notes'
+        ]
+        read_only_fields = fields
+
+
+class TrainingCalendarDaySerializer(serializers.Serializer):
+    """Serializer describing one day of a training calendar and the exercises scheduled on it."""
+    date = serializers.DateField()
+    exercises = TrainingCalendarExerciseSerializer(many=True)
+
+
+class TrainingAdherenceSerializer(serializers.ModelSerializer):
+    """Serializer for a day's or week's adherence to a training plan."""
+
+    class Meta:
+        model = TrainingAdherence
+        fields = [
+            'date', 'planned_exercises', 'completed_exercises', 'unplanned_exercises',
+            'planned_reps', 'actual_reps', 'completion_pct',
+            'planned_volume_kg', 'actual_volume_kg', 'volume_deviation_pct'
+        ]
+        read_only_fields = fields
+
+
+class WeeklyVolumeSerializer(serializers.Serializer):
+    """Serializer for one week of an exercise's training volume."""
+    week = serializers.DateField()
+    sets = serializers.IntegerField()
+    reps = serializers.IntegerField()
+    volume_kg = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class EstimatedOneRepMaxSerializer(serializers.Serializer):
+    """Serializer for a day's estimated one-rep max and the best estimate so far."""
+    date = serializers.DateField()
+    estimated_1rm_kg = serializers.DecimalField(max_digits=7, decimal_places=2)
+    best_1rm_kg = serializers.DecimalField(max_digits=7, decimal_places=2)
+
+
+class PersonalRecordSerializer(serializers.Serializer):
+    """Serializer for a day whose estimated one-rep max beat every earlier day."""
+    date = serializers.DateField()
+    estimated_1rm_kg = serializers.DecimalField(max_digits=7, decimal_places=2)
+    top_weight_kg = serializers.DecimalField(max_digits=6, decimal_places=2)
+    previous_best_1rm_kg = serializers.DecimalField(max_digits=7, decimal_places=2, allow_null=True)
+
+
+class ExerciseAnalyticsSerializer(serializers.Serializer):
+    """Serializer for the progress of one user on one exercise."""
+    user = serializers.IntegerField()
+    exercise = serializers.CharField()
+    weekly_volume = WeeklyVolumeSerializer(many=True)
+    estimated_1rm = EstimatedOneRepMaxSerializer(many=True)
+    personal_records = PersonalRecordSerializer(many=True)
+
+
+class CatalogExerciseSerializer(serializers.ModelSerializer):
+    """Serializer for an exercise catalog search result."""
+
+    class Meta:
+        model = CatalogExercise
+        fields = ['id', 'name']
@@ -0,0 +1,148 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import analytics, catalog
+from .adherence import schedule_refresh
+from .caches import exercise_catalog_cache, training_plan_cache
+from .models import (
+    CatalogExercise, Exercise, ExerciseAlias, TrainingPlan, TrainingPlanExercise, TrainingSession,
+)
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Exercise)
+@receiver(post_delete, sender=Exercise)
+def touch_session(sender, instance, **kwargs):
+    """Bump the session's ``updated_at`` so its ETag changes with its exercises."""
+    TrainingSession.objects.filter(pk=instance.session_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=TrainingPlanExercise)
+@receiver(post_delete, sender=TrainingPlanExercise)
+def touch_plan(sender, instance, **kwargs):
+    """Bump the plan's ``updated_at`` so its ETag changes with its exercises."""
+    TrainingPlan.objects.filter(pk=instance.plan_id).update(updated_at=timezone.now())
+    training_plan_cache.bump(instance.plan_id)
+
+
+@receiver(pre_save, sender=Exercise)
+def link_exercise(sender, instance, **kwargs):
+    catalog.link([instance], 'name')
+
+
+@receiver(pre_save, sender=TrainingPlanExercise)
+def link_plan_exercise(sender, instance, **kwargs):
+    catalog.link([instance], 'exercise_name')
+
+
+@receiver(pre_save, sender=ExerciseAlias)
+def set_alias_key(sender, instance, **kwargs):
+    instance.key = catalog.catalog_key(instance.name)
+
+
+@receiver(post_save, sender=CatalogExercise)
+def add_catalog_name_alias(sender, instance, created, **kwargs):
+    """A catalog exercise is found by its own name too."""
+    if created:
+        ExerciseAlias.objects.get_or_create(
+            key=catalog.catalog_key(instance.name),
+            defaults={'exercise': instance, 'name': instance.name},
+        )
+
+
+@receiver(post_save, sender=CatalogExercise)
+@receiver(post_delete, sender=CatalogExercise)
+@receiver(post_save, sender=ExerciseAlias)
+@receiver(post_delete, sender=ExerciseAlias)
+def invalidate_catalog_index(sender, instance, **kwargs):
+    exercise_catalog_cache.bump(catalog.SEARCH_INDEX)
+
+
+@receiver(post_save, sender=TrainingPlan)
+@receiver(post_delete, sender=TrainingPlan)
+def invalidate_plan(sender, instance, **kwargs):
+    training_plan_cache.bump(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_plans(sender, instance, created, update_fields=None, **kwargs):
+    """Plan documents embed coach and client usernames."""
+    if created or (update_fields is not None and 'username' not in update_fields):
+        return
+    plans = TrainingPlan.objects.filter(Q(coach=instance) | Q(user=instance)).values_list('pk', flat=True)
+    for plan_id in plans:
+        training_plan_cache.bump(plan_id)
+
+
+# Registered after the cache receivers above, so the plan's calendar is
+# invalidated before its adherence is refreshed from it.
+@receiver(post_init, sender=TrainingSession)
+def remember_session_adherence_key(sender, instance, **kwargs):
+    """Keep the loaded plan and date so a move refreshes the old week too."""
+    # Read __dict__ directly so deferred fields are not fetched.
+    instance._adherence_key = (instance.__dict__.get('training_plan_id'), instance.__dict__.get('date'))
+
+
+@receiver(post_save, sender=TrainingSession)
+@receiver(post_delete, sender=TrainingSession)
+def refresh_session_adherence(sender, instance, **kwargs):
+    old_plan_id, old_date = getattr(instance, '_adherence_key', (None, None))
+    if (old_plan_id, old_date) != (instance.training_plan_id, instance.date):
+        schedule_refresh(old_plan_id, [old_date])
+    schedule_refresh(instance.training_plan_id, [instance.date])
+    instance._adherence_key = (instance.training_plan_id, instance.date)
+
+
+@receiver(post_save, sender=Exercise)
+@receiver(post_delete, sender=Exercise)
+def refresh_exercise_adherence(sender, instance, **kwargs):
+    session = TrainingSession.objects.filter(pk=instance.session_id).values('training_plan_id', 'date').first()
+    if session is not None:
+        schedule_refresh(session['training_plan_id'], [session['date']])
+
+
+@receiver(post_save, sender=TrainingPlanExercise)
+@receiver(post_delete, sender=TrainingPlanExercise)
+def refresh_plan_adherence(sender, instance, **kwargs):
+    # A schedule change can affect any day of the plan.
+    schedule_refresh(instance.plan_id)
+
+
+@receiver(post_init, sender=TrainingPlan)
+def remember_plan_dates(sender, instance, **kwargs):
+    instance._adherence_dates = (instance.__dict__.get('start_date'), instance.__dict__.get('end_date'))
+
+
+@receiver(post_save, sender=TrainingPlan)
+def refresh_plan_dates_adherence(sender, instance, created, **kwargs):
+    """A new plan, or new plan dates, change which days have exercises planned."""
+    dates = (instance.start_date, instance.end_date)
+    if created or dates != getattr(instance, '_adherence_dates', None):
+        schedule_refresh(instance.pk)
+    instance._adherence_dates = dates
+
+
+@receiver(post_init, sender=TrainingSession)
+def remember_session_date(sender, instance, **kwargs):
+    instance._progress_date = instance.__dict__.get('date')
+
+
+@receiver(post_save, sender=TrainingSession)
+@receiver(post_delete, sender=TrainingSession)
+def refresh_session_progress(sender, instance, **kwargs):
+    """Moving a session to another day changes both days' exercise progress."""
+    dates = {instance._progress_date, instance.date} - {None}
+    analytics.schedule_refresh(instance.user_id, sorted(dates))
+    instance._progress_date = instance.date
+
+
+@receiver(post_save, sender=Exercise)
+@receiver(post_delete, sender=Exercise)
+def refresh_exercise_progress(sender, instance, **kwargs):
+    session = TrainingSession.objects.filter(pk=instance.session_id).values('user_id', 'date').first()
+    if session is not None:
+        analytics.schedule_refresh(session['user_id'], [session['date']])
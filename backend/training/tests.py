@@ -1,3 +1,610 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APITestCase
+
+from circus_grove.testing import QueryCountAssertions, QueryPlanAssertions
+
+from .adherence import DAY, MAX_VOLUME_DEVIATION, WEEK, refresh_adherence
+from .analytics import refresh_progress
+from .catalog import MAX_RESULTS, PrefixIndex, build_catalog, catalog_key, cluster_names
+from .models import CatalogExercise, Exercise, ExerciseAlias, ExerciseProgress, TrainingAdherence, TrainingPlan, TrainingPlanExercise, TrainingSession
+from .serializers import TrainingSessionCreateSerializer
+
+User = get_user_model()
+
+
+class ListIndexTests(QueryPlanAssertions, APITestCase):
+    """The list endpoints read their pages in order from the composite indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.coach = User.objects.create_user(username='coach', email='coach@example.com', user_type='coach')
+        cls.client_user = User.objects.create_user(username='client', email='client@example.com', coach=cls.coach)
+        plan = TrainingPlan.objects.create(coach=cls.coach, user=cls.client_user, name='Block', start_date=date(2024, 1, 1))
+        session = TrainingSession.objects.create(
+            user=cls.client_user, training_plan=plan, title='Session', date=date(2024, 1, 1), duration_minutes=60,
+        )
+        session.exercises.create(name='Squat', sets=5, reps=5)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_session_list(self):
+        self.client.force_authenticate(self.client_user)
+        self.assertListIndexScan('training_session_user_idx', '/api/training/sessions/')
+        self.assertListIndexScan('training_session_user_idx', '/api/training/sessions/', pagination='cursor')
+
+    def test_plan_list(self):
+        self.client.force_authenticate(self.client_user)
+        self.assertListIndexScan('training_plan_user_idx', '/api/training/plans/')
+        self.client.force_authenticate(self.coach)
+        self.assertListIndexScan('training_plan_coach_idx', '/api/training/plans/')
+
+
+class QueryCountTests(QueryCountAssertions, APITestCase):
+    """Lists and details take the same number of queries however many rows and children they hold."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.coach = User.objects.create_user(username='coach', email='coach@example.com', user_type='coach')
+        cls.user = User.objects.create_user(username='client', email='client@example.com', coach=cls.coach)
+        for day in range(1, 4):
+            plan = TrainingPlan.objects.create(
+                coach=cls.coach, user=cls.user, name=f'Block {day}', start_date=date(2024, 1, day),
+            )
+            session = TrainingSession.objects.create(
+                user=cls.user, training_plan=plan, title=f'Session {day}', date=date(2024, 1, day),
+                duration_minutes=60,
+            )
+            for order, name in enumerate(('Squat', 'Bench press', 'Row')):
+                plan.exercises.create(exercise_name=name, day_of_week=order, sets=5, reps=5, order=order)
+                session.exercises.create(name=name, sets=5, reps=5)
+        cls.plan, cls.session = plan, session
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def test_session_list(self):
+        # The ETag validator, the page count and the page.
+        self.assertGetQueries(3, '/api/training/sessions/')
+        self.assertGetQueries(3, '/api/training/sessions/', expand='exercises')
+
+    def test_session_detail(self):
+        # The validator, the session with its user and plan, and its exercises.
+        self.assertGetQueries(3, f'/api/training/sessions/{self.session.pk}/')
+
+    def test_plan_list(self):
+        self.assertGetQueries(3, '/api/training/plans/')
+        self.client.force_authenticate(self.coach)
+        self.assertGetQueries(3, '/api/training/plans/')
+
+    def test_plan_detail(self):
+        self.client.force_authenticate(self.coach)
+        # Plan documents are cached (see training.caches), so only the first GET reads the plan.
+        with self.assertNumQueries(4):
+            self.client.get(f'/api/training/plans/{self.plan.pk}/')
+        self.assertGetQueries(2, f'/api/training/plans/{self.plan.pk}/')
+
+
+class NestedCreateTests(APITestCase):
+    """Sessions and plans are written with their children in one transaction and one insert per table."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.coach = User.objects.create_user(username='coach', email='coach@example.com', user_type='coach')
+        cls.user = User.objects.create_user(username='client', email='client@example.com', coach=cls.coach)
+
+    def session(self, exercises):
+        return {'title': 'Push', 'date': '2024-01-01', 'duration_minutes': 60, 'intensity': 'high', 'exercises': exercises}
+
+    def plan(self, exercises, name='Block'):
+        return {'user': self.user.pk, 'name': name, 'start_date': '2024-01-01', 'exercises': exercises}
+
+    def post_queries(self, path, data):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(path, data, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return len(queries)
+
+    def test_children_take_a_constant_number_of_queries(self):
+        self.client.force_authenticate(self.user)
+        exercises = [{'name': f'Lift {i}', 'sets': 3, 'reps': 8} for i in range(6)]
+        self.assertEqual(
+            self.post_queries('/api/training/sessions/', self.session(exercises[:1])),
+            self.post_queries('/api/training/sessions/', self.session(exercises)),
+        )
+        self.assertEqual(Exercise.objects.filter(session__user=self.user).count(), 7)
+
+        self.client.force_authenticate(self.coach)
+        exercises = [{'exercise_name': f'Lift {i}', 'day_of_week': i, 'sets': 3, 'reps': 8} for i in range(6)]
+        self.assertEqual(
+            self.post_queries('/api/training/plans/', self.plan(exercises[:1])),
+            self.post_queries('/api/training/plans/', self.plan(exercises, name='Block 2')),
+        )
+        self.assertEqual(TrainingPlanExercise.objects.filter(plan__coach=self.coach).count(), 7)
+
+    def test_invalid_child_is_rejected_with_its_parent(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            '/api/training/sessions/', self.session([{'name': 'Squat', 'sets': 3, 'reps': 5}, {'name': 'Row'}]),
+            format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('exercises', response.json())
+        self.assertFalse(TrainingSession.objects.exists())
+
+    def test_plan_exercise_needs_a_day(self):
+        self.client.force_authenticate(self.coach)
+        response = self.client.post(
+            '/api/training/plans/', self.plan([{'exercise_name': 'Squat', 'sets': 3, 'reps': 5}]), format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('exercises', response.json())
+        self.assertFalse(TrainingPlan.objects.exists())
+
+    def test_failed_child_insert_rolls_back_the_parent(self):
+        serializer = TrainingSessionCreateSerializer()
+        data = self.session([{'name': 'Squat', 'sets': 3, 'reps': 5}, {'name': 'Row', 'sets': -1, 'reps': 5}])
+        with self.assertRaises(IntegrityError):
+            serializer.create({**data, 'date': date(2024, 1, 1), 'user': self.user})
+        self.assertFalse(TrainingSession.objects.exists())
+        self.assertFalse(Exercise.objects.exists())
+
+
+class ConditionalGetTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='client', email='client@example.com')
+        cls.sessions = [
+            TrainingSession.objects.create(user=cls.user, title=title, date=date(2024, 1, day), duration_minutes=45)
+            for day, title in ((1, 'Legs'), (2, 'Push'))
+        ]
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def test_list_etag_changes_when_a_row_is_deleted(self):
+        response = self.client.get('/api/training/sessions/')
+        self.assertNotIn('Last-Modified', response)
+        etag = response['ETag']
+        self.assertEqual(self.client.get('/api/training/sessions/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Not the latest row, so MAX(updated_at) stays the same.
+        self.sessions[0].delete()
+        response = self.client.get('/api/training/sessions/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 1)
+        response = self.client.get('/api/training/sessions/', HTTP_IF_MODIFIED_SINCE=http_date())
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_etag_changes_when_an_embedded_row_is_renamed(self):
+        coach = User.objects.create_user(username='coach', email='coach@example.com', user_type='coach')
+        self.user.coach = coach
+        self.user.save()
+        plan = TrainingPlan.objects.create(coach=coach, user=self.user, name='Block', start_date=date(2024, 1, 1))
+        self.sessions[1].training_plan = plan
+        self.sessions[1].save()
+
+        etag = self.client.get('/api/training/sessions/')['ETag']
+        plan.name = 'Peaking block'
+        plan.save()
+        response = self.client.get('/api/training/sessions/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['training_plan_name'], 'Peaking block')
+
+        self.client.force_authenticate(coach)
+        etag = self.client.get('/api/training/plans/')['ETag']
+        self.user.username = 'renamed'
+        self.user.save()
+        response = self.client.get('/api/training/plans/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['user_username'], 'renamed')
+
+    def test_detail_has_last_modified(self):
+        response = self.client.get(f'/api/training/sessions/{self.sessions[1].pk}/')
+        self.assertIn('Last-Modified', response)
+        response = self.client.get(
+            f'/api/training/sessions/{self.sessions[1].pk}/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        self.assertEqual(response.status_code, 304)
+
+
+class CalendarTests(APITestCase):
+    """Weekly and one-off plan exercises expanded into the days of a date range."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.coach = User.objects.create_user(username='coach', email='coach@example.com', user_type='coach')
+        cls.user = User.objects.create_user(username='client', email='client@example.com', coach=cls.coach)
+        # Monday 2024-01-01 to Sunday 2024-01-14.
+        block = TrainingPlan.objects.create(
+            coach=cls.coach, user=cls.user, name='Block', start_date=date(2024, 1, 1), end_date=date(2024, 1, 14),
+        )
+        for order, name, weekday, scheduled in (
+            (0, 'Squat', 0, None),
+            (1, 'Bench press', 2, None),
+            (2, 'Deadlift', 0, None),
+            (3, 'Test day', None, date(2024, 1, 10)),
+            (4, 'Retest', None, date(2024, 1, 20)),
+        ):
+            block.exercises.create(
+                exercise_name=name, day_of_week=weekday, scheduled_date=scheduled, sets=5, reps=5, order=order,
+            )
+        cls.running = TrainingPlan.objects.create(
+            coach=cls.coach, user=cls.user, name='Running', start_date=date(2024, 1, 8),
+        )
+        cls.running.exercises.create(exercise_name='Run', day_of_week=4, sets=1, reps=1)
+
+    def setUp(self):
+        # Plan ids repeat across tests; drop calendars compiled for earlier plans.
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def calendar(self, start, end, path='/api/training/calendar/'):
+        response = self.client.get(path, {'from': start, 'to': end})
+        self.assertEqual(response.status_code, 200)
+        calendar = response.json()
+        days = {day['date']: [exercise['exercise_name'] for exercise in day['exercises']] for day in calendar['days']}
+        self.assertEqual(calendar['count'], sum(map(len, days.values())))
+        return days
+
+    def test_weekly_and_one_off_exercises_within_the_plan_dates(self):
+        self.assertEqual(self.calendar('2024-01-01', '2024-01-21'), {
+            '2024-01-01': ['Squat', 'Deadlift'],
+            '2024-01-03': ['Bench press'],
+            '2024-01-08': ['Squat', 'Deadlift'],
+            '2024-01-10': ['Bench press', 'Test day'],
+            '2024-01-12': ['Run'],
+            # The retest falls after the block ends.
+            '2024-01-19': ['Run'],
+        })
+
+    def test_range_starting_mid_week(self):
+        self.assertEqual(self.calendar('2024-01-02', '2024-01-09'), {
+            '2024-01-03': ['Bench press'],
+            '2024-01-08': ['Squat', 'Deadlift'],
+        })
+
+    def test_open_ended_plan_is_clipped_to_the_range(self):
+        self.assertEqual(
+            self.calendar('2024-01-20', '2024-02-02'), {'2024-01-26': ['Run'], '2024-02-02': ['Run']},
+        )
+        days = self.calendar('2025-06-01', '2025-06-30', path=f'/api/training/plans/{self.running.pk}/calendar/')
+        self.assertEqual(list(days), ['2025-06-06', '2025-06-13', '2025-06-20', '2025-06-27'])
+
+    def test_empty_ranges(self):
+        self.assertEqual(self.calendar('2023-12-01', '2023-12-31'), {})
+        self.assertEqual(self.calendar('2024-01-04', '2024-01-07'), {})
+        self.assertEqual(self.calendar('2024-01-10', '2024-01-10'), {'2024-01-10': ['Bench press', 'Test day']})
+        response = self.client.get('/api/training/calendar/', {'from': '2024-01-07', 'to': '2024-01-01'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ClientParamTests(APITestCase):
+    """Coaches pick a client with ``?user=``; anything but a client id is rejected."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.coach = User.objects.create_user(username='coach', email='coach@example.com', user_type='coach')
+        cls.client_user = User.objects.create_user(username='client', email='client@example.com', coach=cls.coach)
+        cls.stranger = User.objects.create_user(username='stranger', email='stranger@example.com')
+
+    def setUp(self):
+        self.client.force_authenticate(self.coach)
+
+    def assertClientParam(self, path):
+        self.assertEqual(self.client.get(path, {'user': self.client_user.pk}).status_code, 200)
+        response = self.client.get(path, {'user': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('user', response.json())
+        self.assertEqual(self.client.get(path, {'user': self.stranger.pk}).status_code, 404)
+
+    def test_calendar(self):
+        self.assertClientParam('/api/training/calendar/')
+
+    def test_analytics(self):
+        self.assertClientParam('/api/training/analytics/')
+
+
+class AdherenceRefreshTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        coach = User.objects.create_user(username='coach', email='coach@example.com', user_type='coach')
+        cls.user = User.objects.create_user(username='client', email='client@example.com', coach=coach)
+        cls.day = timezone.localdate() - timedelta(days=1)
+        cls.plan = TrainingPlan.objects.create(coach=coach, user=cls.user, name='Plan', start_date=cls.day)
+        TrainingPlanExercise.objects.create(
+            plan=cls.plan, exercise_name='Curl', day_of_week=cls.day.weekday(), sets=1, reps=1,
+            weight_kg=Decimal('0.01'),
+        )
+        session = TrainingSession.objects.create(
+            user=cls.user, training_plan=cls.plan, title='Arms', date=cls.day, duration_minutes=30,
+        )
+        session.exercises.create(name='Curl', sets=10, reps=10, weight_kg=Decimal('9999.99'))
+
+    def setUp(self):
+        # Plan ids repeat across tests; drop calendars compiled for earlier plans.
+        cache.clear()
+
+    def test_volume_deviation_is_clamped(self):
+        refresh_adherence(self.plan.pk)
+        for period in (DAY, WEEK):
+            rollup = TrainingAdherence.objects.get(plan=self.plan, period=period)
+            self.assertEqual(rollup.volume_deviation_pct, MAX_VOLUME_DEVIATION)
+
+    def test_refresh_locks_the_plan(self):
+        if not connection.features.has_select_for_update:
+            self.skipTest(f'{connection.vendor} has no row locks.')
+        with CaptureQueriesContext(connection) as queries:
+            refresh_adherence(self.plan.pk, [self.day])
+        plan_queries = [query['sql'] for query in queries if 'training_plans' in query['sql']]
+        self.assertIn('FOR UPDATE', plan_queries[0])
+
+
+class ProgressRefreshTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='client', email='client@example.com')
+        session = TrainingSession.objects.create(user=cls.user, title='Legs', date=date(2024, 1, 1), duration_minutes=45)
+        session.exercises.create(name=' Squat', sets=5, reps=5, weight_kg=Decimal('100.00'))
+
+    def test_refresh_is_repeatable(self):
+        refresh_progress(self.user.pk, [date(2024, 1, 1)])
+        refresh_progress(self.user.pk, [date(2024, 1, 1)])
+        row = ExerciseProgress.objects.get(user=self.user)
+        self.assertEqual((row.exercise_name, row.volume_kg), ('squat', Decimal('2500.00')))
+
+    def test_refresh_locks_the_user(self):
+        if not connection.features.has_select_for_update:
+            self.skipTest(f'{connection.vendor} has no row locks.')
+        with CaptureQueriesContext(connection) as queries:
+            refresh_progress(self.user.pk, [date(2024, 1, 1)])
+        user_queries = [query['sql'] for query in queries if User._meta.db_table in query['sql']]
+        self.assertIn('FOR UPDATE', user_queries[0])
+
+
+class CatalogMatchingTests(APITestCase):
+    """Progress and adherence follow catalog links, and names where there are none."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.bench = CatalogExercise.objects.create(name='Bench Press')
+        ExerciseAlias.objects.create(exercise=cls.bench, name='BB bench')
+        coach = User.objects.create_user(username='coach', email='coach@example.com', user_type='coach')
+        cls.user = User.objects.create_user(username='client', email='client@example.com', coach=coach)
+        cls.day = timezone.localdate() - timedelta(days=1)
+        cls.plan = TrainingPlan.objects.create(coach=coach, user=cls.user, name='Plan', start_date=cls.day)
+        for name in ('Bench Press', 'Hip thrust'):
+            TrainingPlanExercise.objects.create(
+                plan=cls.plan, exercise_name=name, day_of_week=cls.day.weekday(), sets=3, reps=10,
+            )
+        cls.session = TrainingSession.objects.create(
+            user=cls.user, training_plan=cls.plan, title='Push', date=cls.day, duration_minutes=60,
+        )
+        cls.session.exercises.create(name='BB bench', sets=3, reps=10, weight_kg=Decimal('60.00'))
+        cls.session.exercises.create(name='bench press ', sets=1, reps=5, weight_kg=Decimal('70.00'))
+        cls.session.exercises.create(name='hip  THRUST', sets=3, reps=10)
+
+    def setUp(self):
+        # Plan ids repeat across tests; drop calendars compiled for earlier plans.
+        cache.clear()
+
+    def test_progress_groups_by_catalog_exercise(self):
+        self.session.exercises.create(name='Hip thrust', sets=2, reps=8, weight_kg=Decimal('100.00'))
+        refresh_progress(self.user.pk)
+        rows = ExerciseProgress.objects.filter(user=self.user).order_by('exercise_name')
+        self.assertEqual(
+            [(row.exercise_name, row.sets, row.reps) for row in rows],
+            [('bench press', 4, 35), ('hip thrust', 5, 46)],
+        )
+        # 'hip  THRUST' has no weight, so the merged day takes the other's.
+        self.assertEqual((rows[1].volume_kg, rows[1].top_weight_kg), (Decimal('1600.00'), Decimal('100.00')))
+
+    def test_analytics_exercise_is_resolved_through_aliases(self):
+        refresh_progress(self.user.pk)
+        self.client.force_authenticate(self.user)
+        response = self.client.get('/api/training/analytics/', {'exercise': 'bb bench'})
+        self.assertEqual([row['exercise'] for row in response.json()['exercises']], ['bench press'])
+        response = self.client.get('/api/training/analytics/', {'exercise': ' Hip   Thrust'})
+        self.assertEqual([row['exercise'] for row in response.json()['exercises']], ['hip thrust'])
+
+    def test_adherence_matches_by_catalog_exercise_then_name(self):
+        refresh_adherence(self.plan.pk)
+        day = TrainingAdherence.objects.get(plan=self.plan, period=DAY)
+        self.assertEqual((day.completed_exercises, day.unplanned_exercises), (2, 1))
+        self.assertEqual(day.actual_reps, 60)
+
+    def test_relinking_refreshes_progress(self):
+        refresh_progress(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            build_catalog([('Hip Thrust', ['Hip Thrust', 'hip  THRUST'])])
+        rows = ExerciseProgress.objects.filter(user=self.user).order_by('exercise_name')
+        self.assertEqual([row.exercise_name for row in rows], ['bench press', 'hip thrust'])
+
+
+class CatalogKeyTests(SimpleTestCase):
+    """Spellings of one exercise share a catalog key and a cluster; different exercises do not."""
+
+    def test_catalog_key(self):
+        for name, key in (
+            ('Bench Press', 'bench press'),
+            ('  bench   PRESS ', 'bench press'),
+            ('BB Bench-Presses', 'barbell bench press'),
+            ('DB Curls', 'dumbbell curl'),
+            ('OHP', 'overhead press'),
+            ('RDL', 'romanian deadlift'),
+            ('Romanian Deadlifts', 'romanian deadlift'),
+            ('Squats', 'squat'),
+            ('Glasses', 'glass'),
+        ):
+            with self.subTest(name=name):
+                self.assertEqual(catalog_key(name), key)
+
+    def test_spellings_are_clustered(self):
+        clusters = cluster_names({
+            'Bench Press': 10, 'BB bench': 3, 'bench  press': 1, 'Bench prss': 1, 'Benchpress': 1,
+            'Lat pulldown': 2, 'lat pull-down': 1, 'Squats': 4, 'squat': 1, 'DB Curls': 1, 'dumbbell curl': 2,
+        })
+        self.assertEqual(clusters, [
+            ('Bench Press', ['BB bench', 'Bench Press', 'Bench prss', 'Benchpress', 'bench  press']),
+            ('Lat pulldown', ['Lat pulldown', 'lat pull-down']),
+            ('Squats', ['Squats', 'squat']),
+            ('dumbbell curl', ['DB Curls', 'dumbbell curl']),
+        ])
+
+    def test_distinct_exercises_stay_apart(self):
+        counts = {
+            'Bench Press': 10, 'Incline Bench Press': 4, 'Deadlift': 10, 'Romanian deadlift': 5, 'RDL': 2,
+            'Curl': 1, 'Bicep curl': 3, 'Hammer curl': 3, 'Leg curl': 3, 'Leg press': 3, 'Squat': 5, 'Front squat': 4,
+        }
+        clusters = dict(cluster_names(counts))
+        self.assertEqual(clusters.pop('Romanian deadlift'), ['RDL', 'Romanian deadlift'])
+        self.assertEqual(clusters, {name: [name] for name in counts.keys() - {'Romanian deadlift', 'RDL'}})
+
+
+class PrefixIndexTests(SimpleTestCase):
+    """Search ranks matches at the start of a key first, then shorter names, then names alphabetically."""
+
+    aliases = [
+        (1, 'Bench Press', 'barbell bench press'),
+        (1, 'Bench Press', 'bench press'),
+        (2, 'Incline Bench Press', 'incline bench press'),
+        (3, 'Leg Press', 'leg press'),
+        (4, 'Overhead Press', 'overhead press'),
+        (5, 'Press', 'press'),
+        (6, 'Bent Over Row', 'bent over row'),
+    ]
+
+    def search(self, key, limit=MAX_RESULTS):
+        return [result['name'] for result in PrefixIndex(self.aliases).search(key, limit)]
+
+    def test_ordering(self):
+        # Bench Press matches through both of its aliases but is listed once.
+        self.assertEqual(self.search('b'), ['Bench Press', 'Bent Over Row', 'Incline Bench Press'])
+        self.assertEqual(
+            self.search('press'), ['Press', 'Leg Press', 'Bench Press', 'Overhead Press', 'Incline Bench Press'],
+        )
+        self.assertEqual(self.search('incline b'), ['Incline Bench Press'])
+        self.assertEqual(self.search('row'), ['Bent Over Row'])
+        self.assertEqual(self.search('x'), [])
+
+    def test_limit(self):
+        self.assertEqual(self.search('press', 3), ['Press', 'Leg Press', 'Bench Press'])
+        self.assertEqual(self.search('b', 1), ['Bench Press'])
+
+    def test_trie_nodes_match_range_scans(self):
+        keys = {key[:end] for _, _, key in self.aliases for end in range(1, len(key) + 1)}
+        expected = {(key, limit): self.search(key, limit) for key in keys for limit in (1, 3, MAX_RESULTS)}
+        with patch.object(PrefixIndex, 'BURST', 2):
+            found = {(key, limit): self.search(key, limit) for key in keys for limit in (1, 3, MAX_RESULTS)}
+        self.assertEqual(found, expected)
+
+
+class ExerciseSearchTests(APITestCase):
+    """The search endpoint autocompletes names from the catalog and sees catalog changes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='client', email='client@example.com')
+        cls.bench = CatalogExercise.objects.create(name='Bench Press')
+        ExerciseAlias.objects.create(exercise=cls.bench, name='BB bench')
+        for name in ('Incline Bench Press', 'Leg Press', 'Press'):
+            CatalogExercise.objects.create(name=name)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def search(self, **params):
+        response = self.client.get('/api/training/exercises/search/', params)
+        self.assertEqual(response.status_code, 200)
+        return [result['name'] for result in response.json()['results']]
+
+    def test_results(self):
+        self.assertEqual(self.search(q='Press'), ['Press', 'Leg Press', 'Bench Press', 'Incline Bench Press'])
+        self.assertEqual(self.search(q='press', limit=2), ['Press', 'Leg Press'])
+        self.assertEqual(self.search(q='bb  ben'), ['Bench Press'])
+        response = self.client.get('/api/training/exercises/search/', {'q': 'bench'})
+        self.assertEqual(response.json()['results'][0], {'id': self.bench.pk, 'name': 'Bench Press'})
+
+    def test_blank_query(self):
+        self.assertEqual(self.search(), [])
+        self.assertEqual(self.search(q='  -  '), [])
+
+    def test_invalid_limit(self):
+        for limit in ('0', str(MAX_RESULTS + 1), 'ten'):
+            with self.subTest(limit=limit):
+                response = self.client.get('/api/training/exercises/search/', {'q': 'press', 'limit': limit})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('limit', str(response.json()))
+
+    def test_index_follows_catalog_changes(self):
+        # The index is rebuilt once the write that bumped its version commits.
+        self.assertEqual(self.search(q='row'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            row = CatalogExercise.objects.create(name='Bent Over Row')
+        self.assertEqual(self.search(q='row'), ['Bent Over Row'])
+        with self.captureOnCommitCallbacks(execute=True):
+            ExerciseAlias.objects.create(exercise=row, name='Barbell row')
+        self.assertEqual(self.search(q='barbell'), ['Bench Press', 'Bent Over Row'])
+        with self.captureOnCommitCallbacks(execute=True):
+            row.delete()
+        self.assertEqual(self.search(q='row'), [])
+
+
+class ClusterExercisesCommandTests(TestCase):
+    """cluster_exercises groups logged and planned names into the catalog and links the exercises."""
+
+    @classmethod
+    def setUpTestData(cls):
+        coach = User.objects.create_user(username='coach', email='coach@example.com', user_type='coach')
+        user = User.objects.create_user(username='client', email='client@example.com', coach=coach)
+        plan = TrainingPlan.objects.create(coach=coach, user=user, name='Plan', start_date=date(2024, 1, 1))
+        for name in ('Bench Press', 'Squat', 'Squat'):
+            TrainingPlanExercise.objects.create(plan=plan, exercise_name=name, day_of_week=0, sets=3, reps=10)
+        session = TrainingSession.objects.create(
+            user=user, training_plan=plan, title='Push', date=date(2024, 1, 1), duration_minutes=60,
+        )
+        for name in ('Bench Press', 'BB bench', 'bench press ', 'Squats'):
+            session.exercises.create(name=name, sets=3, reps=10)
+
+    def call(self, *args):
+        out = StringIO()
+        call_command('cluster_exercises', *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run(self):
+        self.assertEqual(
+            self.call('--dry-run'), 'Bench Press: BB bench, Bench Press, bench press \nSquat: Squat, Squats\n2 exercise(s).\n',
+        )
+        self.assertFalse(CatalogExercise.objects.exists())
+
+    def test_builds_catalog_and_links_exercises(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            output = self.call()
+        self.assertIn('Added 2 catalog exercise(s) and 3 alias(es); relinked 7 exercise(s).', output)
+        bench, squat = CatalogExercise.objects.order_by('name')
+        self.assertEqual((bench.name, squat.name), ('Bench Press', 'Squat'))
+        self.assertEqual(
+            sorted(bench.aliases.values_list('key', flat=True)), ['barbell bench', 'bench press'],
+        )
+        self.assertEqual(
+            sorted(Exercise.objects.values_list('name', 'catalog_exercise__name')),
+            [('BB bench', 'Bench Press'), ('Bench Press', 'Bench Press'), ('Squats', 'Squat'),
+             ('bench press ', 'Bench Press')],
+        )
+        self.assertFalse(TrainingPlanExercise.objects.filter(catalog_exercise=None).exists())
+        # Running it again finds nothing new.
+        self.assertIn('Added 0 catalog exercise(s) and 0 alias(es); relinked 0 exercise(s).', self.call())
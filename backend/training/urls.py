@@ -5,7 +5,12 @@ from .views import (
     ExerciseListCreateView,
     TrainingPlanListCreateView,
     TrainingPlanDetailView,
-    TrainingPlanExerciseListCreateView
+    TrainingPlanExerciseListCreateView,
+    TrainingPlanCalendarView,
+    TrainingCalendarView,
+    TrainingPlanAdherenceView,
+    TrainingAnalyticsView,
+    ExerciseCatalogSearchView
 )
 
 app_name = 'training'
@@ -17,4 +22,9 @@ urlpatterns = [
     path('plans/', TrainingPlanListCreateView.as_view(), name='plan-list'),
     path('plans/<int:pk>/', TrainingPlanDetailView.as_view(), name='plan-detail'),
     path('plans/<int:plan_id>/exercises/', TrainingPlanExerciseListCreateView.as_view(), name='plan-exercise-list'),
+    path('plans/<int:plan_id>/calendar/', TrainingPlanCalendarView.as_view(), name='plan-calendar'),
+    path('plans/<int:plan_id>/adherence/', TrainingPlanAdherenceView.as_view(), name='plan-adherence'),
+    path('calendar/', TrainingCalendarView.as_view(), name='calendar'),
+    path('analytics/', TrainingAnalyticsView.as_view(), name='analytics'),
+    path('exercises/search/', ExerciseCatalogSearchView.as_view(), name='exercise-search'),
 ]
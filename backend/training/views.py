@@ -1,17 +1,40 @@
 from rest_framework import generics, permissions
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
-from .models import TrainingSession, Exercise, TrainingPlan, TrainingPlanExercise
+from circus_grove.asynchronous import AsyncReadMixin
+from circus_grove.cache import CachedRetrieveMixin
+from circus_grove.clients import get_client
+from circus_grove.conditional import ConditionalGetMixin
+from circus_grove.dates import parse_date_range
+from circus_grove.pagination import KeysetPaginationMixin
+from circus_grove.prefetch import PrefetchQuerysetMixin
+from circus_grove.values import ValuesListMixin
+from .caches import training_plan_cache
+from .adherence import DAY, WEEK, week_start
+from .analytics import get_analytics
+from .catalog import MAX_RESULTS, resolve, search
+from .models import TrainingSession, Exercise, TrainingPlan, TrainingPlanExercise, TrainingAdherence
 from .serializers import (
     TrainingSessionSerializer,
+    TrainingSessionListSerializer,
     TrainingSessionCreateSerializer,
     ExerciseSerializer,
     TrainingPlanSerializer,
+    TrainingPlanListSerializer,
     TrainingPlanCreateSerializer,
-    TrainingPlanExerciseSerializer
+    TrainingPlanExerciseSerializer,
+    TrainingCalendarDaySerializer,
+    TrainingAdherenceSerializer,
+    ExerciseAnalyticsSerializer,
+    CatalogExerciseSerializer
 )
 
+User = get_user_model()
 
-class TrainingSessionListCreateView(generics.ListCreateAPIView):
+
+class TrainingSessionListCreateView(AsyncReadMixin, ConditionalGetMixin, ValuesListMixin, KeysetPaginationMixin, PrefetchQuerysetMixin, generics.ListCreateAPIView):
     """View for listing and creating training sessions."""
     permission_classes = [permissions.IsAuthenticated]
 
@@ -21,13 +44,13 @@ class TrainingSessionListCreateView(generics.ListCreateAPIView):
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return TrainingSessionCreateSerializer
-        return TrainingSessionSerializer
+        return TrainingSessionListSerializer
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 
-class TrainingSessionDetailView(generics.RetrieveUpdateDestroyAPIView):
+class TrainingSessionDetailView(AsyncReadMixin, ConditionalGetMixin, PrefetchQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """View for retrieving, updating, and deleting a training session."""
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = TrainingSessionSerializer
@@ -36,10 +59,11 @@ class TrainingSessionDetailView(generics.RetrieveUpdateDestroyAPIView):
         return TrainingSession.objects.filter(user=self.request.user)
 
 
-class ExerciseListCreateView(generics.ListCreateAPIView):
+class ExerciseListCreateView(ConditionalGetMixin, ValuesListMixin, generics.ListCreateAPIView):
     """View for listing and creating exercises."""
     serializer_class = ExerciseSerializer
     permission_classes = [permissions.IsAuthenticated]
+    last_modified_field = 'session__updated_at'
 
     def get_queryset(self):
         session_id = self.kwargs.get('session_id')
@@ -51,7 +75,7 @@ class ExerciseListCreateView(generics.ListCreateAPIView):
         serializer.save(session=session)
 
 
-class TrainingPlanListCreateView(generics.ListCreateAPIView):
+class TrainingPlanListCreateView(AsyncReadMixin, ConditionalGetMixin, ValuesListMixin, PrefetchQuerysetMixin, generics.ListCreateAPIView):
     """View for listing and creating training plans."""
     permission_classes = [permissions.IsAuthenticated]
 
@@ -67,7 +91,7 @@ class TrainingPlanListCreateView(generics.ListCreateAPIView):
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return TrainingPlanCreateSerializer
-        return TrainingPlanSerializer
+        return TrainingPlanListSerializer
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -79,10 +103,11 @@ class TrainingPlanListCreateView(generics.ListCreateAPIView):
         serializer.save()
 
 
-class TrainingPlanDetailView(generics.RetrieveUpdateDestroyAPIView):
+class TrainingPlanDetailView(AsyncReadMixin, ConditionalGetMixin, CachedRetrieveMixin, PrefetchQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """View for retrieving, updating, and deleting a training plan."""
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = TrainingPlanSerializer
+    document_cache = training_plan_cache
 
     def get_queryset(self):
         user = self.request.user
@@ -92,7 +117,7 @@ class TrainingPlanDetailView(generics.RetrieveUpdateDestroyAPIView):
             return TrainingPlan.objects.filter(user=user)
 
 
-class TrainingPlanExerciseListCreateView(generics.ListCreateAPIView):
+class TrainingPlanExerciseListCreateView(ConditionalGetMixin, generics.ListCreateAPIView):
     """View for listing and creating exercises in a training plan."""
     serializer_class = TrainingPlanExerciseSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -116,3 +141,111 @@ class TrainingPlanExerciseListCreateView(generics.ListCreateAPIView):
             plan = get_object_or_404(TrainingPlan, id=plan_id, user=user)
         serializer.save(plan=plan)
 
+
+class TrainingPlanCalendarView(generics.GenericAPIView):
+    """View for the days of a date range on which one training plan schedules exercises."""
+    serializer_class = TrainingCalendarDaySerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, plan_id):
+        user = request.user
+        if user.user_type == 'coach':
+            plans = TrainingPlan.objects.filter(id=plan_id, coach=user)
+        else:
+            plans = TrainingPlan.objects.filter(id=plan_id, user=user)
+        get_object_or_404(plans.only('id'))
+        start, end = parse_date_range(request, default_days=28, upcoming=True)
+
+        # Imported on first use, so processes that never serve calendars skip loading NumPy.
+        from .calendar import get_calendar
+
+        return Response({'plan': plan_id, **get_calendar(plans, start, end)})
+
+
+class TrainingCalendarView(generics.GenericAPIView):
+    """View for the days of a date range on which active training plans schedule exercises."""
+    serializer_class = TrainingCalendarDaySerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        user = request.user
+        if user.user_type == 'coach':
+            # Coaches see the plans they created, optionally for one client
+            plans = TrainingPlan.objects.filter(coach=user, is_active=True)
+            if 'user' in request.query_params:
+                plans = plans.filter(user=get_client(request, request.query_params['user']))
+        else:
+            plans = TrainingPlan.objects.filter(user=user, is_active=True)
+        start, end = parse_date_range(request, default_days=28, upcoming=True)
+
+        from .calendar import get_calendar
+
+        return Response(get_calendar(plans, start, end))
+
+
+class TrainingPlanAdherenceView(generics.GenericAPIView):
+    """View for per-day and per-week adherence to a training plan."""
+    serializer_class = TrainingAdherenceSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, plan_id):
+        user = request.user
+        if user.user_type == 'coach':
+            plan = get_object_or_404(TrainingPlan, id=plan_id, coach=user)
+        else:
+            plan = get_object_or_404(TrainingPlan, id=plan_id, user=user)
+        start, end = parse_date_range(request, default_days=28)
+
+        rollups = TrainingAdherence.objects.filter(plan=plan)
+        days = rollups.filter(period=DAY, date__range=(start, end))
+        weeks = rollups.filter(period=WEEK, date__range=(week_start(start), end))
+        return Response({
+            'plan': plan.id,
+            'from': start,
+            'to': end,
+            'days': self.get_serializer(days, many=True).data,
+            'weeks': self.get_serializer(weeks, many=True).data,
+        })
+
+
+class TrainingAnalyticsView(generics.GenericAPIView):
+    """View for weekly volume, estimated one-rep maxes and personal records per exercise."""
+    serializer_class = ExerciseAnalyticsSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        user = request.user
+        if user.user_type == 'coach':
+            # Coaches see all their clients, optionally one of them
+            users = User.objects.filter(coach=user)
+            if 'user' in request.query_params:
+                users = users.filter(pk=get_client(request, request.query_params['user']).pk)
+        else:
+            users = User.objects.filter(pk=user.pk)
+        start, end = parse_date_range(request, default_days=84)
+
+        exercise_name = request.query_params.get('exercise')
+        if exercise_name is not None:
+            exercise_name = resolve(exercise_name)
+        exercises = get_analytics(users, start, end, exercise_name=exercise_name)
+        return Response({
+            'from': start,
+            'to': end,
+            'exercises': self.get_serializer(exercises, many=True).data,
+        })
+
+
+class ExerciseCatalogSearchView(generics.GenericAPIView):
+    """View for autocompleting exercise names from the catalog."""
+    serializer_class = CatalogExerciseSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= MAX_RESULTS:
+            raise ValidationError(f"'limit' must be a number from 1 to {MAX_RESULTS}.")
+        results = search(request.query_params.get('q', ''), limit)
+        return Response({'results': self.get_serializer(results, many=True).data})
@@ -0,0 +1,111 @@
+"""
+JWT authentication that answers most requests from the token alone.
+
+Access tokens carry the user fields our views branch on (``user_type``,
+``coach_id``, ``is_active`` and the admin flags). Requests build a partially
+loaded ``User`` from those claims, so no query is spent on authentication;
+any other field is loaded from the database on first access.
+
+Claims are only trusted while the claims cache (``AUTH_CLAIMS_CACHE``),
+which every process must share, holds a fingerprint of the user's claim
+fields as the database has them, equal to the token's. A full ``User`` load
+adds the fingerprint for ``CLAIMS_CACHE_TIMEOUT`` seconds. Saving, deleting
+or updating a claim field through a queryset (see ``users.signals`` and
+``users.models.UserQuerySet``) replaces it with a marker no token matches,
+so every process reloads the user until it expires. An evicted entry or no
+claims cache at all means a full load: nothing ever trusts claims that were
+not checked against the database within the timeout.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import router
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+User = get_user_model()
+
+CLAIM_FIELDS = ('user_type', 'coach_id', 'is_active', 'is_staff', 'is_superuser')
+# The names a queryset update may set the claim fields by.
+CLAIM_UPDATE_FIELDS = frozenset(CLAIM_FIELDS) | {'coach'}
+CLAIMS_CACHE_TIMEOUT = 60
+CHANGED = 'changed'
+USER_CACHE_TIMEOUT = 30
+USER_CACHE_MAX_ENTRIES = 1000
+
+_loaded_users = {}
+
+
+def _claims_key(user_id):
+    return f'users:auth:claims:{user_id}'
+
+
+def claims_cache():
+    """The cache holding claim fingerprints, or ``None`` when claims must not be trusted."""
+    alias = settings.AUTH_CLAIMS_CACHE
+    return caches[alias] if alias else None
+
+
+def fingerprint(claims):
+    """A digest of the claim fields in ``claims``, a token or a dict."""
+    return hashlib.sha1(repr(tuple(claims[field] for field in CLAIM_FIELDS)).encode()).hexdigest()
+
+
+def user_claims(user):
+    """Token claims describing ``user``."""
+    return {field: getattr(user, field) for field in CLAIM_FIELDS}
+
+
+def mark_users_changed(user_ids):
+    """Stop trusting the token claims and loaded copies of ``user_ids`` in every process."""
+    for user_id in user_ids:
+        _loaded_users.pop(user_id, None)
+    store = claims_cache()
+    if store is not None and user_ids:
+        store.set_many({_claims_key(user_id): CHANGED for user_id in user_ids}, CLAIMS_CACHE_TIMEOUT)
+
+
+def token_user(user_id, token):
+    """A ``User`` with only the id and claim fields loaded; the rest are deferred."""
+    values = {'id': user_id, **{field: token[field] for field in CLAIM_FIELDS}}
+    field_names = [field.attname for field in User._meta.concrete_fields if field.attname in values]
+    return User.from_db(router.db_for_read(User), field_names, [values[name] for name in field_names])
+
+
+class TokenClaimsAuthentication(JWTAuthentication):
+    """JWT authentication building ``request.user`` from the token claims when they are current."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        store = claims_cache()
+        current = store.get(_claims_key(user_id)) if store is not None else None
+        now = time.time()
+        if current is not None and current != CHANGED:
+            if all(field in validated_token for field in CLAIM_FIELDS) and current == fingerprint(validated_token):
+                if not validated_token['is_active']:
+                    raise AuthenticationFailed('User is inactive', code='user_inactive')
+                return token_user(user_id, validated_token)
+            # Tokens issued before a change still skip the query once a current copy is loaded.
+            loaded = _loaded_users.get(user_id)
+            if loaded is not None:
+                loaded_at, user = loaded
+                if now - loaded_at < USER_CACHE_TIMEOUT and current == fingerprint(user_claims(user)):
+                    return user
+
+        user = super().get_user(validated_token)
+        if store is not None:
+            # add() rather than set(): a change marked since the row was read must win.
+            store.add(_claims_key(user_id), fingerprint(user_claims(user)), CLAIMS_CACHE_TIMEOUT)
+            if len(_loaded_users) >= USER_CACHE_MAX_ENTRIES:
+                _loaded_users.clear()
+            _loaded_users[user_id] = (now, user)
+        return user
@@ -0,0 +1,81 @@
+import time
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import resolve
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+User = get_user_model()
+
+ENDPOINTS = {
+    'checkins': '/api/checkins/',
+    'sessions': '/api/training/sessions/',
+    'meals': '/api/nutrition/meals/',
+    'training-plans': '/api/training/plans/',
+    'nutrition-plans': '/api/nutrition/plans/',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Render list endpoints through their serializers and through .values() plans, '
+        'fail if the JSON differs and report the time each path takes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help='Username the requests are made as.')
+        parser.add_argument(
+            '--endpoint', action='append', choices=sorted(ENDPOINTS),
+            help='Endpoint to compare; may be repeated. Defaults to all of them.',
+        )
+        parser.add_argument(
+            '--query', default='pagination=cursor&page_size=100',
+            help='Query string sent with every request.',
+        )
+        parser.add_argument('--repeat', type=int, default=20, help='Timed requests per path.')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist.")
+
+        mismatches = []
+        for name in options['endpoint'] or ENDPOINTS:
+            path = f"{ENDPOINTS[name]}?{options['query']}"
+            view_class = resolve(ENDPOINTS[name]).func.view_class
+            serializer_view = view_class.as_view(use_values_plan=False)
+            values_view = view_class.as_view()
+
+            expected = self.render(serializer_view, path, user)
+            actual = self.render(values_view, path, user)
+            if actual != expected:
+                mismatches.append(name)
+                self.stderr.write(self.style.ERROR(f'{name}: responses differ'))
+                continue
+
+            serializer_time = self.time(serializer_view, path, user, options['repeat'])
+            values_time = self.time(values_view, path, user, options['repeat'])
+            self.stdout.write(
+                f'{name}: {len(expected)} bytes, serializer {serializer_time * 1000:.1f} ms, '
+                f'values {values_time * 1000:.1f} ms ({serializer_time / values_time:.1f}x)'
+            )
+
+        if mismatches:
+            raise CommandError(f"Responses differ for: {', '.join(mismatches)}.")
+
+    def render(self, view, path, user):
+        request = APIRequestFactory().get(path)
+        force_authenticate(request, user=user)
+        response = async_to_sync(view)(request) if iscoroutinefunction(view) else view(request)
+        if response.status_code != 200:
+            raise CommandError(f'GET {path} returned {response.status_code}.')
+        return response.render().content
+
+    def time(self, view, path, user, repeat):
+        """Mean time of one request, response rendering included."""
+        start = time.perf_counter()
+        for _ in range(repeat):
+            self.render(view, path, user)
+        return (time.perf_counter() - start) / repeat
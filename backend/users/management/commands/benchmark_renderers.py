@@ -0,0 +1,96 @@
+import json
+import time
+
+import msgpack
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.urls import resolve
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from circus_grove.renderers import MessagePackRenderer, ORJSONRenderer
+from nutrition.models import NutritionPlan
+from training.models import TrainingPlan
+
+User = get_user_model()
+
+LIST_PATHS = (
+    '/api/checkins/?pagination=cursor&page_size=100',
+    '/api/training/sessions/?pagination=cursor&page_size=100',
+    '/api/nutrition/meals/?pagination=cursor&page_size=100',
+    '/api/training/plans/',
+    '/api/nutrition/plans/',
+)
+
+RENDERERS = (
+    ('json', JSONRenderer),
+    ('orjson', ORJSONRenderer),
+    ('msgpack', MessagePackRenderer),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Encode real endpoint responses with the stdlib JSON, orjson and MessagePack renderers, '
+        'fail if orjson output differs from JSON and report encode time and payload size.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help='Username the requests are made as.')
+        parser.add_argument('--repeat', type=int, default=50, help='Timed encodes per renderer.')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist.")
+
+        mismatches = []
+        for path in self.paths(user):
+            data = self.fetch(path, user)
+            encoded = {}
+            timings = {}
+            for name, renderer_class in RENDERERS:
+                renderer = renderer_class()
+                start = time.perf_counter()
+                for _ in range(options['repeat']):
+                    encoded[name] = renderer.render(data, renderer.media_type, {})
+                timings[name] = (time.perf_counter() - start) / options['repeat']
+
+            if encoded['orjson'] != encoded['json']:
+                mismatches.append(path)
+                self.stderr.write(self.style.ERROR(f'{path}: orjson output differs from JSON'))
+            elif msgpack.unpackb(encoded['msgpack']) != json.loads(encoded['json']):
+                mismatches.append(path)
+                self.stderr.write(self.style.ERROR(f'{path}: MessagePack values differ from JSON'))
+
+            self.stdout.write(path)
+            for name, _ in RENDERERS:
+                self.stdout.write(
+                    f'  {name:<8}{len(encoded[name]):>10} bytes {timings[name] * 1000:>9.3f} ms '
+                    f'({timings["json"] / timings[name]:.1f}x)'
+                )
+
+        if mismatches:
+            raise CommandError(f"Output differs for: {', '.join(mismatches)}.")
+
+    def paths(self, user):
+        """The list endpoints and the detail of the user's latest training and nutrition plans."""
+        paths = list(LIST_PATHS)
+        for model, prefix in ((TrainingPlan, '/api/training/plans'), (NutritionPlan, '/api/nutrition/plans')):
+            plan = model.objects.filter(Q(user=user) | Q(coach=user)).order_by('-created_at').first()
+            if plan is not None:
+                paths.append(f'{prefix}/{plan.pk}/')
+        return paths
+
+    def fetch(self, path, user):
+        request = APIRequestFactory().get(path)
+        force_authenticate(request, user=user)
+        match = resolve(path.split('?')[0])
+        view = async_to_sync(match.func) if iscoroutinefunction(match.func) else match.func
+        response = view(request, *match.args, **match.kwargs)
+        if response.status_code != 200:
+            raise CommandError(f'GET {path} returned {response.status_code}.')
+        return response.data
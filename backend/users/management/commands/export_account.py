@@ -0,0 +1,40 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from circus_grove.exports import FORMATS, TABLE_NAMES, export_users, stream_export
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Stream a user's full account, or a coach's clients, as NDJSON, CSV or ZIP."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help='Username to export.')
+        parser.add_argument('--clients', action='store_true', help="Export all of the coach's clients instead.")
+        parser.add_argument('--format', choices=FORMATS, default='ndjson', help='Output format.')
+        parser.add_argument('--table', choices=TABLE_NAMES, help='Table to export with --format csv.')
+        parser.add_argument('-o', '--output', default='-', help="Output file, or '-' for standard output.")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist.")
+        if options['clients'] and user.user_type != 'coach':
+            raise CommandError(f"'{user.username}' is not a coach.")
+        if options['format'] == 'csv' and not options['table']:
+            raise CommandError('--format csv exports a single table; pass --table.')
+
+        users = export_users(user, 'all' if options['clients'] else None)
+        chunks = stream_export(users, options['format'], options['table'])
+        if options['output'] == '-':
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+        else:
+            with open(options['output'], 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk)
@@ -0,0 +1,52 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from circus_grove.imports import FORMATS, IMPORTERS, get_importer, guess_format, read_records
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Bulk import historical check-ins, meals or training sessions from CSV or NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or NDJSON file, or '-' for standard input.")
+        parser.add_argument('--user', required=True, help='Username the records belong to.')
+        parser.add_argument('--type', required=True, choices=sorted(IMPORTERS), help='Record type.')
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Record format; defaults to NDJSON for .ndjson/.jsonl files and CSV otherwise.',
+        )
+        parser.add_argument('--batch-size', type=int, help='Rows validated and written per batch.')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist.")
+        importer = get_importer(options['type'], user)
+        if options['batch_size']:
+            importer.batch_size = options['batch_size']
+
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+        if path == '-':
+            result = importer.run(read_records(sys.stdin.buffer, fmt))
+        else:
+            try:
+                with open(path, 'rb') as stream:
+                    result = importer.run(read_records(stream, fmt))
+            except OSError as exc:
+                raise CommandError(str(exc))
+
+        for error in result.errors:
+            self.stderr.write(f"Line {error['line']}: {error['errors']}")
+        if result.failed > len(result.errors):
+            self.stderr.write(f'... and {result.failed - len(result.errors)} more error(s).')
+        style = self.style.SUCCESS if not result.failed else self.style.WARNING
+        self.stdout.write(style(
+            f'Imported {result.imported} of {result.processed} {options["type"]} row(s) for {user.username}; '
+            f'{result.failed} failed.'
+        ))
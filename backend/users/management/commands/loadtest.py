@@ -0,0 +1,129 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from nutrition.models import NutritionPlan
+from training.models import TrainingPlan
+from users.serializers import ClaimsTokenObtainPairSerializer
+
+User = get_user_model()
+
+READ_PATHS = (
+    '/api/checkins/?pagination=cursor&page_size=50',
+    '/api/training/sessions/?pagination=cursor&page_size=50',
+    '/api/nutrition/meals/?pagination=cursor&page_size=50',
+    '/api/training/plans/',
+    '/api/nutrition/plans/',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Send concurrent GET requests as a user to a running server over keep-alive '
+        'connections and report throughput and latency percentiles.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the server.')
+        parser.add_argument('--user', required=True, help='Username the requests are made as.')
+        parser.add_argument(
+            '--path', action='append',
+            help="Path to request, query string included; may be repeated. Defaults to the "
+                 "check-in, session, meal and plan endpoints and the user's latest plans.",
+        )
+        parser.add_argument('--concurrency', type=int, default=50, help='Open connections.')
+        parser.add_argument('--requests', type=int, default=2000, help='Requests in total.')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist.")
+        url = urlsplit(options['url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError('--url must be an http:// URL.')
+
+        token = str(ClaimsTokenObtainPairSerializer.get_token(user).access_token)
+        paths = options['path'] or self.paths(user)
+        latencies, errors, elapsed = asyncio.run(self.run(
+            url.hostname, url.port or 80, token, paths, options['concurrency'], options['requests'],
+        ))
+        if not latencies:
+            raise CommandError(f'All {errors} requests failed.')
+
+        cuts = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f"{len(latencies) + errors} requests, {options['concurrency']} connections, {elapsed:.2f} s\n"
+            f'  {len(latencies) / elapsed:.1f} req/s, {errors} errors\n'
+            f'  p50 {cuts[49] * 1000:.1f} ms, p95 {cuts[94] * 1000:.1f} ms, '
+            f'p99 {cuts[98] * 1000:.1f} ms, max {max(latencies) * 1000:.1f} ms'
+        )
+
+    def paths(self, user):
+        paths = list(READ_PATHS)
+        for model, prefix in ((TrainingPlan, '/api/training/plans'), (NutritionPlan, '/api/nutrition/plans')):
+            plan = model.objects.filter(Q(user=user) | Q(coach=user)).order_by('-created_at').first()
+            if plan is not None:
+                paths.append(f'{prefix}/{plan.pk}/')
+        return paths
+
+    async def run(self, host, port, token, paths, concurrency, total):
+        requests = iter(range(total))
+        latencies = []
+        errors = 0
+
+        async def client():
+            nonlocal errors
+            reader = writer = None
+            for number in requests:
+                request = (
+                    f'GET {paths[number % len(paths)]} HTTP/1.1\r\n'
+                    f'Host: {host}:{port}\r\n'
+                    f'Authorization: Bearer {token}\r\n'
+                    f'Accept: application/json\r\n'
+                    f'\r\n'
+                ).encode()
+                start = time.perf_counter()
+                try:
+                    if writer is None:
+                        reader, writer = await asyncio.open_connection(host, port)
+                    writer.write(request)
+                    status, keep_alive = await self.read_response(reader)
+                except (OSError, asyncio.IncompleteReadError, ValueError):
+                    errors += 1
+                    writer = None
+                    continue
+                if 200 <= status < 400:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+                if not keep_alive:
+                    writer.close()
+                    writer = None
+            if writer is not None:
+                writer.close()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return latencies, errors, time.perf_counter() - start
+
+    async def read_response(self, reader):
+        """Read one HTTP/1.1 response and return its status and whether the connection stays open."""
+        status_line = await reader.readuntil(b'\r\n')
+        status = int(status_line.split()[1])
+        headers = {}
+        while (line := await reader.readuntil(b'\r\n')) != b'\r\n':
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip().lower()
+        if headers.get('transfer-encoding') == 'chunked':
+            while size := int((await reader.readuntil(b'\r\n')).split(b';')[0], 16):
+                await reader.readexactly(size + 2)
+            await reader.readuntil(b'\r\n')
+        else:
+            await reader.readexactly(int(headers.get('content-length', 0)))
+        return status, headers.get('connection') != 'close'
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from circus_grove import openapi
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate the OpenAPI schema and store it, with a compressed copy for every '
+        'supported encoding, as the artifacts /api/schema/ serves.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Write nothing; exit with a non-zero status if the stored schema is out of date.',
+        )
+
+    def handle(self, *args, **options):
+        if options['check']:
+            stale = openapi.stale_formats(openapi.generate(silent=True))
+            if stale:
+                raise CommandError(
+                    f"The stored OpenAPI schema is out of date ({', '.join(stale)}). "
+                    f"Run 'python manage.py openapi_schema' and commit the result."
+                )
+            self.stdout.write('The stored OpenAPI schema is up to date.')
+            return
+
+        for path in openapi.write(openapi.generate()):
+            self.stdout.write(f'Wrote {path} ({path.stat().st_size} bytes)')
+
@@ -0,0 +1,121 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Run in a fresh interpreter: loads settings, populates the app registry with
+# each AppConfig.ready() timed, then loads the URLconf as the first request does.
+STARTUP_SCRIPT = '''
+import json
+import time
+
+start = time.perf_counter()
+import django
+from django.apps.config import AppConfig
+
+ready_times = {}
+create = AppConfig.create.__func__
+
+
+def timed_create(cls, entry):
+    app_config = create(cls, entry)
+    ready = app_config.ready
+
+    def timed_ready():
+        ready_start = time.perf_counter()
+        ready()
+        ready_times[app_config.label] = time.perf_counter() - ready_start
+
+    app_config.ready = timed_ready
+    return app_config
+
+
+AppConfig.create = classmethod(timed_create)
+phases = {}
+phase_start = time.perf_counter()
+from django.conf import settings
+settings.INSTALLED_APPS
+phases['settings'] = time.perf_counter() - phase_start
+phase_start = time.perf_counter()
+django.setup()
+phases['apps'] = time.perf_counter() - phase_start
+phase_start = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+phases['urls'] = time.perf_counter() - phase_start
+phases['total'] = time.perf_counter() - start
+print(json.dumps({'phases': phases, 'ready': ready_times}))
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        'Start Django in fresh interpreters and report cold start time, the time of each '
+        'startup phase and AppConfig.ready(), and the slowest imports. Fail if the median '
+        'cold start exceeds the budget.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Timed cold starts.')
+        parser.add_argument('--limit', type=int, default=15, help='Imports and packages listed.')
+        parser.add_argument(
+            '--budget', type=float, default=settings.STARTUP_BUDGET_MS,
+            help='Largest acceptable median cold start, in milliseconds. Defaults to STARTUP_BUDGET_MS.',
+        )
+
+    def handle(self, *args, **options):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE}
+
+        cold_starts = []
+        for _ in range(options['repeat']):
+            start = time.perf_counter()
+            self.start(env)
+            cold_starts.append((time.perf_counter() - start) * 1000)
+        median = statistics.median(cold_starts)
+
+        report, imports = self.start(env, importtime=True)
+        self.stdout.write(f'Cold start: median {median:.0f} ms, best {min(cold_starts):.0f} ms of {len(cold_starts)}')
+        self.stdout.write('Phases (one run, import timing included):')
+        for phase, seconds in report['phases'].items():
+            self.stdout.write(f'  {phase:<10}{seconds * 1000:>9.1f} ms')
+        self.stdout.write('AppConfig.ready():')
+        for label, seconds in sorted(report['ready'].items(), key=lambda item: -item[1]):
+            self.stdout.write(f'  {label:<24}{seconds * 1000:>9.1f} ms')
+
+        self.stdout.write('Slowest top-level imports, including the modules they import:')
+        top_level = sorted((entry for entry in imports if entry[0] == 0), key=lambda entry: -entry[2])
+        for _, _, cumulative, name in top_level[:options['limit']]:
+            self.stdout.write(f'  {name:<48}{cumulative / 1000:>9.1f} ms')
+        self.stdout.write('Import time by package:')
+        packages = defaultdict(int)
+        for _, own, _, name in imports:
+            packages[name.split('.')[0]] += own
+        for package, own in sorted(packages.items(), key=lambda item: -item[1])[:options['limit']]:
+            self.stdout.write(f'  {package:<48}{own / 1000:>9.1f} ms')
+
+        if median > options['budget']:
+            raise CommandError(f"Median cold start of {median:.0f} ms exceeds the budget of {options['budget']:.0f} ms.")
+
+    def start(self, env, importtime=False):
+        """Run the startup script; with ``importtime``, return its report and ``(depth, self us, cumulative us, module)`` imports."""
+        command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', STARTUP_SCRIPT]
+        result = subprocess.run(command, env=env, capture_output=True, text=True)
+        if result.returncode:
+            raise CommandError(f'Startup failed:\n{result.stderr}')
+        if not importtime:
+            return None
+
+        imports = []
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            own, cumulative, name = line[len('import time:'):].split('|')
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            imports.append((depth, int(own), int(cumulative), name.strip()))
+        return json.loads(result.stdout.splitlines()[-1]), imports
@@ -1,8 +1,27 @@
 from django.db import models
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager as BaseUserManager
 from django.core.exceptions import ValidationError
 
 
+class UserQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        """Update the rows, invalidating their token claims when a claim field changes (see users.authentication)."""
+        from .authentication import CLAIM_UPDATE_FIELDS, mark_users_changed
+
+        if CLAIM_UPDATE_FIELDS.isdisjoint(kwargs):
+            return super().update(**kwargs)
+        user_ids = list(self.values_list('pk', flat=True))
+        rows = super().update(**kwargs)
+        mark_users_changed(user_ids)
+        return rows
+
+    update.alters_data = True
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
+    pass
+
+
 class User(AbstractUser):
     """Custom user model for The Circus Grove."""
     USER_TYPE_CHOICES = [
@@ -27,6 +46,8 @@ class User(AbstractUser):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = UserManager()
+
     class Meta:
         db_table = 'users'
         ordering = ['-created_at']
@@ -0,0 +1,9 @@
+from rest_framework import permissions
+
+
+class IsCoach(permissions.BasePermission):
+    """Allow access only to coach users."""
+    message = 'Only coaches can access this resource.'
+
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated and request.user.user_type == 'coach')
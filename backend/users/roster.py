@@ -0,0 +1,71 @@
+"""
+Coach roster summaries.
+
+Every per-client figure is a correlated subquery annotated onto the client
+queryset, so a page of the roster is one query plus two prefetches for the
+active plan names, whatever the number of clients. Because the figures are
+plain annotations they can also be sorted and keyset-paginated on.
+"""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from checkins.models import CheckIn
+from nutrition.models import Meal, NutritionPlan
+from training.models import TrainingPlan, TrainingSession
+
+User = get_user_model()
+
+SUMMARY_FIELDS = (
+    'latest_weight_kg',
+    'latest_checkin_date',
+    'sessions_last_7_days',
+    'training_minutes_last_7_days',
+    'calories_today',
+)
+
+
+def _aggregate(queryset, expression):
+    """Correlated subquery returning one aggregate over ``queryset`` per client."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(user=OuterRef('pk'))
+            .order_by()
+            .values('user')
+            .annotate(total=expression)
+            .values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def client_summaries(coach, today):
+    """Clients of ``coach`` annotated with their roster summary figures."""
+    week_start = today - timedelta(days=6)
+    latest_checkin = CheckIn.objects.filter(user=OuterRef('pk')).order_by('-date', '-created_at')
+    recent_sessions = TrainingSession.objects.filter(date__range=(week_start, today))
+    return (
+        User.objects.filter(coach=coach)
+        .annotate(
+            latest_weight_kg=Subquery(latest_checkin.values('weight_kg')[:1]),
+            latest_checkin_date=Subquery(latest_checkin.values('date')[:1]),
+            sessions_last_7_days=_aggregate(recent_sessions, Count('id')),
+            training_minutes_last_7_days=_aggregate(recent_sessions, Sum('duration_minutes')),
+            calories_today=_aggregate(Meal.objects.filter(date=today), Sum('calories')),
+        )
+        .prefetch_related(
+            Prefetch(
+                'training_plans',
+                queryset=TrainingPlan.objects.filter(is_active=True).only('id', 'user_id', 'name'),
+                to_attr='active_training_plans',
+            ),
+            Prefetch(
+                'nutrition_plans',
+                queryset=NutritionPlan.objects.filter(is_active=True).only('id', 'user_id', 'name'),
+                to_attr='active_nutrition_plans',
+            ),
+        )
+    )
@@ -0,0 +1,29 @@
+"""
+OpenAPI extensions for the authentication classes in ``users.authentication``.
+
+drf-spectacular registers an extension when its class is defined. This
+module is imported by the ``load_extensions`` preprocessing hook rather than
+at startup, so only schema generation pays for importing drf-spectacular.
+"""
+from drf_spectacular.contrib.rest_framework_simplejwt import (
+    SimpleJWTScheme,
+    TokenObtainPairSerializerExtension,
+    TokenRefreshSerializerExtension,
+)
+
+
+class TokenClaimsScheme(SimpleJWTScheme):
+    target_class = 'users.authentication.TokenClaimsAuthentication'
+
+
+class ClaimsTokenObtainPairSerializerExtension(TokenObtainPairSerializerExtension):
+    target_class = 'users.serializers.ClaimsTokenObtainPairSerializer'
+
+
+class ClaimsTokenRefreshSerializerExtension(TokenRefreshSerializerExtension):
+    target_class = 'users.serializers.ClaimsTokenRefreshSerializer'
+
+
+def load_extensions(endpoints, **kwargs):
+    """Preprocessing hook that leaves the endpoints as they are; importing this module is its purpose."""
+    return endpoints
@@ -1,10 +1,15 @@
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 from django.contrib.auth import get_user_model
+from circus_grove.serializers import SparseFieldsMixin
+from .authentication import user_claims
 
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for User model."""
     coach_username = serializers.CharField(source='coach.username', read_only=True)
     
@@ -17,6 +22,7 @@ class UserSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        select_related = ['coach']
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -40,3 +46,48 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         validated_data.pop('password_confirm')
         user = User.objects.create_user(**validated_data)
         return user
+
+
+class ClientSummarySerializer(serializers.ModelSerializer):
+    """Serializer for a coach's roster row, built from users.roster annotations."""
+    latest_weight_kg = serializers.DecimalField(max_digits=5, decimal_places=2, read_only=True)
+    latest_checkin_date = serializers.DateField(read_only=True)
+    sessions_last_7_days = serializers.IntegerField(read_only=True)
+    training_minutes_last_7_days = serializers.IntegerField(read_only=True)
+    calories_today = serializers.IntegerField(read_only=True)
+    active_training_plans = serializers.SlugRelatedField(many=True, slug_field='name', read_only=True)
+    active_nutrition_plans = serializers.SlugRelatedField(many=True, slug_field='name', read_only=True)
+
+    class Meta:
+        model = User
+        fields = [
+            'id', 'username', 'first_name', 'last_name',
+            'latest_weight_kg', 'latest_checkin_date',
+            'sessions_last_7_days', 'training_minutes_last_7_days',
+            'calories_today', 'active_training_plans', 'active_nutrition_plans'
+        ]
+        read_only_fields = fields
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Token pair serializer embedding the user claims read by TokenClaimsAuthentication."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token.payload.update(user_claims(user))
+        return token
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refresh serializer re-reading the user claims so rotated tokens never carry stale ones."""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = User.objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh[api_settings.USER_ID_CLAIM]}
+        ).first()
+        if user is None or not user.is_active:
+            raise AuthenticationFailed('User not found or inactive', code='user_inactive')
+        refresh.payload.update(user_claims(user))
+        return super().validate({**attrs, 'refresh': str(refresh)})
@@ -0,0 +1,27 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .authentication import CLAIM_FIELDS, mark_users_changed
+
+User = get_user_model()
+
+
+@receiver(post_init, sender=User)
+def remember_claims(sender, instance, **kwargs):
+    """Keep the loaded claim fields so a save can tell whether tokens went stale."""
+    # Read __dict__ directly so deferred fields are not fetched.
+    instance._loaded_claims = tuple(instance.__dict__.get(field) for field in CLAIM_FIELDS)
+
+
+@receiver(post_save, sender=User)
+def invalidate_claims(sender, instance, created, **kwargs):
+    claims = tuple(instance.__dict__.get(field) for field in CLAIM_FIELDS)
+    if not created and claims != getattr(instance, '_loaded_claims', None):
+        mark_users_changed([instance.pk])
+    instance._loaded_claims = claims
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_claims(sender, instance, **kwargs):
+    mark_users_changed([instance.pk])
@@ -1,3 +1,175 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
+from urllib.parse import urlsplit
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from checkins.models import CheckIn
+from nutrition.models import Meal, NutritionPlan
+from training.models import TrainingPlan, TrainingSession
+
+from . import authentication
+from .serializers import ClaimsTokenObtainPairSerializer
+
+User = get_user_model()
+
+
+@override_settings(AUTH_CLAIMS_CACHE='default')
+class TokenClaimsAuthenticationTests(APITestCase):
+    url = '/api/training/sessions/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.coach = User.objects.create_user(username='coach', email='coach@example.com', user_type='coach')
+        cls.user = User.objects.create_user(username='client', email='client@example.com', coach=cls.coach)
+
+    def setUp(self):
+        cache.clear()
+        authentication._loaded_users.clear()
+        token = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def get(self):
+        """The response, and how many queries read the users table."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        return response, sum('FROM "users"' in query['sql'] for query in queries)
+
+    def test_claims_are_trusted_once_checked(self):
+        response, user_queries = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(user_queries, 1)
+        response, user_queries = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(user_queries, 0)
+
+    def test_evicted_fingerprint_reloads_the_user(self):
+        self.get()
+        cache.clear()
+        self.assertEqual(self.get()[1], 1)
+
+    def test_queryset_update_invalidates_claims(self):
+        self.get()
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.get()[0].status_code, 401)
+
+    def test_save_invalidates_claims(self):
+        self.get()
+        self.user.coach = None
+        self.user.save()
+        response, user_queries = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(user_queries, 1)
+
+    def test_deleted_user_is_rejected(self):
+        self.get()
+        self.user.delete()
+        self.assertEqual(self.get()[0].status_code, 401)
+
+    @override_settings(AUTH_CLAIMS_CACHE='')
+    def test_without_claims_cache_every_request_loads_the_user(self):
+        self.get()
+        response, user_queries = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(user_queries, 1)
+
+
+class ClientSummaryTests(APITestCase):
+    url = '/api/users/clients/summary/'
+
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.localdate()
+        cls.coach = User.objects.create_user(username='coach', email='coach@example.com', user_type='coach')
+        other_coach = User.objects.create_user(username='other', email='other@example.com', user_type='coach')
+        amy, ben, cal = (
+            User.objects.create_user(username=name, email=f'{name}@example.com', coach=cls.coach)
+            for name in ('amy', 'ben', 'cal')
+        )
+        dan = User.objects.create_user(username='dan', email='dan@example.com', coach=other_coach)
+        cls.amy = amy
+
+        CheckIn.objects.create(user=amy, date=today - timedelta(days=10), weight_kg=Decimal('70.00'))
+        CheckIn.objects.create(user=amy, date=today - timedelta(days=2), weight_kg=Decimal('71.00'))
+        CheckIn.objects.create(user=cal, date=today, weight_kg=Decimal('90.00'))
+        CheckIn.objects.create(user=dan, date=today, weight_kg=Decimal('60.00'))
+        for user, days_ago, minutes in ((amy, 1, 45), (amy, 7, 60), (cal, 0, 30), (cal, 6, 30), (dan, 0, 90)):
+            TrainingSession.objects.create(
+                user=user, title='Session', date=today - timedelta(days=days_ago), duration_minutes=minutes,
+            )
+        for days_ago, calories in ((0, 500), (0, 300), (1, 1000)):
+            Meal.objects.create(
+                user=amy, name='Meal', meal_type='lunch', date=today - timedelta(days=days_ago), calories=calories,
+            )
+        TrainingPlan.objects.create(coach=cls.coach, user=amy, name='Block A', start_date=today)
+        TrainingPlan.objects.create(coach=cls.coach, user=amy, name='Old', start_date=date(2020, 1, 1), is_active=False)
+        NutritionPlan.objects.create(
+            coach=cls.coach, user=amy, name='Cut', start_date=today, target_calories=2000,
+            target_protein_g=Decimal('150.00'), target_carbs_g=Decimal('200.00'), target_fat_g=Decimal('60.00'),
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.coach)
+
+    def usernames(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [row['username'] for row in response.json()['results']]
+
+    def test_coach_sees_only_their_clients(self):
+        self.assertEqual(self.usernames(), ['amy', 'ben', 'cal'])
+
+    def test_summary_figures(self):
+        with self.assertNumQueries(3):
+            rows = {row['username']: row for row in self.client.get(self.url).json()['results']}
+        self.assertEqual(rows['amy'], {
+            'id': self.amy.pk,
+            'username': 'amy',
+            'first_name': '',
+            'last_name': '',
+            'latest_weight_kg': '71.00',
+            'latest_checkin_date': (timezone.localdate() - timedelta(days=2)).isoformat(),
+            'sessions_last_7_days': 1,
+            'training_minutes_last_7_days': 45,
+            'calories_today': 800,
+            'active_training_plans': ['Block A'],
+            'active_nutrition_plans': ['Cut'],
+        })
+        ben = rows['ben']
+        self.assertEqual(
+            [ben[field] for field in ('latest_weight_kg', 'latest_checkin_date', 'sessions_last_7_days',
+                                      'training_minutes_last_7_days', 'calories_today')],
+            [None, None, 0, 0, 0],
+        )
+        self.assertEqual(rows['cal']['sessions_last_7_days'], 2)
+        self.assertEqual(rows['cal']['training_minutes_last_7_days'], 60)
+
+    def test_sorting(self):
+        self.assertEqual(self.usernames(ordering='-username'), ['cal', 'ben', 'amy'])
+        self.assertEqual(self.usernames(ordering='-sessions_last_7_days'), ['cal', 'amy', 'ben'])
+        self.assertEqual(self.usernames(ordering='latest_weight_kg'), ['amy', 'cal', 'ben'])
+
+    def test_unknown_ordering_is_rejected(self):
+        response = self.client.get(self.url, {'ordering': 'password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ordering', response.json())
+
+    def test_paging(self):
+        response = self.client.get(self.url, {'ordering': '-sessions_last_7_days', 'page_size': 2})
+        page = response.json()
+        self.assertEqual([row['username'] for row in page['results']], ['cal', 'amy'])
+        self.assertIsNone(page['previous'])
+        next_url = urlsplit(page['next'])
+        page = self.client.get(f'{next_url.path}?{next_url.query}').json()
+        self.assertEqual([row['username'] for row in page['results']], ['ben'])
+        self.assertIsNone(page['next'])
+
+    def test_clients_are_forbidden(self):
+        self.client.force_authenticate(self.amy)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import UserRegistrationView, UserDetailView, UserListView
+from .views import UserRegistrationView, UserDetailView, UserListView, ClientSummaryListView
 
 app_name = 'users'
 
@@ -7,4 +7,5 @@ urlpatterns = [
     path('register/', UserRegistrationView.as_view(), name='register'),
     path('profile/', UserDetailView.as_view(), name='profile'),
     path('', UserListView.as_view(), name='list'),
+    path('clients/summary/', ClientSummaryListView.as_view(), name='client-summary'),
 ]
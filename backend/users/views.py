@@ -1,8 +1,15 @@
 from rest_framework import generics, permissions, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.contrib.auth import get_user_model
-from .serializers import UserSerializer, UserRegistrationSerializer
+from django.utils import timezone
+from circus_grove.conditional import ConditionalGetMixin
+from circus_grove.pagination import KeysetPagination
+from circus_grove.prefetch import PrefetchQuerysetMixin
+from .permissions import IsCoach
+from .roster import SUMMARY_FIELDS, client_summaries
+from .serializers import UserSerializer, UserRegistrationSerializer, ClientSummarySerializer
 
 User = get_user_model()
 
@@ -14,18 +21,40 @@ class UserRegistrationView(generics.CreateAPIView):
     permission_classes = [permissions.AllowAny]
 
 
-class UserDetailView(generics.RetrieveUpdateAPIView):
+class UserDetailView(ConditionalGetMixin, generics.RetrieveUpdateAPIView):
     """View for user profile detail and update."""
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
+        # request.user may be built from token claims with most fields deferred.
+        return User.objects.select_related('coach').get(pk=self.request.user.pk)
 
+    def get_object_validator_queryset(self):
+        return User.objects.filter(pk=self.request.user.pk)
 
-class UserListView(generics.ListAPIView):
+
+class UserListView(ConditionalGetMixin, PrefetchQuerysetMixin, generics.ListAPIView):
     """View for listing users (admin only)."""
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAdminUser]
+
+
+class ClientSummaryListView(generics.ListAPIView):
+    """View for a coach's roster with each client's recent activity."""
+    serializer_class = ClientSummarySerializer
+    permission_classes = [IsCoach]
+    pagination_class = KeysetPagination
+    ordering_fields = ('username', 'first_name', 'last_name') + SUMMARY_FIELDS
+
+    def get_queryset(self):
+        return client_summaries(self.request.user, timezone.localdate())
+
+    def get_keyset_ordering(self, queryset):
+        ordering = self.request.query_params.get('ordering', 'username')
+        if ordering.lstrip('-') not in self.ordering_fields:
+            raise ValidationError({'ordering': f"Must be one of: {', '.join(self.ordering_fields)}."})
+        return [ordering]
+
@@ -1,17 +1,35 @@
 import { defineStore } from 'pinia'
 import { ref } from 'vue'
-import { checkinsApi } from '../api'
+import { checkinsApi, apiClient } from '../api'
 
 export const useCheckinsStore = defineStore('checkins', () => {
   const checkins = ref([])
+  const checkinsNext = ref(null)
   const currentCheckin = ref(null)
   const loading = ref(false)
 
+  // Pass { pagination: 'cursor' } to page long histories by keyset
   async function fetchCheckins(params) {
     loading.value = true
     try {
       const response = await checkinsApi.getCheckins(params)
       checkins.value = response.data.results || response.data
+      checkinsNext.value = response.data.next || null
+      return response.data
+    } catch (error) {
+      throw error
+    } finally {
+      loading.value = false
+    }
+  }
+
+  async function fetchMoreCheckins() {
+    if (!checkinsNext.value) return null
+    loading.value = true
+    try {
+      const response = await apiClient.get(checkinsNext.value)
+      checkins.value.push(...response.data.results)
+      checkinsNext.value = response.data.next || null
       return response.data
     } catch (error) {
       throw error
@@ -76,9 +94,11 @@ export const useCheckinsStore = defineStore('checkins', () => {
 
   return {
     checkins,
+    checkinsNext,
     currentCheckin,
     loading,
     fetchCheckins,
+    fetchMoreCheckins,
     fetchCheckin,
     createCheckin,
     updateCheckin,
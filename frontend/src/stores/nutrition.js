@@ -1,17 +1,35 @@
 import { defineStore } from 'pinia'
 import { ref } from 'vue'
-import { nutritionApi } from '../api'
+import { nutritionApi, apiClient } from '../api'
 
 export const useNutritionStore = defineStore('nutrition', () => {
   const meals = ref([])
+  const mealsNext = ref(null)
   const currentMeal = ref(null)
   const loading = ref(false)
 
+  // Pass { pagination: 'cursor' } to page long histories by keyset
   async function fetchMeals(params) {
     loading.value = true
     try {
       const response = await nutritionApi.getMeals(params)
       meals.value = response.data.results || response.data
+      mealsNext.value = response.data.next || null
+      return response.data
+    } catch (error) {
+      throw error
+    } finally {
+      loading.value = false
+    }
+  }
+
+  async function fetchMoreMeals() {
+    if (!mealsNext.value) return null
+    loading.value = true
+    try {
+      const response = await apiClient.get(mealsNext.value)
+      meals.value.push(...response.data.results)
+      mealsNext.value = response.data.next || null
       return response.data
     } catch (error) {
       throw error
@@ -147,11 +165,13 @@ export const useNutritionStore = defineStore('nutrition', () => {
 
   return {
     meals,
+    mealsNext,
     currentMeal,
     plans,
     currentPlan,
     loading,
     fetchMeals,
+    fetchMoreMeals,
     fetchMeal,
     createMeal,
     updateMeal,
@@ -1,17 +1,35 @@
 import { defineStore } from 'pinia'
 import { ref } from 'vue'
-import { trainingApi } from '../api'
+import { trainingApi, apiClient } from '../api'
 
 export const useTrainingStore = defineStore('training', () => {
   const sessions = ref([])
+  const sessionsNext = ref(null)
   const currentSession = ref(null)
   const loading = ref(false)
 
+  // Pass { pagination: 'cursor' } to page long histories by keyset
   async function fetchSessions(params) {
     loading.value = true
     try {
       const response = await trainingApi.getSessions(params)
       sessions.value = response.data.results || response.data
+      sessionsNext.value = response.data.next || null
+      return response.data
+    } catch (error) {
+      throw error
+    } finally {
+      loading.value = false
+    }
+  }
+
+  async function fetchMoreSessions() {
+    if (!sessionsNext.value) return null
+    loading.value = true
+    try {
+      const response = await apiClient.get(sessionsNext.value)
+      sessions.value.push(...response.data.results)
+      sessionsNext.value = response.data.next || null
       return response.data
     } catch (error) {
       throw error
@@ -147,11 +165,13 @@ export const useTrainingStore = defineStore('training', () => {
 
   return {
     sessions,
+    sessionsNext,
     currentSession,
     plans,
     currentPlan,
     loading,
     fetchSessions,
+    fetchMoreSessions,
     fetchSession,
     createSession,
     updateSession,